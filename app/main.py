@@ -5,31 +5,78 @@ import os
 import asyncio
 from contextlib import asynccontextmanager
 
+try:
+    import uvloop
+except ImportError:  # uvloop is not available on Windows
+    uvloop = None
+
 # Load environment variables
 load_dotenv()
 
+# Run the app (and the Gmail poller started in lifespan) on uvloop when available
+if uvloop is not None:
+    asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+
 # Import routers
 from app.routes import todos, messages, integrations, gmail
 from app.services.gmail_poller import gmail_poller
+from app.services.message_processor import message_retry_queue
+from src.core.email_processor import init_http_client, close_http_client
+
+
+def _run_poller_in_process() -> bool:
+    """
+    Whether the API process should run the Gmail poller itself.
+    
+    RUN_POLLER defaults to 1 for a single worker and to 0 for several
+    (WEB_CONCURRENCY > 1), which need `python -m app.workers.gmail_poller`
+    alongside them. RUN_POLLER=1 with several workers is refused, since
+    every worker would poll Gmail.
+    
+    Raises:
+        RuntimeError: If RUN_POLLER=1 is combined with several workers
+    """
+    workers = int(os.getenv("WEB_CONCURRENCY", "1"))
+    run_poller = os.getenv("RUN_POLLER", "1" if workers <= 1 else "0") == "1"
+    if run_poller and workers > 1:
+        raise RuntimeError(
+            f"RUN_POLLER=1 would start {workers} Gmail pollers (WEB_CONCURRENCY={workers}); "
+            "set RUN_POLLER=0 and run `python -m app.workers.gmail_poller` instead"
+        )
+    return run_poller
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Lifespan context manager to start and stop background tasks."""
-    # Start the Gmail poller
-    polling_task = asyncio.create_task(gmail_poller.start_polling())
-    print("✅ Started Gmail background poller")
+    # Pool connections across all LLM calls of this process
+    init_http_client()
+    
+    # Start retrying messages whose analysis failed (including ones left over from a restart)
+    await message_retry_queue.start()
+    
+    # Start the Gmail poller, unless it runs as a separate process
+    # (RUN_POLLER=0 with `python -m app.workers.gmail_poller`) so that
+    # multiple API workers don't each poll Gmail
+    polling_task = None
+    if _run_poller_in_process():
+        polling_task = asyncio.create_task(gmail_poller.start_polling())
+        print("✅ Started Gmail background poller")
     
     yield
     
     # Stop the Gmail poller
-    gmail_poller.stop_polling()
-    polling_task.cancel()
-    try:
-        await polling_task
-    except asyncio.CancelledError:
-        pass
-    print("✅ Stopped Gmail background poller")
+    if polling_task is not None:
+        gmail_poller.stop_polling()
+        polling_task.cancel()
+        try:
+            await polling_task
+        except asyncio.CancelledError:
+            pass
+        print("✅ Stopped Gmail background poller")
+    await gmail_poller.close_client()
+    await message_retry_queue.stop()
+    await close_http_client()
 
 
 # Create FastAPI app
@@ -77,4 +124,13 @@ async def health_check():
 
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8000, reload=True)
+    # Fail before forking the workers rather than in each of them
+    _run_poller_in_process()
+    uvicorn.run(
+        "app.main:app",
+        host="0.0.0.0",
+        port=8000,
+        loop="uvloop" if uvloop is not None else "asyncio",
+        http="httptools",
+        workers=int(os.getenv("WEB_CONCURRENCY", "1"))
+    )
@@ -1,4 +1,4 @@
 from .todo import Todo, TodoCreate, TodoUpdate, Priority
-from .message import MessageCreate, ProcessedMessage
+from .message import MessageCreate, MessageSource, ProcessedMessage
 
-__all__ = ['Todo', 'TodoCreate', 'TodoUpdate', 'Priority', 'MessageCreate', 'ProcessedMessage']
+__all__ = ['Todo', 'TodoCreate', 'TodoUpdate', 'Priority', 'MessageCreate', 'MessageSource', 'ProcessedMessage']
@@ -1,5 +1,14 @@
 from pydantic import BaseModel
 from typing import Optional, List
+from enum import Enum
+
+
+class MessageSource(str, Enum):
+    gmail = "gmail"
+    slack = "slack"
+    whatsapp = "whatsapp"
+    outlook = "outlook"
+    telegram = "telegram"
 
 
 class MessageBase(BaseModel):
@@ -1,14 +1,15 @@
 from fastapi import APIRouter, HTTPException
 from typing import List
+import asyncio
 import sys
 import os
 
 # Add parent directory to path to import from src
 sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
 
-from src.core.gmail_helper import GmailHelper
 from app.services.message_processor import MessageProcessor
 from app.services.gmail_poller import gmail_poller
+from app.services.gmail_rate_limiter import gmail_rate_limiter
 from app.models import MessageCreate
 
 router = APIRouter(prefix="/api/gmail", tags=["gmail"])
@@ -35,24 +36,36 @@ async def sync_gmail_emails(count: int = 10, unread_only: bool = True):
             )
         
         # Fetch emails from Gmail
-        with GmailHelper() as gmail:
-            emails = gmail.read_latest_emails(n=count, unread_only=unread_only)
+        emails = await gmail_poller.fetch_loader.load(n=count, unread_only=unread_only)
         
-        # Process each email and create todos
-        all_todo_ids = []
-        processed_count = 0
+        # Skip emails the background poller (or another sync) already
+        # processed or is processing; the fetch may be shared with it.
+        # Claimed emails are marked read right away
+        emails = await gmail_poller.claim_emails(emails)
         
-        for email_data in emails:
-            # Create a message object from email
-            message = MessageCreate(
-                content=email_data["body"],
-                sender=email_data["from"],
-                source="gmail",
-                subject=email_data["subject"]
-            )
+        try:
+            # Create message objects from emails
+            messages = [
+                MessageCreate(
+                    content=email_data["body"],
+                    sender=email_data["from"],
+                    source="gmail",
+                    subject=email_data["subject"]
+                )
+                for email_data in emails
+            ]
             
-            # Process the message
-            todo_ids = MessageProcessor.process_message(message)
+            # Process all messages in a single batch (failed ones go to the retry queue)
+            results = await MessageProcessor.process_messages(messages)
+            for email_data in emails:
+                gmail_poller.processed_email_ids.add(email_data["id"])
+        finally:
+            # Emails left unprocessed by an error are marked unread again
+            await gmail_poller.release_emails(emails)
+        
+        all_todo_ids = []
+        processed_count = 0
+        for todo_ids in results:
             all_todo_ids.extend(todo_ids)
             
             if todo_ids:
@@ -78,8 +91,9 @@ async def sync_gmail_emails(count: int = 10, unread_only: bool = True):
 async def test_gmail_connection():
     """Test Gmail connection and credentials."""
     try:
-        with GmailHelper() as gmail:
-            folders = gmail.get_folders()
+        await gmail_rate_limiter.acquire()
+        async with gmail_poller.get_client() as gmail:
+            folders = await asyncio.to_thread(gmail.get_folders)
             return {
                 "status": "connected",
                 "message": "Successfully connected to Gmail",
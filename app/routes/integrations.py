@@ -1,4 +1,4 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Response
 from typing import List, Dict, Any
 from app.storage.memory_store import store
 
@@ -6,13 +6,13 @@ router = APIRouter(prefix="/api/integrations", tags=["integrations"])
 
 
 @router.get("", response_model=List[Dict[str, Any]])
-async def get_integrations():
+def get_integrations():
     """Get all available integrations."""
-    return store.get_all_integrations()
+    return Response(content=store.get_all_integrations_json(), media_type="application/json")
 
 
 @router.get("/{name}", response_model=Dict[str, Any])
-async def get_integration(name: str):
+def get_integration(name: str):
     """Get a specific integration by name."""
     integration = store.get_integration(name)
     if not integration:
@@ -21,7 +21,7 @@ async def get_integration(name: str):
 
 
 @router.post("/{name}/toggle", response_model=Dict[str, Any])
-async def toggle_integration(name: str):
+def toggle_integration(name: str):
     """Toggle an integration's enabled status."""
     integration = store.toggle_integration(name)
     if not integration:
@@ -1,9 +1,17 @@
 from fastapi import APIRouter
-from app.models import MessageCreate, ProcessedMessage
-from app.services.message_processor import MessageProcessor
+from app.models import MessageCreate, MessageSource, ProcessedMessage
+from app.services.message_batcher import message_batcher
 
 router = APIRouter(prefix="/api/messages", tags=["messages"])
 
+SOURCE_DISPLAY_NAMES = {
+    MessageSource.gmail: "Gmail",
+    MessageSource.slack: "Slack",
+    MessageSource.whatsapp: "WhatsApp",
+    MessageSource.outlook: "Outlook",
+    MessageSource.telegram: "Telegram"
+}
+
 
 @router.post("/process", response_model=ProcessedMessage)
 async def process_message(message: MessageCreate):
@@ -11,7 +19,7 @@ async def process_message(message: MessageCreate):
     Process a message and create action items.
     Works for any message source.
     """
-    todo_ids = MessageProcessor.process_message(message)
+    todo_ids = await message_batcher.submit(message)
     
     return ProcessedMessage(
         message=message,
@@ -19,61 +27,13 @@ async def process_message(message: MessageCreate):
     )
 
 
-@router.post("/gmail")
-async def receive_gmail_message(message: MessageCreate):
-    """Endpoint specifically for Gmail messages."""
-    message.source = "gmail"
-    todo_ids = MessageProcessor.process_message(message)
-    
-    return {
-        "message": "Gmail message processed",
-        "todos_created": todo_ids
-    }
-
-
-@router.post("/slack")
-async def receive_slack_message(message: MessageCreate):
-    """Endpoint specifically for Slack messages."""
-    message.source = "slack"
-    todo_ids = MessageProcessor.process_message(message)
-    
-    return {
-        "message": "Slack message processed",
-        "todos_created": todo_ids
-    }
-
-
-@router.post("/whatsapp")
-async def receive_whatsapp_message(message: MessageCreate):
-    """Endpoint specifically for WhatsApp messages."""
-    message.source = "whatsapp"
-    todo_ids = MessageProcessor.process_message(message)
-    
-    return {
-        "message": "WhatsApp message processed",
-        "todos_created": todo_ids
-    }
-
-
-@router.post("/outlook")
-async def receive_outlook_message(message: MessageCreate):
-    """Endpoint specifically for Outlook messages."""
-    message.source = "outlook"
-    todo_ids = MessageProcessor.process_message(message)
-    
-    return {
-        "message": "Outlook message processed",
-        "todos_created": todo_ids
-    }
-
-
-@router.post("/telegram")
-async def receive_telegram_message(message: MessageCreate):
-    """Endpoint specifically for Telegram messages."""
-    message.source = "telegram"
-    todo_ids = MessageProcessor.process_message(message)
+@router.post("/{source}")
+async def receive_source_message(source: MessageSource, message: MessageCreate):
+    """Endpoint for messages from a specific source (gmail, slack, whatsapp, outlook, telegram)."""
+    message.source = source.value
+    todo_ids = await message_batcher.submit(message)
     
     return {
-        "message": "Telegram message processed",
+        "message": f"{SOURCE_DISPLAY_NAMES[source]} message processed",
         "todos_created": todo_ids
     }
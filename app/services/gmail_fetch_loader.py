@@ -0,0 +1,57 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, List, Tuple
+
+
+class GmailFetchLoader:
+    """
+    Coalesce concurrent Gmail fetches (DataLoader-style).
+
+    Callers asking for the same (n, unread_only) while a fetch is pending or
+    in flight share that fetch instead of issuing their own IMAP round-trip.
+    """
+
+    def __init__(
+        self,
+        fetch: Callable[..., Awaitable[List[Dict[str, Any]]]],
+        coalesce_seconds: float = 0.01
+    ):
+        self._fetch = fetch
+        self.coalesce_seconds = coalesce_seconds
+        self._in_flight: Dict[Tuple[int, bool], asyncio.Future] = {}
+        self._fetch_tasks = set()  # Keep references so fetch tasks aren't garbage collected
+
+    async def load(self, n: int = 10, unread_only: bool = True) -> List[Dict[str, Any]]:
+        """
+        Fetch emails, joining a matching fetch if one is already scheduled.
+
+        Args:
+            n: Number of emails to fetch
+            unread_only: Only fetch unread emails
+
+        Returns:
+            List of email dicts (a separate list per caller)
+        """
+        key = (n, unread_only)
+        future = self._in_flight.get(key)
+        if future is None:
+            future = asyncio.get_running_loop().create_future()
+            self._in_flight[key] = future
+            task = asyncio.create_task(self._run(key, future))
+            self._fetch_tasks.add(task)
+            task.add_done_callback(self._fetch_tasks.discard)
+
+        # Shield so one cancelled caller doesn't cancel the fetch for the others
+        return list(await asyncio.shield(future))
+
+    async def _run(self, key: Tuple[int, bool], future: asyncio.Future):
+        """Wait for the coalesce window, run the fetch and resolve all waiters."""
+        n, unread_only = key
+        try:
+            await asyncio.sleep(self.coalesce_seconds)
+            result = await self._fetch(n=n, unread_only=unread_only)
+        except Exception as e:
+            self._in_flight.pop(key, None)
+            future.set_exception(e)
+        else:
+            self._in_flight.pop(key, None)
+            future.set_result(result)
@@ -1,47 +1,257 @@
 import asyncio
+from contextlib import asynccontextmanager
 from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+import imaplib
 import sys
 import os
 
 # Add parent directory to path to import from src
 sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
 
-from src.core.gmail_helper import GmailHelper
-from src.core.email_processor import EmailProcessor
+from src.core.gmail_helper import GmailHelper, MAX_STORE_IDS
 from app.services.todo_service import TodoService
-from app.models import TodoCreate, Priority
+from app.services.gmail_fetch_loader import GmailFetchLoader
+from app.services.gmail_rate_limiter import gmail_rate_limiter
+from app.storage.bloom_filter import RotatingBloomFilter
+from app.services.message_processor import MessageProcessor, message_retry_queue
+from app.models import MessageCreate
 
 
 class GmailPoller:
     """Background service to poll Gmail periodically and create todos."""
     
+    # Upper bound for the interval after consecutive empty polls
+    MAX_IDLE_INTERVAL_SECONDS = 600
+    # Upper bound for the backoff after consecutive errors
+    MAX_ERROR_BACKOFF_SECONDS = 300
+    # Fetch attempts when Gmail reports a quota error (IMAP has no Retry-After,
+    # so the retry waits for the throttled rate limiter to refill instead)
+    MAX_FETCH_ATTEMPTS = 2
+    
     def __init__(self, poll_interval_seconds: int = 60):
         self.poll_interval_seconds = poll_interval_seconds
+        self.current_interval_seconds = poll_interval_seconds
+        self.consecutive_empty_polls = 0
+        self.consecutive_errors = 0
         self.is_running = False
         self.last_poll_time = None
         self.last_poll_status = None
         self.total_emails_processed = 0
         self.total_todos_created = 0
-        self.email_processor = EmailProcessor()
-        self.processed_email_ids = set()  # Track processed emails to avoid duplicates
+        # Track processed emails to avoid duplicates (bounded memory, rotated daily)
+        self.processed_email_ids = RotatingBloomFilter(
+            capacity=100_000,
+            error_rate=0.001,
+            rotation_seconds=24 * 60 * 60
+        )
+        # Emails being processed right now (by poll_gmail or /sync): ID -> whether
+        # the claim marked it read (so releasing it unprocessed marks it unread again)
+        self._claimed_email_ids: Dict[str, bool] = {}
+        # Shared IMAP connection, reused across polls and by the Gmail routes
+        self._gmail: Optional[GmailHelper] = None
+        self._gmail_lock = asyncio.Lock()
+        # Concurrent fetches (poller, /sync, /trigger-poll) share one IMAP round-trip
+        self.fetch_loader = GmailFetchLoader(self.read_latest_emails, coalesce_seconds=0.01)
         
     async def start_polling(self):
         """Start the background polling loop."""
         self.is_running = True
-        print(f"🚀 Gmail poller started - polling every {self.poll_interval_seconds} seconds")
+        print(f"🚀 Gmail poller started - polling every {self.poll_interval_seconds}-{self.MAX_IDLE_INTERVAL_SECONDS} seconds")
         
         while self.is_running:
             try:
-                await self.poll_gmail()
+                new_email_count = await self.poll_gmail()
+                self.consecutive_errors = 0
+                if new_email_count:
+                    self.consecutive_empty_polls = 0
+                else:
+                    self.consecutive_empty_polls += 1
+                self.current_interval_seconds = self._next_interval()
             except Exception as e:
                 print(f"⚠️  Error in polling loop: {e}")
                 self.last_poll_status = f"error: {str(e)}"
+                self.consecutive_errors += 1
+                self.current_interval_seconds = self._error_backoff(e)
             
             # Wait for the next poll
-            await asyncio.sleep(self.poll_interval_seconds)
+            await asyncio.sleep(self.current_interval_seconds)
+    
+    def _next_interval(self) -> float:
+        """Back off exponentially while the mailbox is quiet, reset once new email arrives."""
+        return min(
+            self.poll_interval_seconds * (2 ** self.consecutive_empty_polls),
+            self.MAX_IDLE_INTERVAL_SECONDS
+        )
+    
+    def _error_backoff(self, error: Exception) -> float:
+        """Back off exponentially on errors; wait out the full cap on Gmail quota errors."""
+        if gmail_rate_limiter.is_quota_error(error):
+            return self.MAX_ERROR_BACKOFF_SECONDS
+        return min(
+            self.poll_interval_seconds * (2 ** (self.consecutive_errors - 1)),
+            self.MAX_ERROR_BACKOFF_SECONDS
+        )
+    
+    @asynccontextmanager
+    async def get_client(self):
+        """
+        Get the shared Gmail connection, serialising access with a lock.
+        
+        The connection is opened lazily and kept alive with NOOP between uses;
+        it is reconnected if the server dropped it. IMAP calls are blocking, so
+        callers should run them with asyncio.to_thread.
+        
+        Raises:
+            ValueError: If Gmail credentials are not configured
+            ConnectionError: If connecting to Gmail fails
+        """
+        async with self._gmail_lock:
+            if self._gmail is None or not await asyncio.to_thread(self._gmail.noop):
+                await self._close_client()
+                gmail = GmailHelper()
+                await asyncio.to_thread(gmail.connect)
+                self._gmail = gmail
+            
+            try:
+                yield self._gmail
+            except (imaplib.IMAP4.abort, ConnectionError, OSError):
+                # Drop the broken connection; the next caller reconnects
+                await self._close_client()
+                raise
+    
+    async def read_latest_emails(self, n: int = 10, unread_only: bool = True):
+        """
+        Fetch emails over the shared connection, rate limited across all callers.
+        
+        Each requested email costs one token from the shared rate limiter. On a
+        Gmail quota error the limiter is throttled and the fetch retried once it
+        has refilled.
+        
+        Args:
+            n: Number of emails to fetch
+            unread_only: Only fetch unread emails
+            
+        Returns:
+            List of email dicts as returned by GmailHelper.read_latest_emails
+        """
+        for attempt in range(1, self.MAX_FETCH_ATTEMPTS + 1):
+            await gmail_rate_limiter.acquire(n)
+            try:
+                async with self.get_client() as gmail:
+                    emails = await asyncio.to_thread(gmail.read_latest_emails, n=n, unread_only=unread_only)
+            except Exception as e:
+                if not gmail_rate_limiter.is_quota_error(e):
+                    raise
+                gmail_rate_limiter.on_throttled()
+                print(f"⚠️  Gmail quota error (attempt {attempt}/{self.MAX_FETCH_ATTEMPTS}): {e}")
+                if attempt == self.MAX_FETCH_ATTEMPTS:
+                    raise
+                continue
+            
+            gmail_rate_limiter.on_success()
+            return emails
+    
+    async def mark_as_read(self, email_ids: List[str]):
+        """
+        Mark emails as read.
+        
+        Failures are logged and ignored; the poller also remembers processed IDs.
+        
+        Args:
+            email_ids: IDs (UIDs) of the emails to mark as read
+        """
+        await self._set_seen(email_ids, seen=True)
     
-    async def poll_gmail(self):
-        """Poll Gmail once and process emails."""
+    async def mark_as_unread(self, email_ids: List[str]):
+        """
+        Mark emails as unread.
+        
+        Failures are logged and ignored.
+        
+        Args:
+            email_ids: IDs (UIDs) of the emails to mark as unread
+        """
+        await self._set_seen(email_ids, seen=False)
+    
+    async def _set_seen(self, email_ids: List[str], seen: bool):
+        """Set or clear \\Seen on emails, one UID STORE per MAX_STORE_IDS emails."""
+        if not email_ids:
+            return
+        
+        try:
+            async with self.get_client() as gmail:
+                mark = gmail.mark_as_read if seen else gmail.mark_as_unread
+                for i in range(0, len(email_ids), MAX_STORE_IDS):
+                    await asyncio.to_thread(mark, email_ids[i:i + MAX_STORE_IDS])
+        except Exception as e:
+            print(f"⚠️  Error marking emails as {'read' if seen else 'unread'}: {e}")
+    
+    async def claim_emails(self, emails: List[dict]) -> List[dict]:
+        """
+        Claim fetched emails for processing, skipping processed or already claimed ones.
+        
+        Concurrent callers of fetch_loader get the same emails; only the first
+        to claim an email processes it. The claim is taken before anything is
+        awaited, so it is atomic on the event loop. Claimed unread emails are
+        then marked read right away (emails are fetched with BODY.PEEK, which
+        leaves them unread), so other processes polling UNSEEN, such as the
+        standalone worker, skip them while the LLM works on them. Release the
+        claim with release_emails once done.
+        
+        Args:
+            emails: Email dicts as returned by read_latest_emails
+            
+        Returns:
+            The emails claimed by this caller
+        """
+        claimed = []
+        for email_data in emails:
+            email_id = email_data["id"]
+            if email_id in self.processed_email_ids or email_id in self._claimed_email_ids:
+                continue
+            self._claimed_email_ids[email_id] = email_data.get("is_unread", True)
+            claimed.append(email_data)
+        
+        await self.mark_as_read([e["id"] for e in claimed if self._claimed_email_ids[e["id"]]])
+        return claimed
+    
+    async def release_emails(self, emails: List[dict]):
+        """
+        Release claimed emails once processing is done or has failed.
+        
+        Emails not added to processed_email_ids are handed back: the ones the
+        claim marked read are marked unread again, so a later poll retries them.
+        
+        Args:
+            emails: Email dicts claimed with claim_emails
+        """
+        unprocessed_ids = []
+        for email_data in emails:
+            marked_read = self._claimed_email_ids.pop(email_data["id"], False)
+            if marked_read and email_data["id"] not in self.processed_email_ids:
+                unprocessed_ids.append(email_data["id"])
+        
+        await self.mark_as_unread(unprocessed_ids)
+    
+    async def _close_client(self):
+        """Disconnect and forget the shared Gmail connection."""
+        if self._gmail is not None:
+            gmail, self._gmail = self._gmail, None
+            await asyncio.to_thread(gmail.disconnect)
+    
+    async def close_client(self):
+        """Close the shared Gmail connection (used on shutdown)."""
+        async with self._gmail_lock:
+            await self._close_client()
+    
+    async def poll_gmail(self) -> int:
+        """
+        Poll Gmail once and process emails.
+        
+        Returns:
+            Number of new (not previously processed) emails found
+        """
         try:
             # Check if credentials are configured
             gmail_user = os.getenv("GMAIL_USER")
@@ -50,79 +260,103 @@ class GmailPoller:
             if not gmail_user or not gmail_password:
                 self.last_poll_status = "credentials_not_configured"
                 print("⚠️  Gmail credentials not configured. Skipping poll.")
-                return
+                return 0
             
             print(f"📧 Polling Gmail at {datetime.now().isoformat()}")
             
             # Fetch unread emails
-            with GmailHelper() as gmail:
-                emails = gmail.read_latest_emails(n=10, unread_only=True)
+            emails = await self.fetch_loader.load(n=10, unread_only=True)
             
             if not emails:
                 print("✅ No new emails to process")
                 self.last_poll_time = datetime.now().isoformat()
                 self.last_poll_status = "success"
-                return
+                return 0
             
-            # Filter out already processed emails
-            new_emails = [e for e in emails if e['id'] not in self.processed_email_ids]
+            # Skip emails that are already processed, or being processed by /sync
+            new_emails = await self.claim_emails(emails)
             
             if not new_emails:
                 print("✅ All emails already processed")
                 self.last_poll_time = datetime.now().isoformat()
                 self.last_poll_status = "success"
-                return
+                return 0
             
             print(f"📨 Found {len(new_emails)} new emails to process")
             
-            # Process each email using the email_processor
-            todos_created = 0
-            for email_data in new_emails:
-                try:
-                    # Extract action item using email_processor
-                    action_item = self.email_processor.extract_action_item(email_data)
-                    
-                    if action_item.is_action_item and action_item.action_item:
-                        # Map priority
-                        priority_map = {
-                            "low": Priority.low,
-                            "medium": Priority.medium,
-                            "high": Priority.high
-                        }
-                        priority = priority_map.get(action_item.priority, Priority.medium)
-                        
-                        # Create todo
-                        todo_create = TodoCreate(
-                            title=action_item.action_item,
-                            description=f"From: {email_data['from_name']} <{email_data['from']}>\nSubject: {email_data['subject']}",
-                            priority=priority,
-                            due_date=action_item.due_date,
-                            source="gmail"
-                        )
-                        
-                        TodoService.create_todo(todo_create)
-                        todos_created += 1
-                        print(f"✅ Created todo: {action_item.action_item[:50]}...")
-                    
-                    # Mark as processed
-                    self.processed_email_ids.add(email_data['id'])
-                    
-                except Exception as e:
-                    print(f"⚠️  Error processing email {email_data.get('subject', 'unknown')}: {e}")
+            try:
+                emails_processed, todos_created = await self._process_emails(new_emails)
+            finally:
+                await self.release_emails(new_emails)
             
             # Update stats
-            self.total_emails_processed += len(new_emails)
+            self.total_emails_processed += emails_processed
             self.total_todos_created += todos_created
             self.last_poll_time = datetime.now().isoformat()
             self.last_poll_status = "success"
             
-            print(f"✅ Poll complete - processed {len(new_emails)} emails, created {todos_created} todos")
+            print(f"✅ Poll complete - processed {emails_processed} emails, created {todos_created} todos")
+            return len(new_emails)
             
         except Exception as e:
             print(f"❌ Error polling Gmail: {e}")
             self.last_poll_status = f"error: {str(e)}"
             raise
     
+    async def _process_emails(self, emails: List[dict]) -> Tuple[int, int]:
+        """
+        Extract action items from claimed emails and create todos.
+        
+        Args:
+            emails: Email dicts claimed with claim_emails
+            
+        Returns:
+            (emails processed, todos created)
+        """
+        # Extract action items for all new emails in a single batch
+        messages = [
+            MessageCreate(
+                content=email_data["body"],
+                sender=email_data["from"],
+                source="gmail",
+                subject=email_data["subject"]
+            )
+            for email_data in emails
+        ]
+        action_items = await MessageProcessor.analyze_messages(messages)
+        
+        todos_created = 0
+        emails_processed = 0
+        for email_data, message, action_item in zip(emails, messages, action_items):
+            try:
+                if action_item is None:
+                    # Analysis failed; the retry queue retries it with backoff and
+                    # creates a fallback todo once it gives up, so a non-retryable
+                    # error doesn't fail the email (and its batch) on every poll
+                    await message_retry_queue.enqueue(message)
+                    self.processed_email_ids.add(email_data['id'])
+                    emails_processed += 1
+                    continue
+                
+                todo_create = MessageProcessor.build_todo(
+                    message,
+                    action_item,
+                    description=f"From: {email_data['from_name']} <{email_data['from']}>\nSubject: {email_data['subject']}"
+                )
+                if todo_create is not None:
+                    await TodoService.create_todo(todo_create)
+                    todos_created += 1
+                    print(f"✅ Created todo: {action_item.action_item[:50]}...")
+                
+                # Mark as processed
+                self.processed_email_ids.add(email_data['id'])
+                emails_processed += 1
+                
+            except Exception as e:
+                print(f"⚠️  Error processing email {email_data.get('subject', 'unknown')}: {e}")
+        
+        return emails_processed, todos_created
+    
     def stop_polling(self):
         """Stop the background polling loop."""
         self.is_running = False
@@ -133,11 +367,15 @@ class GmailPoller:
         return {
             "is_running": self.is_running,
             "poll_interval_seconds": self.poll_interval_seconds,
+            "current_interval_seconds": self.current_interval_seconds,
+            "consecutive_empty_polls": self.consecutive_empty_polls,
+            "consecutive_errors": self.consecutive_errors,
             "last_poll_time": self.last_poll_time,
             "last_poll_status": self.last_poll_status,
             "total_emails_processed": self.total_emails_processed,
             "total_todos_created": self.total_todos_created,
-            "processed_email_count": len(self.processed_email_ids)
+            "processed_email_count": self.processed_email_ids.count,
+            "rate_limiter": gmail_rate_limiter.get_status()
         }
 
 
@@ -0,0 +1,81 @@
+import asyncio
+import time
+from typing import Any, Dict
+
+
+class GmailRateLimiter:
+    """
+    Token bucket shared by everything that talks to Gmail IMAP.
+
+    Each fetched message costs one token. The refill rate is halved when
+    Gmail reports a quota/throttling error and recovers additively after
+    successful calls (AIMD).
+    """
+
+    # Gmail IMAP responses that indicate a quota/bandwidth limit
+    QUOTA_ERROR_MARKERS = ("THROTTLED", "OVERQUOTA", "bandwidth limits", "exceeded")
+
+    def __init__(
+        self,
+        rate_per_second: float = 2.0,
+        burst: int = 50,
+        min_rate_per_second: float = 0.1
+    ):
+        self.max_rate_per_second = rate_per_second
+        self.rate_per_second = rate_per_second
+        self.min_rate_per_second = min_rate_per_second
+        self.burst = burst
+        self._tokens = float(burst)
+        self._updated_at = time.monotonic()
+
+    def _refill(self):
+        """Add the tokens accumulated since the last refill."""
+        now = time.monotonic()
+        self._tokens = min(self.burst, self._tokens + (now - self._updated_at) * self.rate_per_second)
+        self._updated_at = now
+
+    async def acquire(self, tokens: int = 1):
+        """
+        Wait until enough tokens are available and take them.
+
+        Args:
+            tokens: Number of tokens to take (capped at the bucket size)
+        """
+        tokens = min(max(tokens, 1), self.burst)
+        while True:
+            self._refill()
+            if self._tokens >= tokens:
+                self._tokens -= tokens
+                return
+            await asyncio.sleep((tokens - self._tokens) / self.rate_per_second)
+
+    def on_success(self):
+        """Additively recover the refill rate after a successful call."""
+        self.rate_per_second = min(
+            self.max_rate_per_second,
+            self.rate_per_second + self.max_rate_per_second * 0.05
+        )
+
+    def on_throttled(self):
+        """Halve the refill rate and drain the bucket after a quota error."""
+        self._refill()
+        self.rate_per_second = max(self.min_rate_per_second, self.rate_per_second * 0.5)
+        self._tokens = 0.0
+
+    @classmethod
+    def is_quota_error(cls, error: Exception) -> bool:
+        """Check whether an error looks like a Gmail quota/throttling response."""
+        message = str(error).lower()
+        return any(marker.lower() in message for marker in cls.QUOTA_ERROR_MARKERS)
+
+    def get_status(self) -> Dict[str, Any]:
+        """Get the current limiter state."""
+        self._refill()
+        return {
+            "rate_per_second": self.rate_per_second,
+            "tokens_available": round(self._tokens, 2)
+        }
+
+
+# Global instance shared by the poller and the Gmail routes
+gmail_rate_limiter = GmailRateLimiter(rate_per_second=2.0, burst=50)
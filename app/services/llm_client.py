@@ -0,0 +1,207 @@
+import asyncio
+import logging
+import random
+import re
+import time
+from typing import Any, Dict, Optional
+
+from litellm import acompletion
+
+logger = logging.getLogger(__name__)
+logger.addHandler(logging.NullHandler())
+
+
+class AIMDLimiter:
+    """
+    Concurrency limiter whose permit count adapts with AIMD.
+
+    Permits grow additively (+0.5) after fast successful calls and are halved
+    on latency spikes or rate limiting, clamped to [min_permits, max_permits].
+    """
+
+    def __init__(
+        self,
+        initial_permits: float = 4,
+        min_permits: float = 1,
+        max_permits: float = 16,
+        target_latency_seconds: float = 10.0
+    ):
+        self.permits = float(initial_permits)
+        self.min_permits = float(min_permits)
+        self.max_permits = float(max_permits)
+        self.target_latency_seconds = target_latency_seconds
+        self.in_flight = 0
+        self._condition: Optional[asyncio.Condition] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def _get_condition(self) -> asyncio.Condition:
+        """Get the condition bound to the running event loop."""
+        loop = asyncio.get_running_loop()
+        if self._condition is None or self._loop is not loop:
+            self._condition = asyncio.Condition()
+            self._loop = loop
+            self.in_flight = 0
+        return self._condition
+
+    async def acquire(self):
+        """Wait until a permit is available and take it."""
+        condition = self._get_condition()
+        async with condition:
+            while self.in_flight >= int(self.permits):
+                await condition.wait()
+            self.in_flight += 1
+
+    async def release(self):
+        """Return a permit and wake up waiters."""
+        condition = self._get_condition()
+        async with condition:
+            self.in_flight -= 1
+            condition.notify_all()
+
+    def on_success(self, latency_seconds: float):
+        """Additive increase on fast calls, multiplicative decrease on slow ones."""
+        if latency_seconds <= self.target_latency_seconds:
+            self.permits = min(self.max_permits, self.permits + 0.5)
+        else:
+            self.on_backoff()
+
+    def on_backoff(self):
+        """Multiplicative decrease after a rate limit or latency spike."""
+        self.permits = max(self.min_permits, self.permits * 0.5)
+
+    def get_status(self) -> Dict[str, Any]:
+        """Get the current limiter state."""
+        return {
+            "permits": self.permits,
+            "in_flight": self.in_flight
+        }
+
+
+class LLMClient:
+    """LiteLLM wrapper with AIMD concurrency control and 429-aware retries."""
+
+    MAX_RETRIES = 5
+    BASE_BACKOFF_SECONDS = 1.0
+    MAX_BACKOFF_SECONDS = 47.0
+    # Pause new calls when fewer than this fraction of the rate limit remains
+    MIN_REMAINING_FRACTION = 0.1
+
+    _DURATION_RE = re.compile(r"(\d+(?:\.\d+)?)(ms|s|m|h)")
+    _DURATION_UNITS = {"ms": 0.001, "s": 1.0, "m": 60.0, "h": 3600.0}
+
+    def __init__(self, limiter: Optional[AIMDLimiter] = None):
+        self.limiter = limiter or AIMDLimiter()
+        self._paused_until = 0.0
+
+    async def complete(self, max_retries: Optional[int] = None, **kwargs):
+        """
+        Call litellm.acompletion, retrying on 429/5xx.
+
+        Args:
+            max_retries: Retries after the first attempt (default: MAX_RETRIES);
+                pass 0 when the caller retries on its own schedule
+            **kwargs: Arguments passed through to litellm.acompletion
+
+        Returns:
+            The LiteLLM response
+
+        Raises:
+            Exception: The last error once retries are exhausted, or any
+                non-retryable error immediately
+        """
+        if max_retries is None:
+            max_retries = self.MAX_RETRIES
+        attempt = 0
+        while True:
+            await self._wait_if_paused()
+            await self.limiter.acquire()
+            start = time.monotonic()
+            try:
+                response = await acompletion(**kwargs)
+            except Exception as e:
+                if not self._is_retryable(e) or attempt >= max_retries:
+                    raise
+                self.limiter.on_backoff()
+                delay = self._retry_after(e) or self._backoff_delay(attempt)
+                attempt += 1
+                logger.warning(
+                    "LLM call failed (%s), retry %d/%d in %.1fs",
+                    e.__class__.__name__, attempt, max_retries, delay
+                )
+            else:
+                self.limiter.on_success(time.monotonic() - start)
+                self._observe_rate_limit_headers(response)
+                return response
+            finally:
+                await self.limiter.release()
+
+            await asyncio.sleep(delay)
+
+    async def _wait_if_paused(self):
+        """Sleep while the provider reported that the rate limit is nearly exhausted."""
+        delay = self._paused_until - time.monotonic()
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+    def _is_retryable(self, error: Exception) -> bool:
+        """Rate limits, server errors and timeouts are worth retrying."""
+        status_code = getattr(error, "status_code", None)
+        if isinstance(status_code, int):
+            return status_code in (408, 429) or status_code >= 500
+        return isinstance(error, (asyncio.TimeoutError, ConnectionError))
+
+    def _backoff_delay(self, attempt: int) -> float:
+        """Exponential backoff (1s, 2s, 4s, ...) capped at 47s with jitter."""
+        delay = min(self.MAX_BACKOFF_SECONDS, self.BASE_BACKOFF_SECONDS * (2 ** attempt))
+        return delay * random.uniform(0.5, 1.0)
+
+    def _retry_after(self, error: Exception) -> Optional[float]:
+        """Read a Retry-After header from an error response, if present."""
+        headers = getattr(error, "headers", None)
+        if not headers:
+            response = getattr(error, "response", None)
+            headers = getattr(response, "headers", None)
+        if not headers:
+            return None
+
+        value = headers.get("retry-after") or headers.get("Retry-After")
+        try:
+            return min(self.MAX_BACKOFF_SECONDS, float(value)) if value is not None else None
+        except (TypeError, ValueError):
+            return None
+
+    def _parse_duration(self, value: str) -> float:
+        """Parse OpenAI-style reset durations such as "1s", "6m0s" or "20ms"."""
+        return sum(
+            float(amount) * self._DURATION_UNITS[unit]
+            for amount, unit in self._DURATION_RE.findall(value)
+        )
+
+    def _observe_rate_limit_headers(self, response):
+        """Pause new calls until reset when the remaining rate limit drops below 10%."""
+        hidden_params = getattr(response, "_hidden_params", None) or {}
+        headers = hidden_params.get("additional_headers") or {}
+
+        for kind in ("requests", "tokens"):
+            remaining = headers.get(f"x-ratelimit-remaining-{kind}") or headers.get(f"llm_provider-x-ratelimit-remaining-{kind}")
+            limit = headers.get(f"x-ratelimit-limit-{kind}") or headers.get(f"llm_provider-x-ratelimit-limit-{kind}")
+            reset = headers.get(f"x-ratelimit-reset-{kind}") or headers.get(f"llm_provider-x-ratelimit-reset-{kind}")
+            try:
+                remaining, limit = float(remaining), float(limit)
+            except (TypeError, ValueError):
+                continue
+
+            if limit > 0 and remaining / limit < self.MIN_REMAINING_FRACTION and reset:
+                pause = self._parse_duration(str(reset))
+                self._paused_until = max(self._paused_until, time.monotonic() + pause)
+
+    def get_status(self) -> Dict[str, Any]:
+        """Get the current client state."""
+        return {
+            **self.limiter.get_status(),
+            "paused_for_seconds": max(0.0, self._paused_until - time.monotonic())
+        }
+
+
+# Global instance
+llm_client = LLMClient(AIMDLimiter(initial_permits=4, min_permits=1, max_permits=16))
@@ -0,0 +1,73 @@
+import asyncio
+from typing import List, Optional, Tuple
+
+from app.models import MessageCreate
+from app.services.message_processor import MessageProcessor
+
+
+class MessageBatcher:
+    """Coalesce concurrently submitted messages into batched MessageProcessor calls."""
+
+    def __init__(self, max_batch_size: int = 16, max_wait_seconds: float = 0.05):
+        self.max_batch_size = max_batch_size
+        self.max_wait_seconds = max_wait_seconds
+        self._pending: List[Tuple[MessageCreate, asyncio.Future]] = []
+        self._flush_handle: Optional[asyncio.TimerHandle] = None
+        self._flush_tasks = set()  # Keep references so flush tasks aren't garbage collected
+
+    async def submit(self, message: MessageCreate) -> List[str]:
+        """
+        Queue a message for processing and wait for its batch to complete.
+
+        The batch is flushed once max_batch_size messages are pending or
+        max_wait_seconds have passed since the first pending message.
+
+        Args:
+            message: The message to process
+
+        Returns:
+            List of todo IDs that were created for this message
+        """
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((message, future))
+
+        if len(self._pending) >= self.max_batch_size:
+            self._flush()
+        elif self._flush_handle is None:
+            self._flush_handle = loop.call_later(self.max_wait_seconds, self._flush)
+
+        return await future
+
+    def _flush(self):
+        """Hand the pending messages off to a background processing task."""
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+
+        batch, self._pending = self._pending, []
+        if not batch:
+            return
+
+        task = asyncio.create_task(self._process_batch(batch))
+        self._flush_tasks.add(task)
+        task.add_done_callback(self._flush_tasks.discard)
+
+    async def _process_batch(self, batch: List[Tuple[MessageCreate, asyncio.Future]]):
+        """Process one batch and resolve the waiting futures."""
+        messages = [message for message, _ in batch]
+        try:
+            results = await MessageProcessor.process_messages(messages)
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        for (_, future), todo_ids in zip(batch, results):
+            if not future.done():
+                future.set_result(todo_ids)
+
+
+# Global instance
+message_batcher = MessageBatcher(max_batch_size=16, max_wait_seconds=0.05)
@@ -1,10 +1,16 @@
-from typing import List
+from typing import Dict, List
 from app.models import MessageCreate, TodoCreate, Priority
 from app.services.todo_service import TodoService
-from litellm import completion
+from app.services.llm_client import llm_client
+from app.services.retry_queue import MessageRetryQueue
+from app.storage.memory_store import store
+from src.core.email_processor import is_non_action_email
+from litellm.utils import type_to_response_format_param
 from pydantic import BaseModel
 from typing import Optional
+import asyncio
 import os
+import json
 
 
 class ActionItem(BaseModel):
@@ -14,13 +20,21 @@ class ActionItem(BaseModel):
     priority: Optional[str] = None
 
 
+class IndexedActionItem(ActionItem):
+    index: int
+
+
+class ActionItemBatch(BaseModel):
+    items: List[IndexedActionItem]
+
+
 class MessageProcessor:
     """Service to process messages and create action items."""
-    
+
     SYSTEM_PROMPT = """
 You are a helpful assistant that processes messages and identifies action items.
 
-Analyze the provided message and determine if it contains any action items or tasks that need to be done.
+You will be given a JSON array of messages. Analyze each message and determine if it contains any action items or tasks that need to be done.
 
 Rules:
 1. If the message contains an action item, return is_action_item: true
@@ -28,6 +42,7 @@ Rules:
 3. Identify any due dates mentioned (format: YYYY-MM-DD)
 4. Determine priority: "low", "medium", or "high" based on urgency
 5. If no action item exists, return is_action_item: false
+6. Return exactly one entry in "items" per input message, with "index" set to the message's "index"
 
 Examples of action items:
 - "Review the Q4 budget report by Friday"
@@ -40,81 +55,258 @@ Examples of non-action items:
 - "The meeting went well yesterday"
 - "Here's the document you requested"
 """
-    
+
+    # Extra rules for emails, kept in line with EmailProcessor.ACTION_ITEM_PROMPT
+    GMAIL_PROMPT_RULES = """
+The messages are emails. Descriptions should be actionable, ignore sales emails, ignore UPI transactions, ignore newsletters, ignore promotional emails, ignore social media notifications, ignore notifications, ignore spam, ignore other.
+Return is_action_item: false for ignored emails.
+
+Keywords indicating urgency:
+- High priority: "urgent", "asap", "immediately", "critical", "emergency"
+- Medium priority: "soon", "this week", "important"
+- Low priority: "when you can", "no rush", "eventually"
+"""
+
+    # Maximum number of messages sent to the LLM in a single call
+    BATCH_SIZE = 5
+    # Characters of each message's content sent to the LLM, so a full batch fits the model's context
+    MAX_CONTENT_CHARS = 16_000
+
     @staticmethod
-    def process_message(message: MessageCreate) -> List[str]:
+    async def _analyze_batch(messages: List[MessageCreate], max_retries: Optional[int] = None) -> List[ActionItem]:
         """
-        Process a message and create todos for any action items found.
-        
+        Extract action items from a batch of messages with a single LLM call.
+
         Args:
-            message: The message to process
-            
+            messages: The messages to analyze
+            max_retries: LLM client retries (default: the client's MAX_RETRIES)
+
         Returns:
-            List of todo IDs that were created
+            One ActionItem per message, aligned by index
+
+        Raises:
+            ValueError: If the LLM does not return exactly one result per message index
         """
-        # Format the message for AI processing
-        message_content = f"""
-Subject: {message.subject or 'N/A'}
-From: {message.sender}
-Source: {message.source}
-
-Content:
-{message.content}
-"""
-        
-        try:
-            # Use LiteLLM to analyze the message
-            response = completion(
-                model=os.getenv("LLM_MODEL", "openai/gpt-4o-mini"),
-                messages=[
-                    {"role": "system", "content": MessageProcessor.SYSTEM_PROMPT},
-                    {"role": "user", "content": message_content}
-                ],
-                response_format=ActionItem
+        # Format the messages as a JSON array for AI processing
+        message_content = json.dumps([
+            {
+                "index": i,
+                "subject": message.subject or "N/A",
+                "sender": message.sender,
+                "source": message.source,
+                "content": message.content[:MessageProcessor.MAX_CONTENT_CHARS]
+            }
+            for i, message in enumerate(messages)
+        ])
+
+        # Emails get the Gmail ignore rules (promos, newsletters, notifications, ...)
+        if all(message.source == "gmail" for message in messages):
+            system_message = _GMAIL_SYSTEM_MESSAGE
+        else:
+            system_message = _SYSTEM_MESSAGE
+
+        # Use LiteLLM to analyze all messages at once (with backpressure and retries)
+        response = await llm_client.complete(
+            model=_MODEL,
+            messages=[
+                system_message,
+                {"role": "user", "content": message_content}
+            ],
+            response_format=_RESPONSE_FORMAT,
+            max_retries=max_retries
+        )
+
+        # Parse the response
+        result_content = response.choices[0].message.content
+
+        # Parse the JSON response straight into the model if it's a string
+        if isinstance(result_content, str):
+            batch = ActionItemBatch.model_validate_json(result_content)
+        else:
+            batch = ActionItemBatch.model_validate(result_content)
+
+        # Counts alone don't catch reordered or merged results, so check the indices
+        items = sorted(batch.items, key=lambda item: item.index)
+        if [item.index for item in items] != list(range(len(messages))):
+            raise ValueError(
+                f"Expected action item results for indices 0-{len(messages) - 1}, "
+                f"got {[item.index for item in batch.items]}"
             )
-            
-            # Parse the response
-            result_content = response.choices[0].message.content
-            
-            # Parse JSON response if it's a string
-            if isinstance(result_content, str):
-                import json
-                action_item = ActionItem(**json.loads(result_content))
+
+        return items
+
+    @staticmethod
+    async def analyze_messages(messages: List[MessageCreate]) -> List[Optional[ActionItem]]:
+        """
+        Extract action items from messages, analyzing batches concurrently.
+
+        Gmail messages from senders or with subjects that never contain action
+        items (no-reply, newsletters, receipts, ...) are skipped without an LLM
+        call. The rest are grouped by source, so Gmail messages keep the Gmail
+        prompt rules, and split into batches of BATCH_SIZE, one LLM call each.
+        The batches run concurrently, bounded by the LLM client's AIMD limiter.
+        When a batch fails, its messages are analyzed one by one, so one bad
+        message doesn't fail its neighbours.
+
+        Args:
+            messages: The messages to analyze
+
+        Returns:
+            One ActionItem per message, aligned by index (None where analysis failed)
+        """
+        action_items: List[Optional[ActionItem]] = [None] * len(messages)
+        pending: Dict[str, List[int]] = {}  # Source -> indices of its messages that need the LLM
+        for i, message in enumerate(messages):
+            if message.source == "gmail" and is_non_action_email({"from": message.sender, "subject": message.subject or ""}):
+                action_items[i] = ActionItem(is_action_item=False)
             else:
-                action_item = ActionItem(**result_content)
-            
-            # Create todos if action items were found
-            todo_ids = []
-            if action_item.is_action_item and action_item.action_item:
-                # Determine priority
-                priority_map = {
-                    "low": Priority.low,
-                    "medium": Priority.medium,
-                    "high": Priority.high
-                }
-                priority = priority_map.get(action_item.priority, Priority.medium)
-                
-                # Create the todo
-                todo_create = TodoCreate(
-                    title=action_item.action_item,
-                    description=f"From {message.source}: {message.subject or message.sender}",
-                    priority=priority,
-                    due_date=action_item.due_date,
-                    source=message.source
-                )
-                
-                created_todo = TodoService.create_todo(todo_create)
-                todo_ids.append(created_todo.id)
-            
-            return todo_ids
-            
+                pending.setdefault(message.source, []).append(i)
+
+        batches = [
+            indices[i:i + MessageProcessor.BATCH_SIZE]
+            for indices in pending.values()
+            for i in range(0, len(indices), MessageProcessor.BATCH_SIZE)
+        ]
+        await asyncio.gather(*[
+            MessageProcessor._analyze_into(messages, batch, action_items) for batch in batches
+        ])
+
+        return action_items
+
+    @staticmethod
+    async def _analyze_into(
+        messages: List[MessageCreate],
+        batch: List[int],
+        action_items: List[Optional[ActionItem]]
+    ):
+        """Analyze messages[i] for i in batch into action_items, retrying a failed batch one message at a time."""
+        try:
+            results = await MessageProcessor._analyze_batch([messages[i] for i in batch])
         except Exception as e:
-            print(f"Error processing message with AI: {str(e)}")
-            # Fallback: create a simple todo from the message
-            todo_create = TodoCreate(
-                title=message.content[:100],  # First 100 chars as title
-                description=f"From {message.source}: {message.subject or message.sender}",
-                source=message.source
-            )
-            created_todo = TodoService.create_todo(todo_create)
-            return [created_todo.id]
+            print(f"Error processing messages with AI: {str(e)}")
+            if len(batch) > 1:
+                await asyncio.gather(*[
+                    MessageProcessor._analyze_into(messages, [i], action_items) for i in batch
+                ])
+            return
+
+        for i, action_item in zip(batch, results):
+            action_items[i] = action_item
+
+    @staticmethod
+    async def process_messages(messages: List[MessageCreate]) -> List[List[str]]:
+        """
+        Process a batch of messages and create todos for any action items found.
+
+        Args:
+            messages: The messages to process
+
+        Returns:
+            List of created todo IDs for each message, aligned by index
+        """
+        action_items = await MessageProcessor.analyze_messages(messages)
+
+        results = [[] for _ in messages]
+        pending = []  # (message index, TodoCreate) pairs, created in one store transaction
+        for i, (message, action_item) in enumerate(zip(messages, action_items)):
+            if action_item is None:
+                # Retry in the background; the fallback todo is only created
+                # once all retries have failed
+                await message_retry_queue.enqueue(message)
+            else:
+                todo_create = MessageProcessor.build_todo(message, action_item)
+                if todo_create is not None:
+                    pending.append((i, todo_create))
+
+        if pending:
+            created_todos = await TodoService.create_todos([todo_create for _, todo_create in pending])
+            for (i, _), created_todo in zip(pending, created_todos):
+                results[i].append(created_todo.id)
+
+        return results
+
+    @staticmethod
+    def build_todo(
+        message: MessageCreate,
+        action_item: ActionItem,
+        description: Optional[str] = None
+    ) -> Optional[TodoCreate]:
+        """
+        Build the todo for a message if its analysis found an action item.
+
+        Args:
+            message: The analyzed message
+            action_item: The analysis result for the message
+            description: Todo description (defaults to the message source and subject/sender)
+
+        Returns:
+            The todo to create, or None if there is no action item
+        """
+        if not (action_item.is_action_item and action_item.action_item):
+            return None
+
+        # Determine priority
+        priority = _PRIORITY_MAP.get(action_item.priority, Priority.medium)
+
+        return TodoCreate(
+            title=action_item.action_item,
+            description=description or f"From {message.source}: {message.subject or message.sender}",
+            priority=priority,
+            due_date=action_item.due_date,
+            source=message.source
+        )
+
+    @staticmethod
+    async def _retry_message(message: MessageCreate) -> List[str]:
+        """Analyze a previously failed message again and create its todos (retry queue handler)."""
+        # The retry queue already backs off between attempts; a single LLM call
+        # per attempt keeps the two retry layers from multiplying
+        action_item = (await MessageProcessor._analyze_batch([message], max_retries=0))[0]
+        todo_create = MessageProcessor.build_todo(message, action_item)
+        if todo_create is None:
+            return []
+        created_todo = await TodoService.create_todo(todo_create)
+        return [created_todo.id]
+
+    @staticmethod
+    async def _create_fallback_todo(message: MessageCreate) -> str:
+        """Create a simple todo from the message once analysis has failed for good."""
+        todo_create = TodoCreate(
+            title=message.content[:100],  # First 100 chars as title
+            description=f"From {message.source}: {message.subject or message.sender}",
+            source=message.source
+        )
+        created_todo = await TodoService.create_todo(todo_create)
+        return created_todo.id
+
+    @staticmethod
+    async def process_message(message: MessageCreate) -> List[str]:
+        """
+        Process a message and create todos for any action items found.
+
+        Args:
+            message: The message to process
+
+        Returns:
+            List of todo IDs that were created
+        """
+        return (await MessageProcessor.process_messages([message]))[0]
+
+
+# Per-call constants, built once at import time
+_MODEL = os.getenv("LLM_MODEL", "openai/gpt-4o-mini")
+_SYSTEM_MESSAGE = {"role": "system", "content": MessageProcessor.SYSTEM_PROMPT}
+_GMAIL_SYSTEM_MESSAGE = {"role": "system", "content": MessageProcessor.SYSTEM_PROMPT + MessageProcessor.GMAIL_PROMPT_RULES}
+_RESPONSE_FORMAT = type_to_response_format_param(ActionItemBatch)
+_PRIORITY_MAP = {
+    "low": Priority.low,
+    "medium": Priority.medium,
+    "high": Priority.high
+}
+
+# Global retry queue for messages whose analysis failed (started in the app lifespan)
+message_retry_queue = MessageRetryQueue(
+    handler=MessageProcessor._retry_message,
+    on_give_up=MessageProcessor._create_fallback_todo,
+    db_file=store.todos_db_file
+)
@@ -0,0 +1,210 @@
+import asyncio
+import atexit
+import random
+import sqlite3
+import threading
+import time
+import uuid
+from pathlib import Path
+from typing import Awaitable, Callable, Optional
+
+from app.models import MessageCreate
+
+
+class MessageRetryQueue:
+    """
+    Durable retry queue for messages whose LLM analysis failed.
+
+    Entries are kept in a SQLite table, so every process using the same
+    database (API workers, the standalone poller) shares one queue and
+    restarts don't lose it. Each process runs a worker that retries one
+    message at a time: it claims the next due entry with UPDATE ... RETURNING,
+    which leases the entry to that worker, so a message is only retried by
+    one process at a time. An entry whose worker died is claimed again once
+    its lease expires. Retries back off exponentially, so an LLM outage
+    doesn't turn into a storm of retries or fallback todos; only after
+    max_attempts failures is the give-up handler (the fallback todo) called.
+    """
+
+    # How long a claimed entry is reserved for the worker retrying it
+    LEASE_SECONDS = 300.0
+    # Upper bound for the wait between checks for entries enqueued by other processes
+    POLL_INTERVAL_SECONDS = 5.0
+
+    def __init__(
+        self,
+        handler: Callable[[MessageCreate], Awaitable[object]],
+        on_give_up: Callable[[MessageCreate], Awaitable[object]],
+        db_file: Path,
+        max_attempts: int = 5,
+        base_delay_seconds: float = 2.0,
+        max_delay_seconds: float = 300.0
+    ):
+        self._handler = handler
+        self._on_give_up = on_give_up
+        self.db_file = db_file
+        self.max_attempts = max_attempts
+        self.base_delay_seconds = base_delay_seconds
+        self.max_delay_seconds = max_delay_seconds
+        self._worker_task: Optional[asyncio.Task] = None
+        # Set by enqueue to wake the worker before its next check
+        self._wakeup: Optional[asyncio.Event] = None
+
+        # Queue methods run in worker threads; the lock serialises use of the connection
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(db_file, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS retry_queue ("
+            "id TEXT PRIMARY KEY, message TEXT, attempt INTEGER, "
+            "next_retry_at REAL, claimed_until REAL DEFAULT 0)"
+        )
+        atexit.register(self.close)
+
+    async def start(self):
+        """Start the retry worker (entries left over from a previous run are picked up too)."""
+        pending = self.get_status()["pending_messages"]
+        if pending:
+            print(f"🔁 {pending} messages awaiting retry")
+        self._wakeup = asyncio.Event()
+        self._worker_task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Stop the retry worker; pending entries stay in the database for the next start."""
+        if self._worker_task is not None:
+            self._worker_task.cancel()
+            try:
+                await self._worker_task
+            except asyncio.CancelledError:
+                pass
+            self._worker_task = None
+        self._wakeup = None
+
+    def close(self):
+        """Close the database connection (also called at exit)."""
+        with self._lock:
+            self._db.close()
+
+    async def enqueue(self, message: MessageCreate):
+        """
+        Schedule a message for retry after its first failed attempt.
+
+        Args:
+            message: The message whose analysis failed
+        """
+        await asyncio.to_thread(
+            self._insert,
+            uuid.uuid4().hex,
+            message.model_dump_json(),
+            1,
+            time.time() + self._backoff_delay(1)
+        )
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    def _backoff_delay(self, attempt: int) -> float:
+        """Exponential backoff (2s, 4s, 8s, ...) capped at max_delay_seconds with jitter."""
+        delay = min(self.max_delay_seconds, self.base_delay_seconds * (2 ** (attempt - 1)))
+        return delay * random.uniform(0.5, 1.0)
+
+    async def _run(self):
+        """Retry due messages one at a time until stopped."""
+        while True:
+            self._wakeup.clear()
+            entry = await asyncio.to_thread(self._claim_next)
+            if entry is None:
+                timeout = await asyncio.to_thread(self._next_wait)
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=timeout)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            entry_id, message_json, attempt = entry
+            message = MessageCreate.model_validate_json(message_json)
+            try:
+                await self._handler(message)
+            except asyncio.CancelledError:
+                # Hand the entry back right away rather than leaving it leased;
+                # shielded so the write finishes even though the task is being cancelled
+                await asyncio.shield(asyncio.to_thread(self._release, entry_id))
+                raise
+            except Exception as e:
+                attempt += 1
+                if attempt >= self.max_attempts:
+                    print(f"❌ Giving up on message from {message.sender} after {attempt} attempts: {e}")
+                    await asyncio.to_thread(self._delete, entry_id)
+                    try:
+                        await self._on_give_up(message)
+                    except Exception as give_up_error:
+                        print(f"⚠️  Error handling failed message: {give_up_error}")
+                else:
+                    print(f"🔁 Retry {attempt - 1} failed for message from {message.sender}: {e}")
+                    await asyncio.to_thread(self._reschedule, entry_id, attempt, time.time() + self._backoff_delay(attempt))
+            else:
+                await asyncio.to_thread(self._delete, entry_id)
+
+    def _insert(self, entry_id: str, message_json: str, attempt: int, next_retry_at: float):
+        """Add an entry to the queue."""
+        with self._lock, self._db:
+            self._db.execute(
+                "INSERT INTO retry_queue (id, message, attempt, next_retry_at) VALUES (?, ?, ?, ?)",
+                (entry_id, message_json, attempt, next_retry_at)
+            )
+
+    def _claim_next(self) -> Optional[tuple]:
+        """
+        Lease the next due entry to this worker.
+
+        The select and the lease are a single statement, so concurrent workers
+        in other processes never claim the same entry.
+
+        Returns:
+            (id, message JSON, attempt) of the claimed entry, or None if nothing is due
+        """
+        now = time.time()
+        with self._lock, self._db:
+            return self._db.execute(
+                "UPDATE retry_queue SET claimed_until = ? WHERE id = ("
+                "SELECT id FROM retry_queue WHERE next_retry_at <= ? AND claimed_until <= ? "
+                "ORDER BY next_retry_at LIMIT 1"
+                ") RETURNING id, message, attempt",
+                (now + self.LEASE_SECONDS, now, now)
+            ).fetchone()
+
+    def _next_wait(self) -> float:
+        """Seconds until the next entry can be claimed, capped at POLL_INTERVAL_SECONDS."""
+        with self._lock:
+            next_at = self._db.execute(
+                "SELECT MIN(MAX(next_retry_at, claimed_until)) FROM retry_queue"
+            ).fetchone()[0]
+        if next_at is None:
+            return self.POLL_INTERVAL_SECONDS
+        return min(max(next_at - time.time(), 0.0), self.POLL_INTERVAL_SECONDS)
+
+    def _reschedule(self, entry_id: str, attempt: int, next_retry_at: float):
+        """Record a failed attempt and release the lease until the next retry."""
+        with self._lock, self._db:
+            self._db.execute(
+                "UPDATE retry_queue SET attempt = ?, next_retry_at = ?, claimed_until = 0 WHERE id = ?",
+                (attempt, next_retry_at, entry_id)
+            )
+
+    def _release(self, entry_id: str):
+        """Release the lease on an entry without recording an attempt."""
+        with self._lock, self._db:
+            self._db.execute("UPDATE retry_queue SET claimed_until = 0 WHERE id = ?", (entry_id,))
+
+    def _delete(self, entry_id: str):
+        """Remove an entry from the queue."""
+        with self._lock, self._db:
+            self._db.execute("DELETE FROM retry_queue WHERE id = ?", (entry_id,))
+
+    def get_status(self):
+        """Get the current state of the retry queue."""
+        with self._lock:
+            pending = self._db.execute("SELECT COUNT(*) FROM retry_queue").fetchone()[0]
+        return {
+            "is_running": self._worker_task is not None,
+            "pending_messages": pending
+        }
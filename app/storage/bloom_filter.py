@@ -0,0 +1,91 @@
+import hashlib
+import math
+import time
+from typing import Optional
+
+
+class BloomFilter:
+    """Fixed-size Bloom filter for string keys."""
+
+    def __init__(self, capacity: int = 100_000, error_rate: float = 0.001):
+        self.capacity = capacity
+        self.error_rate = error_rate
+        # Optimal bit count and hash count for the requested capacity/error rate
+        self.num_bits = max(8, math.ceil(-capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self.num_hashes = max(1, round(self.num_bits / capacity * math.log(2)))
+        self._bits = bytearray((self.num_bits + 7) // 8)
+        self.count = 0
+
+    def _positions(self, key: str):
+        """Derive bit positions with double hashing over one blake2b digest."""
+        digest = hashlib.blake2b(key.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return [(h1 + i * h2) % self.num_bits for i in range(self.num_hashes)]
+
+    def add(self, key: str) -> bool:
+        """
+        Add a key to the filter.
+
+        Returns:
+            True if the key was not (probably) present before
+        """
+        added = False
+        for position in self._positions(key):
+            byte, bit = divmod(position, 8)
+            if not self._bits[byte] & (1 << bit):
+                self._bits[byte] |= 1 << bit
+                added = True
+        if added:
+            self.count += 1
+        return added
+
+    def __contains__(self, key: str) -> bool:
+        for position in self._positions(key):
+            byte, bit = divmod(position, 8)
+            if not self._bits[byte] & (1 << bit):
+                return False
+        return True
+
+
+class RotatingBloomFilter:
+    """
+    Bloom filter that starts a fresh generation periodically.
+
+    Lookups check the current and the previous generation, so keys are
+    remembered for between one and two rotation periods while memory stays bounded.
+    """
+
+    def __init__(
+        self,
+        capacity: int = 100_000,
+        error_rate: float = 0.001,
+        rotation_seconds: float = 24 * 60 * 60
+    ):
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.rotation_seconds = rotation_seconds
+        self._current = BloomFilter(capacity, error_rate)
+        self._previous: Optional[BloomFilter] = None
+        self._rotated_at = time.monotonic()
+
+    def _maybe_rotate(self):
+        """Retire the previous generation once the rotation period has passed."""
+        if time.monotonic() - self._rotated_at >= self.rotation_seconds:
+            self._previous = self._current
+            self._current = BloomFilter(self.capacity, self.error_rate)
+            self._rotated_at = time.monotonic()
+
+    def add(self, key: str) -> bool:
+        """Add a key to the current generation."""
+        self._maybe_rotate()
+        return self._current.add(key)
+
+    def __contains__(self, key: str) -> bool:
+        self._maybe_rotate()
+        return key in self._current or (self._previous is not None and key in self._previous)
+
+    @property
+    def count(self) -> int:
+        """Approximate number of keys remembered across both generations."""
+        return self._current.count + (self._previous.count if self._previous else 0)
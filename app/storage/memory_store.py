@@ -1,207 +1,379 @@
-from typing import Dict, List, Optional
-from datetime import datetime
+from typing import Dict, List, Mapping, Optional
+from types import MappingProxyType
+from datetime import datetime, timezone
 import uuid
 import json
 import os
+import atexit
+import sqlite3
+import threading
 from pathlib import Path
 
+try:
+    import orjson
+except ImportError:  # Fall back to the stdlib json module
+    orjson = None
+
+
+def _dumps(data) -> bytes:
+    """Serialize data to JSON bytes, with orjson when available."""
+    if orjson is not None:
+        return orjson.dumps(data, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(data).encode()
+
+
+def _loads(buf: bytes):
+    """Parse JSON bytes, with orjson when available."""
+    if orjson is not None:
+        return orjson.loads(buf)
+    return json.loads(buf)
+
+
+# Integration catalogue, built once at import; each store copies it on init
+_INTEGRATIONS_TEMPLATE: Mapping[str, dict] = MappingProxyType({
+    "gmail": {
+        "id": "gmail",
+        "name": "gmail",
+        "display_name": "Gmail",
+        "description": "Connect your Gmail account to automatically extract action items from emails",
+        "logo": "/logos/gmail.svg",
+        "enabled": True,
+        "status": "connected",
+        "category": "Email"
+    },
+    "slack": {
+        "id": "slack",
+        "name": "slack",
+        "display_name": "Slack",
+        "description": "Integrate with Slack to turn team messages into actionable tasks",
+        "logo": "/logos/slack.svg",
+        "enabled": False,
+        "status": "disconnected",
+        "category": "Team Chat"
+    },
+    "whatsapp": {
+        "id": "whatsapp",
+        "name": "whatsapp",
+        "display_name": "WhatsApp",
+        "description": "Connect WhatsApp to create todos from important messages",
+        "logo": "/logos/whatsapp.svg",
+        "enabled": False,
+        "status": "disconnected",
+        "category": "Messaging"
+    },
+    "outlook": {
+        "id": "outlook",
+        "name": "outlook",
+        "display_name": "Outlook",
+        "description": "Sync your Outlook emails and automatically create action items",
+        "logo": "/logos/outlook.svg",
+        "enabled": False,
+        "status": "disconnected",
+        "category": "Email"
+    },
+    "telegram": {
+        "id": "telegram",
+        "name": "telegram",
+        "display_name": "Telegram",
+        "description": "Monitor Telegram messages and convert them into todos",
+        "logo": "/logos/telegram.svg",
+        "enabled": False,
+        "status": "disconnected",
+        "category": "Messaging"
+    },
+    "discord": {
+        "id": "discord",
+        "name": "discord",
+        "display_name": "Discord",
+        "description": "Connect Discord servers to track community tasks and discussions",
+        "logo": "/logos/discord.svg",
+        "enabled": False,
+        "status": "disconnected",
+        "category": "Community"
+    },
+    "teams": {
+        "id": "teams",
+        "name": "teams",
+        "display_name": "Microsoft Teams",
+        "description": "Integrate Microsoft Teams for seamless collaboration and task management",
+        "logo": "/logos/teams.svg",
+        "enabled": False,
+        "status": "disconnected",
+        "category": "Collaboration"
+    },
+    "linkedin": {
+        "id": "linkedin",
+        "name": "linkedin",
+        "display_name": "LinkedIn",
+        "description": "Track professional messages and networking opportunities",
+        "logo": "/logos/linkedin.svg",
+        "enabled": False,
+        "status": "disconnected",
+        "category": "Professional"
+    }
+})
+
 
 class MemoryStore:
-    """In-memory storage with JSON persistence."""
+    """
+    Storage backed by SQLite (todos, integrations) and JSON (messages).
     
-    def __init__(self):
-        self.storage_dir = Path(__file__).parent.parent.parent / "data"
+    Todos live in a SQLite database (data/todos.db) in WAL mode, so each
+    mutation is a single-row write regardless of how many todos exist; an old
+    todos.json is imported once on startup. Integration toggles are kept in
+    the same database, so every API worker and the standalone poller see the
+    same state. Messages are loaded from data/messages.json.
+    """
+    
+    def __init__(self, storage_dir: Optional[Path] = None):
+        """
+        Open (or create) the store's files.
+        
+        Args:
+            storage_dir: Directory holding the store's files (default: the
+                repository's data/ directory)
+        """
+        self.storage_dir = Path(storage_dir) if storage_dir is not None else Path(__file__).parent.parent.parent / "data"
         self.storage_dir.mkdir(exist_ok=True)
         
+        self.todos_db_file = self.storage_dir / "todos.db"
+        # Todos snapshot of the JSON-backed store, imported into the database once
         self.todos_file = self.storage_dir / "todos.json"
         self.messages_file = self.storage_dir / "messages.json"
         
-        # Load data from files if they exist
-        self.todos: Dict[str, dict] = self._load_json(self.todos_file, {})
+        # Store methods are called from worker threads (see TodoService);
+        # the lock serialises use of the shared SQLite connection
+        self._lock = threading.RLock()
+        
+        self._db = sqlite3.connect(self.todos_db_file, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute("PRAGMA temp_store=MEMORY")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS todos ("
+            "id TEXT PRIMARY KEY, created_at TEXT, completed INTEGER, data BLOB)"
+        )
+        self._db.execute("CREATE TABLE IF NOT EXISTS integrations (name TEXT PRIMARY KEY, enabled INTEGER)")
+        with self._db:
+            self._db.executemany(
+                "INSERT OR IGNORE INTO integrations (name, enabled) VALUES (?, ?)",
+                [(name, int(integration["enabled"])) for name, integration in _INTEGRATIONS_TEMPLATE.items()]
+            )
+        self._migrate_json_todos()
+        atexit.register(self.close)
+        
         self.messages: Dict[str, dict] = self._load_json(self.messages_file, {})
+        
+        # Serialized list responses, rebuilt lazily after a mutation. Other
+        # processes (API workers, the poller) write to the same database, so the
+        # caches are only valid while PRAGMA data_version is unchanged
+        self._todos_json: Optional[bytes] = None
+        self._integrations_json: Optional[bytes] = None
+        self._data_version: Optional[int] = None
+        
+        # Per-store copy of the integration catalogue, with the toggles from the database
         self.integrations: Dict[str, dict] = {
-            "gmail": {
-                "id": "gmail",
-                "name": "gmail",
-                "display_name": "Gmail",
-                "description": "Connect your Gmail account to automatically extract action items from emails",
-                "logo": "/logos/gmail.svg",
-                "enabled": True,
-                "status": "connected",
-                "category": "Email"
-            },
-            "slack": {
-                "id": "slack",
-                "name": "slack",
-                "display_name": "Slack",
-                "description": "Integrate with Slack to turn team messages into actionable tasks",
-                "logo": "/logos/slack.svg",
-                "enabled": False,
-                "status": "disconnected",
-                "category": "Team Chat"
-            },
-            "whatsapp": {
-                "id": "whatsapp",
-                "name": "whatsapp",
-                "display_name": "WhatsApp",
-                "description": "Connect WhatsApp to create todos from important messages",
-                "logo": "/logos/whatsapp.svg",
-                "enabled": False,
-                "status": "disconnected",
-                "category": "Messaging"
-            },
-            "outlook": {
-                "id": "outlook",
-                "name": "outlook",
-                "display_name": "Outlook",
-                "description": "Sync your Outlook emails and automatically create action items",
-                "logo": "/logos/outlook.svg",
-                "enabled": False,
-                "status": "disconnected",
-                "category": "Email"
-            },
-            "telegram": {
-                "id": "telegram",
-                "name": "telegram",
-                "display_name": "Telegram",
-                "description": "Monitor Telegram messages and convert them into todos",
-                "logo": "/logos/telegram.svg",
-                "enabled": False,
-                "status": "disconnected",
-                "category": "Messaging"
-            },
-            "discord": {
-                "id": "discord",
-                "name": "discord",
-                "display_name": "Discord",
-                "description": "Connect Discord servers to track community tasks and discussions",
-                "logo": "/logos/discord.svg",
-                "enabled": False,
-                "status": "disconnected",
-                "category": "Community"
-            },
-            "teams": {
-                "id": "teams",
-                "name": "teams",
-                "display_name": "Microsoft Teams",
-                "description": "Integrate Microsoft Teams for seamless collaboration and task management",
-                "logo": "/logos/teams.svg",
-                "enabled": False,
-                "status": "disconnected",
-                "category": "Collaboration"
-            },
-            "linkedin": {
-                "id": "linkedin",
-                "name": "linkedin",
-                "display_name": "LinkedIn",
-                "description": "Track professional messages and networking opportunities",
-                "logo": "/logos/linkedin.svg",
-                "enabled": False,
-                "status": "disconnected",
-                "category": "Professional"
-            }
+            name: dict(integration) for name, integration in _INTEGRATIONS_TEMPLATE.items()
         }
+        self._load_integrations()
     
     def _load_json(self, filepath: Path, default: dict) -> dict:
         """Load data from JSON file."""
         if filepath.exists():
             try:
-                with open(filepath, 'r') as f:
-                    return json.load(f)
+                with open(filepath, 'rb') as f:
+                    return _loads(f.read())
             except Exception as e:
                 print(f"⚠️  Error loading {filepath}: {e}")
                 return default
         return default
     
-    def _save_json(self, filepath: Path, data: dict):
-        """Save data to JSON file."""
-        try:
-            with open(filepath, 'w') as f:
-                json.dump(data, f, indent=2)
-        except Exception as e:
-            print(f"⚠️  Error saving {filepath}: {e}")
+    def _sync_with_db(self):
+        """
+        Drop cached state if another connection has written to the database (call with the lock held).
+        
+        PRAGMA data_version changes when another connection commits; this
+        connection's own writes invalidate the caches directly.
+        """
+        data_version = self._db.execute("PRAGMA data_version").fetchone()[0]
+        if data_version != self._data_version:
+            self._data_version = data_version
+            self._todos_json = None
+            self._load_integrations()
     
-    def _save_todos(self):
-        """Persist todos to JSON file."""
-        self._save_json(self.todos_file, self.todos)
+    def _load_integrations(self):
+        """Apply the integration toggles stored in the database (call with the lock held)."""
+        for name, enabled in self._db.execute("SELECT name, enabled FROM integrations"):
+            integration = self.integrations.get(name)
+            if integration is not None:
+                integration["enabled"] = bool(enabled)
+                integration["status"] = "connected" if enabled else "disconnected"
+        self._integrations_json = None
     
-    def _save_messages(self):
-        """Persist messages to JSON file."""
-        self._save_json(self.messages_file, self.messages)
+    def _migrate_json_todos(self):
+        """Import todos from the todos.json snapshot into the database."""
+        if not self.todos_file.exists():
+            return
+        
+        todos: Dict[str, dict] = self._load_json(self.todos_file, {})
+        
+        with self._db:
+            self._db.executemany(
+                "INSERT OR IGNORE INTO todos (id, created_at, completed, data) VALUES (?, ?, ?, ?)",
+                [self._todo_row(todo) for todo in todos.values()]
+            )
+        
+        # Keep the old file around, but don't import it again
+        os.replace(self.todos_file, self.todos_file.with_suffix('.json.migrated'))
+        print(f"✅ Migrated {len(todos)} todos to {self.todos_db_file}")
     
-    # Todo operations
-    def create_todo(self, todo_data: dict) -> dict:
-        """Create a new todo."""
-        todo_id = str(uuid.uuid4())
-        todo = {
-            "id": todo_id,
-            "created_at": datetime.now().isoformat(),
+    @staticmethod
+    def _todo_row(todo: dict) -> tuple:
+        """Build the (id, created_at, completed, data) row for a todo."""
+        return (todo["id"], todo.get("created_at"), int(bool(todo.get("completed"))), _dumps(todo))
+    
+    def _fetch_todo(self, todo_id: str) -> Optional[dict]:
+        """Read one todo from the database (call with the lock held)."""
+        row = self._db.execute("SELECT data FROM todos WHERE id = ?", (todo_id,)).fetchone()
+        return _loads(row[0]) if row else None
+    
+    def _update_todo_row(self, todo: dict):
+        """Write back an existing todo (call with the lock held)."""
+        with self._db:
+            self._db.execute(
+                "UPDATE todos SET completed = ?, data = ? WHERE id = ?",
+                (int(bool(todo["completed"])), _dumps(todo), todo["id"])
+            )
+        self._todos_json = None
+    
+    def _new_todo(self, todo_data: dict) -> dict:
+        """Build a new todo with a fresh ID and creation time."""
+        return {
+            "id": uuid.uuid4().hex,
+            "created_at": datetime.now(timezone.utc).isoformat(timespec='milliseconds'),
             "completed": False,
             **todo_data
         }
-        self.todos[todo_id] = todo
-        self._save_todos()
-        return todo
+    
+    def close(self):
+        """Close the database, checkpointing the WAL (also called at exit)."""
+        with self._lock:
+            self._db.close()
+    
+    # Todo operations
+    def create_todo(self, todo_data: dict) -> dict:
+        """Create a new todo."""
+        with self._lock:
+            todo = self._new_todo(todo_data)
+            with self._db:
+                self._db.execute(
+                    "INSERT INTO todos (id, created_at, completed, data) VALUES (?, ?, ?, ?)",
+                    self._todo_row(todo)
+                )
+            self._todos_json = None
+            return todo
+    
+    def create_todos(self, todos_data: List[dict]) -> List[dict]:
+        """Create several todos in one transaction."""
+        todos = [self._new_todo(todo_data) for todo_data in todos_data]
+        with self._lock:
+            with self._db:
+                self._db.executemany(
+                    "INSERT INTO todos (id, created_at, completed, data) VALUES (?, ?, ?, ?)",
+                    [self._todo_row(todo) for todo in todos]
+                )
+            self._todos_json = None
+        return todos
     
     def get_todo(self, todo_id: str) -> Optional[dict]:
         """Get a todo by ID."""
-        return self.todos.get(todo_id)
+        with self._lock:
+            return self._fetch_todo(todo_id)
     
     def get_all_todos(self) -> List[dict]:
         """Get all todos."""
-        return list(self.todos.values())
+        with self._lock:
+            rows = self._db.execute("SELECT data FROM todos ORDER BY rowid").fetchall()
+        return [_loads(row[0]) for row in rows]
     
     def update_todo(self, todo_id: str, todo_data: dict) -> Optional[dict]:
         """Update a todo."""
-        if todo_id not in self.todos:
-            return None
-        
-        # Update only provided fields
-        for key, value in todo_data.items():
-            if value is not None:
-                self.todos[todo_id][key] = value
-        
-        self._save_todos()
-        return self.todos[todo_id]
+        with self._lock:
+            todo = self._fetch_todo(todo_id)
+            if todo is None:
+                return None
+            
+            # Update only provided fields
+            for key, value in todo_data.items():
+                if value is not None:
+                    todo[key] = value
+            
+            self._update_todo_row(todo)
+            return todo
     
     def delete_todo(self, todo_id: str) -> bool:
         """Delete a todo."""
-        if todo_id in self.todos:
-            del self.todos[todo_id]
-            self._save_todos()
-            return True
-        return False
+        with self._lock:
+            with self._db:
+                deleted = self._db.execute("DELETE FROM todos WHERE id = ?", (todo_id,)).rowcount > 0
+            if deleted:
+                self._todos_json = None
+            return deleted
     
     def toggle_todo(self, todo_id: str) -> Optional[dict]:
         """Toggle todo completion status."""
-        if todo_id not in self.todos:
-            return None
-        
-        self.todos[todo_id]["completed"] = not self.todos[todo_id]["completed"]
-        self._save_todos()
-        return self.todos[todo_id]
+        with self._lock:
+            todo = self._fetch_todo(todo_id)
+            if todo is None:
+                return None
+            
+            todo["completed"] = not todo["completed"]
+            self._update_todo_row(todo)
+            return todo
+    
+    def get_all_todos_json(self) -> bytes:
+        """Get all todos as a serialized JSON array (cached until the next mutation by any process)."""
+        with self._lock:
+            self._sync_with_db()
+            if self._todos_json is None:
+                # The rows already hold serialized todos; just join them
+                rows = self._db.execute("SELECT data FROM todos ORDER BY rowid").fetchall()
+                self._todos_json = b"[" + b",".join(row[0] for row in rows) + b"]"
+            return self._todos_json
     
     # Integration operations
     def get_all_integrations(self) -> List[dict]:
         """Get all integrations."""
-        return list(self.integrations.values())
+        with self._lock:
+            self._sync_with_db()
+            return list(self.integrations.values())
+    
+    def get_all_integrations_json(self) -> bytes:
+        """Get all integrations as a serialized JSON array (cached until the next toggle by any process)."""
+        with self._lock:
+            self._sync_with_db()
+            if self._integrations_json is None:
+                self._integrations_json = _dumps(list(self.integrations.values()))
+            return self._integrations_json
     
     def get_integration(self, name: str) -> Optional[dict]:
         """Get an integration by name."""
-        return self.integrations.get(name)
+        with self._lock:
+            self._sync_with_db()
+            return self.integrations.get(name)
     
     def toggle_integration(self, name: str) -> Optional[dict]:
         """Toggle integration enabled status."""
-        if name not in self.integrations:
-            return None
-        
-        self.integrations[name]["enabled"] = not self.integrations[name]["enabled"]
-        if self.integrations[name]["enabled"]:
-            self.integrations[name]["status"] = "connected"
-        else:
-            self.integrations[name]["status"] = "disconnected"
-        
-        return self.integrations[name]
+        with self._lock:
+            if name not in self.integrations:
+                return None
+            
+            # Flip the stored value, not the cached one, so concurrent toggles from other processes aren't lost
+            with self._db:
+                self._db.execute("UPDATE integrations SET enabled = NOT enabled WHERE name = ?", (name,))
+            self._load_integrations()
+            
+            return self.integrations[name]
 
 
 # Global instance
@@ -0,0 +1,47 @@
+"""
+Standalone Gmail poller process.
+
+Run the poller outside the API processes so that scaling the API to
+multiple workers doesn't multiply Gmail traffic:
+
+    RUN_POLLER=0 gunicorn app.main:app -k uvicorn.workers.UvicornWorker -w $(nproc)
+    python -m app.workers.gmail_poller
+"""
+import asyncio
+from dotenv import load_dotenv
+
+try:
+    import uvloop
+except ImportError:  # uvloop is not available on Windows
+    uvloop = None
+
+# Load environment variables
+load_dotenv()
+
+from app.services.gmail_poller import gmail_poller
+from app.services.message_processor import message_retry_queue
+from src.core.email_processor import init_http_client, close_http_client
+
+
+async def main():
+    """Run the polling loop until interrupted."""
+    # Pool connections across all LLM calls of this process
+    init_http_client()
+    # Emails whose analysis failed are retried here too (the queue is shared with the API workers)
+    await message_retry_queue.start()
+    try:
+        await gmail_poller.start_polling()
+    finally:
+        await gmail_poller.close_client()
+        await message_retry_queue.stop()
+        await close_http_client()
+
+
+if __name__ == "__main__":
+    if uvloop is not None:
+        asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+    
+    try:
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        gmail_poller.stop_polling()
@@ -1,11 +1,132 @@
+import litellm
 from litellm import completion
 from pydantic import BaseModel
+from concurrent.futures import ThreadPoolExecutor
+from collections import OrderedDict
 from typing import Optional, Dict, List, Any
+import hashlib
+import httpx
 import os
+import re
+import threading
 from dotenv import load_dotenv
 
 load_dotenv()
 
+try:
+    import h2  # noqa: F401  (enables HTTP/2 in httpx)
+    _HTTP2 = True
+except ImportError:
+    _HTTP2 = False
+
+try:
+    import hyperscan  # Optional: SIMD multi-pattern matching for the pre-filter
+except ImportError:
+    hyperscan = None
+
+# Pooled HTTP clients for LLM calls (sync completion / async acompletion), created by init_http_client
+_HTTP_CLIENT: Optional[httpx.Client] = None
+_ASYNC_HTTP_CLIENT: Optional[httpx.AsyncClient] = None
+_HTTP_CLIENT_LOCK = threading.Lock()
+
+# Connection pool limits shared by both clients
+_HTTP_LIMITS = httpx.Limits(max_connections=64, max_keepalive_connections=32)
+
+
+def init_http_client() -> httpx.Client:
+    """
+    Share pooled HTTP clients across all litellm calls.
+    
+    LLM calls then reuse keep-alive connections (multiplexed over HTTP/2 when h2
+    is installed) instead of paying a TCP+TLS handshake per call. A sync client
+    is installed as litellm.client_session (completion) and an async one as
+    litellm.aclient_session (acompletion). Both are process-wide, so this is
+    left to the application to call once at startup, with close_http_client on
+    shutdown; sessions that are already configured are kept.
+    
+    Returns:
+        The client session litellm uses for sync calls
+    """
+    global _HTTP_CLIENT, _ASYNC_HTTP_CLIENT
+    with _HTTP_CLIENT_LOCK:
+        if litellm.client_session is None:
+            if _HTTP_CLIENT is None:
+                _HTTP_CLIENT = httpx.Client(http2=_HTTP2, timeout=60.0, limits=_HTTP_LIMITS)
+            litellm.client_session = _HTTP_CLIENT
+        if litellm.aclient_session is None:
+            if _ASYNC_HTTP_CLIENT is None:
+                _ASYNC_HTTP_CLIENT = httpx.AsyncClient(http2=_HTTP2, timeout=60.0, limits=_HTTP_LIMITS)
+            litellm.aclient_session = _ASYNC_HTTP_CLIENT
+        return litellm.client_session
+
+
+async def close_http_client():
+    """Close the clients installed by init_http_client and uninstall them from litellm."""
+    global _HTTP_CLIENT, _ASYNC_HTTP_CLIENT
+    with _HTTP_CLIENT_LOCK:
+        client, _HTTP_CLIENT = _HTTP_CLIENT, None
+        async_client, _ASYNC_HTTP_CLIENT = _ASYNC_HTTP_CLIENT, None
+        if client is not None and litellm.client_session is client:
+            litellm.client_session = None
+        if async_client is not None and litellm.aclient_session is async_client:
+            litellm.aclient_session = None
+    
+    if async_client is not None:
+        await async_client.aclose()
+    if client is not None:
+        client.close()
+
+# Sender/subject patterns of emails that never contain action items (checked before calling the LLM).
+# Whole words only, so each pattern lists the inflections it should also match
+_SKIP_PATTERNS = [
+    "unsubscribe", "no[-_]?reply", "newsletters?", "promo(?:s|tions?|tional)?", "receipts?", "UPI", "OTPs?"
+]
+_SKIP_RE = re.compile(r'(?i)\b(' + '|'.join(_SKIP_PATTERNS) + r')\b')
+
+# With hyperscan installed, all patterns are matched in a single pass of a compiled database
+if hyperscan is not None:
+    _SKIP_DB = hyperscan.Database()
+    _SKIP_DB.compile(
+        expressions=[rf'\b{pattern}\b'.encode() for pattern in _SKIP_PATTERNS],
+        ids=list(range(len(_SKIP_PATTERNS))),
+        elements=len(_SKIP_PATTERNS),
+        flags=[hyperscan.HS_FLAG_CASELESS | hyperscan.HS_FLAG_SINGLEMATCH] * len(_SKIP_PATTERNS)
+    )
+else:
+    _SKIP_DB = None
+
+# Hyperscan scratch space can't be shared between concurrently scanning threads
+_SKIP_SCRATCH = threading.local()
+
+
+def _stop_scan(pattern_id, start, end, flags, context):
+    """Hyperscan match handler that stops the scan at the first match."""
+    return True
+
+
+def _matches_skip_pattern(text: str) -> bool:
+    """Check whether text matches any of the non-action email patterns."""
+    if _SKIP_DB is None:
+        return bool(_SKIP_RE.search(text))
+    
+    scratch = getattr(_SKIP_SCRATCH, "scratch", None)
+    if scratch is None:
+        scratch = _SKIP_SCRATCH.scratch = hyperscan.Scratch(_SKIP_DB)
+    try:
+        _SKIP_DB.scan(text.encode(), match_event_handler=_stop_scan, scratch=scratch)
+    except hyperscan.ScanTerminated:
+        return True
+    return False
+
+
+def is_non_action_email(email_data: Dict[str, Any]) -> bool:
+    """Check sender and subject against patterns of emails that never contain action items."""
+    return _matches_skip_pattern(email_data.get("from", "")) or _matches_skip_pattern(email_data.get("subject", ""))
+
+
+# Matches a streamed action item response as soon as it has decided there is no action item
+_NO_ACTION_RE = re.compile(r'"is_action_item"\s*:\s*false')
+
 
 class ActionItem(BaseModel):
     """
@@ -26,6 +147,15 @@ class EmailSummary(BaseModel):
     sentiment: Optional[str] = None  # positive, neutral, negative
 
 
+class EmailAnalysis(BaseModel):
+    """
+    Model representing action item, summary and category of an email from a single LLM call.
+    """
+    action_item: ActionItem
+    summary: EmailSummary
+    category: str
+
+
 class EmailProcessor:
     """
     Helper class to process emails using LLM (Language Model).
@@ -38,6 +168,8 @@ class EmailProcessor:
     
     Setup:
     - Requires OPENAI_API_KEY or other LLM provider credentials in .env file
+    - Call init_http_client() once at startup to pool connections across LLM calls
+      (and close_http_client() on shutdown)
     """
     
     # System prompts for different tasks
@@ -90,16 +222,55 @@ Given an email, categorize it into one of these categories:
 Return only the category name.
 """
     
-    def __init__(self, model: str = "openai/gpt-4o-mini", api_key: Optional[str] = None):
+    ANALYSIS_PROMPT = """
+You are a helpful assistant that analyzes emails.
+Given an email, return all of the following in one response:
+
+1. action_item: Whether the email contains an actionable task or request, the action item (if any),
+   when it's due (if mentioned) and its priority (high, medium, low) based on urgency keywords.
+   Descriptions should be actionable, ignore sales emails, ignore UPI transactions, ignore newsletters, ignore promotional emails, ignore social media notifications, ignore notifications, ignore spam, ignore other.
+   If the email does not have an action item, set is_action_item to false and the other fields to null.
+   Keywords indicating urgency:
+   - High priority: "urgent", "asap", "immediately", "critical", "emergency"
+   - Medium priority: "soon", "this week", "important"
+   - Low priority: "when you can", "no rush", "eventually"
+
+2. summary: A brief summary (1-2 sentences), key points (important information as a list)
+   and overall sentiment (positive, neutral, or negative). Be concise.
+
+3. category: Exactly one of these category names:
+   Work/Business, Personal, Promotion/Marketing, Social, Notification, Spam, Other
+"""
+    
+    def __init__(
+        self,
+        model: str = "openai/gpt-4o-mini",
+        api_key: Optional[str] = None,
+        max_workers: int = 16,
+        cache_size: int = 1024,
+        stream: bool = False
+    ):
         """
         Initialize Email Processor with LLM configuration.
         
         Args:
             model: LLM model to use (default: "openai/gpt-4o-mini")
             api_key: API key for the LLM provider (reads from env vars if not provided)
+            max_workers: Maximum number of emails processed concurrently in batch methods (default: 16)
+            cache_size: Maximum number of LLM results kept in the content-hash cache (default: 1024)
+            stream: Stream action item responses and stop reading once the email is known to have
+                no action item (default: False)
         """
         self.model = model
         self.api_key = api_key or os.getenv("OPENAI_API_KEY")
+        self.max_workers = max_workers
+        self.stream = stream
+        
+        # LRU cache of serialized LLM results keyed by operation + hash of the formatted email,
+        # so repeated emails (replies, forwards, receipts) skip the LLM call
+        self.cache_size = cache_size
+        self._cache: "OrderedDict[str, str]" = OrderedDict()
+        self._cache_lock = threading.Lock()
         
         if not self.api_key and "openai" in model.lower():
             print("⚠️  Warning: OPENAI_API_KEY not found in environment variables")
@@ -134,6 +305,27 @@ Body:
 """
         return formatted.strip()
     
+    def _cache_key(self, operation: str, formatted_email: str) -> str:
+        """Build the cache key for an operation on a formatted email."""
+        digest = hashlib.blake2b(formatted_email.encode(), digest_size=16).hexdigest()
+        return f"{operation}:{digest}"
+    
+    def _cache_get(self, key: str) -> Optional[str]:
+        """Get a cached result and mark it as recently used."""
+        with self._cache_lock:
+            value = self._cache.get(key)
+            if value is not None:
+                self._cache.move_to_end(key)
+            return value
+    
+    def _cache_put(self, key: str, value: str):
+        """Store a result, evicting the least recently used entries beyond cache_size."""
+        with self._cache_lock:
+            self._cache[key] = value
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+    
     def extract_action_item(self, email_data: Dict[str, Any]) -> ActionItem:
         """
         Extract action item from an email using LLM.
@@ -147,33 +339,82 @@ Body:
         Raises:
             Exception: If LLM processing fails
         """
+        # Skip the LLM call for obvious non-action emails (no-reply senders, receipts, ...)
+        if is_non_action_email(email_data):
+            return ActionItem(is_action_item=False)
+        
+        return self._extract_action_item_str(self._format_email(email_data))
+    
+    def _extract_action_item_str(self, formatted_email: str) -> ActionItem:
+        """Extract an action item from an already formatted email (see extract_action_item)."""
         try:
-            formatted_email = self._format_email(email_data)
+            cache_key = self._cache_key("action_item", formatted_email)
+            cached = self._cache_get(cache_key)
+            if cached is not None:
+                return ActionItem.model_validate_json(cached)
             
             messages = [
                 {"role": "system", "content": self.ACTION_ITEM_PROMPT},
                 {"role": "user", "content": formatted_email}
             ]
             
-            response = completion(
-                model=self.model,
-                messages=messages,
-                response_format=ActionItem,
-                tools = []
-            )
+            if self.stream:
+                content = self._stream_action_item(messages)
+                if content is None:
+                    content = ActionItem(is_action_item=False).model_dump_json()
+            else:
+                response = completion(
+                    model=self.model,
+                    messages=messages,
+                    response_format=ActionItem,
+                    tools = []
+                )
+                content = response.choices[0].message.content
             
-            # Parse the response content as JSON and create ActionItem
-            import json
-            content = response.choices[0].message.content
-            action_data = json.loads(content) if isinstance(content, str) else content
-            
-            return ActionItem(**action_data)
+            # Parse and validate the response content straight into ActionItem
+            if isinstance(content, str):
+                action_item = ActionItem.model_validate_json(content)
+            else:
+                action_item = ActionItem.model_validate(content)
+            self._cache_put(cache_key, action_item.model_dump_json())
+            return action_item
             
         except Exception as e:
             print(f"⚠️  Error extracting action item: {str(e)}")
             # Return empty action item on error
             return ActionItem(is_action_item=False)
     
+    def _stream_action_item(self, messages: List[Dict[str, str]]) -> Optional[str]:
+        """
+        Stream an action item response, stopping early for emails without an action item.
+        
+        Args:
+            messages: Chat messages for the action item request
+            
+        Returns:
+            The full response content, or None if the stream was cancelled because
+            the response already reported is_action_item: false
+        """
+        response = completion(
+            model=self.model,
+            messages=messages,
+            response_format=ActionItem,
+            tools = [],
+            stream=True
+        )
+        
+        content = ""
+        for chunk in response:
+            content += chunk.choices[0].delta.content or ""
+            if _NO_ACTION_RE.search(content):
+                # Close the underlying HTTP stream so the provider stops generating
+                close = getattr(getattr(response, "completion_stream", None), "close", None)
+                if close is not None:
+                    close()
+                return None
+        
+        return content
+    
     def summarize_email(self, email_data: Dict[str, Any]) -> EmailSummary:
         """
         Generate a summary of an email using LLM.
@@ -187,8 +428,15 @@ Body:
         Raises:
             Exception: If LLM processing fails
         """
+        return self._summarize_email_str(self._format_email(email_data))
+    
+    def _summarize_email_str(self, formatted_email: str) -> EmailSummary:
+        """Summarize an already formatted email (see summarize_email)."""
         try:
-            formatted_email = self._format_email(email_data)
+            cache_key = self._cache_key("summary", formatted_email)
+            cached = self._cache_get(cache_key)
+            if cached is not None:
+                return EmailSummary.model_validate_json(cached)
             
             messages = [
                 {"role": "system", "content": self.SUMMARY_PROMPT},
@@ -201,12 +449,14 @@ Body:
                 response_format=EmailSummary
             )
             
-            # Parse the response content as JSON and create EmailSummary
-            import json
+            # Parse and validate the response content straight into EmailSummary
             content = response.choices[0].message.content
-            summary_data = json.loads(content) if isinstance(content, str) else content
-            
-            return EmailSummary(**summary_data)
+            if isinstance(content, str):
+                summary = EmailSummary.model_validate_json(content)
+            else:
+                summary = EmailSummary.model_validate(content)
+            self._cache_put(cache_key, summary.model_dump_json())
+            return summary
             
         except Exception as e:
             print(f"⚠️  Error summarizing email: {str(e)}")
@@ -227,8 +477,15 @@ Body:
         Returns:
             Category string (e.g., "Work/Business", "Personal", etc.)
         """
+        return self._categorize_email_str(self._format_email(email_data))
+    
+    def _categorize_email_str(self, formatted_email: str) -> str:
+        """Categorize an already formatted email (see categorize_email)."""
         try:
-            formatted_email = self._format_email(email_data)
+            cache_key = self._cache_key("category", formatted_email)
+            cached = self._cache_get(cache_key)
+            if cached is not None:
+                return cached
             
             messages = [
                 {"role": "system", "content": self.CATEGORY_PROMPT},
@@ -241,12 +498,70 @@ Body:
             )
             
             category = response.choices[0].message.content.strip()
+            self._cache_put(cache_key, category)
             return category
             
         except Exception as e:
             print(f"⚠️  Error categorizing email: {str(e)}")
             return "Other"
     
+    def analyze_email(self, email_data: Dict[str, Any]) -> EmailAnalysis:
+        """
+        Extract action item, summary and category of an email with a single LLM call.
+        
+        Args:
+            email_data: Dictionary containing email fields (subject, from, to, date, body)
+            
+        Returns:
+            EmailAnalysis model with all three results
+        """
+        return self._analyze_email_str(self._format_email(email_data))
+    
+    def _analyze_email_str(self, formatted_email: str) -> EmailAnalysis:
+        """Analyze an already formatted email with a single LLM call (see analyze_email)."""
+        try:
+            cache_key = self._cache_key("analysis", formatted_email)
+            cached = self._cache_get(cache_key)
+            if cached is not None:
+                return EmailAnalysis.model_validate_json(cached)
+            
+            messages = [
+                {"role": "system", "content": self.ANALYSIS_PROMPT},
+                {"role": "user", "content": formatted_email}
+            ]
+            
+            response = completion(
+                model=self.model,
+                messages=messages,
+                response_format=EmailAnalysis
+            )
+            
+            # Parse and validate the response content straight into EmailAnalysis
+            content = response.choices[0].message.content
+            if isinstance(content, str):
+                analysis = EmailAnalysis.model_validate_json(content)
+            else:
+                analysis = EmailAnalysis.model_validate(content)
+            self._cache_put(cache_key, analysis.model_dump_json())
+            # Later single-operation calls on the same email can reuse the parts
+            self._cache_put(self._cache_key("action_item", formatted_email), analysis.action_item.model_dump_json())
+            self._cache_put(self._cache_key("summary", formatted_email), analysis.summary.model_dump_json())
+            self._cache_put(self._cache_key("category", formatted_email), analysis.category)
+            return analysis
+            
+        except Exception as e:
+            print(f"⚠️  Error analyzing email: {str(e)}")
+            # Return the same fallbacks as the individual operations
+            return EmailAnalysis(
+                action_item=ActionItem(is_action_item=False),
+                summary=EmailSummary(
+                    summary="Error processing email",
+                    key_points=["Unable to generate summary"],
+                    sentiment="neutral"
+                ),
+                category="Other"
+            )
+    
     def process_email_batch(
         self, 
         emails: List[Dict[str, Any]], 
@@ -266,34 +581,92 @@ Body:
         Returns:
             List of processed email dictionaries with additional fields
         """
-        processed_emails = []
+        def process_one(indexed_email):
+            i, email_data = indexed_email
+            return self._process_one(email_data, i, len(emails), extract_actions, summarize, categorize)
+        
+        # LLM calls are network-bound, so process the emails concurrently (results keep input order)
+        processed_emails = self._map_concurrently(process_one, list(enumerate(emails, 1)))
+        
+        print(f"✅ Successfully processed {len(processed_emails)} emails")
+        return processed_emails
+    
+    def _process_one(
+        self,
+        email_data: Dict[str, Any],
+        index: int,
+        total: int,
+        extract_actions: bool,
+        summarize: bool,
+        categorize: bool
+    ) -> Dict[str, Any]:
+        """
+        Process a single email for process_email_batch.
         
-        for i, email_data in enumerate(emails, 1):
-            print(f"📧 Processing email {i}/{len(emails)}: {email_data.get('subject', 'No Subject')[:50]}...")
+        Args:
+            email_data: Email dictionary to process
+            index: Position of the email in the batch (1-based, for progress output)
+            total: Number of emails in the batch
+            extract_actions: Whether to extract action items
+            summarize: Whether to generate a summary
+            categorize: Whether to categorize the email
+            
+        Returns:
+            Copy of the email dictionary with the requested fields added
+        """
+        print(f"📧 Processing email {index}/{total}: {email_data.get('subject', 'No Subject')[:50]}...")
+        
+        processed_email = email_data.copy()
+        
+        try:
+            # Format once and share it between the operations
+            formatted_email = self._format_email(email_data)
             
-            processed_email = email_data.copy()
+            # Obvious non-action emails need no LLM work for the action item
+            if extract_actions and is_non_action_email(email_data):
+                processed_email["action_item"] = ActionItem(is_action_item=False).model_dump()
+                extract_actions = False
             
-            try:
+            # Fuse two or more remaining operations into a single LLM call
+            if extract_actions + summarize + categorize >= 2:
+                analysis = self._analyze_email_str(formatted_email)
                 if extract_actions:
-                    action_item = self.extract_action_item(email_data)
-                    processed_email["action_item"] = action_item.model_dump()
-                
+                    processed_email["action_item"] = analysis.action_item.model_dump()
                 if summarize:
-                    summary = self.summarize_email(email_data)
-                    processed_email["summary"] = summary.model_dump()
-                
+                    processed_email["summary"] = analysis.summary.model_dump()
                 if categorize:
-                    category = self.categorize_email(email_data)
-                    processed_email["category"] = category
-                
-                processed_emails.append(processed_email)
-                
-            except Exception as e:
-                print(f"⚠️  Error processing email: {str(e)}")
-                processed_emails.append(processed_email)
+                    processed_email["category"] = analysis.category
+                return processed_email
+            
+            if extract_actions:
+                action_item = self._extract_action_item_str(formatted_email)
+                processed_email["action_item"] = action_item.model_dump()
+            
+            if summarize:
+                summary = self._summarize_email_str(formatted_email)
+                processed_email["summary"] = summary.model_dump()
+            
+            if categorize:
+                category = self._categorize_email_str(formatted_email)
+                processed_email["category"] = category
+            
+        except Exception as e:
+            print(f"⚠️  Error processing email: {str(e)}")
         
-        print(f"✅ Successfully processed {len(processed_emails)} emails")
-        return processed_emails
+        return processed_email
+    
+    def _map_concurrently(self, func, items: List[Any]) -> List[Any]:
+        """
+        Apply func to each item on a thread pool of up to max_workers threads.
+        
+        Returns:
+            Results in the same order as items
+        """
+        if not items:
+            return []
+        
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, len(items))) as executor:
+            return list(executor.map(func, items))
     
     def extract_action_items_from_batch(self, emails: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
         """
@@ -306,10 +679,9 @@ Body:
             List of emails that contain action items with extracted action information
         """
         action_emails = []
+        action_items = self._map_concurrently(self.extract_action_item, emails)
         
-        for email_data in emails:
-            action_item = self.extract_action_item(email_data)
-            
+        for email_data, action_item in zip(emails, action_items):
             if action_item.is_action_item:
                 email_with_action = email_data.copy()
                 email_with_action["action_item"] = action_item.model_dump()
@@ -354,6 +726,7 @@ John"""
     
     try:
         # Initialize email processor
+        init_http_client()
         processor = EmailProcessor()
         
         print("=" * 80)
@@ -1,15 +1,127 @@
+import asyncio
 import imaplib
 import email
 from email import message_from_bytes
 from email.header import decode_header
+from email.parser import BytesHeaderParser
+from email.utils import parseaddr
 from email.message import Message
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Tuple, Union, Literal, Iterable, Iterator, Sequence
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
+from pathlib import Path
+import json
+import logging
 import os
+import re
+import socket
+import sqlite3
+import threading
+import time
 from dotenv import load_dotenv
 
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+logger.addHandler(logging.NullHandler())
+
+try:
+    import aioimaplib  # Optional: concurrent fetches in read_latest_emails_async
+except ImportError:
+    aioimaplib = None
+
+# UID and FLAGS in the untagged FETCH response lines. Emails are addressed by
+# UID, not message sequence number: sequence numbers shift when other messages
+# are expunged, e.g. between fetching an email and marking it read
+_FETCH_FLAGS_RE = re.compile(rb'FLAGS \(([^)]*)\)')
+_FETCH_UID_RE = re.compile(rb'UID (\d+)')
+_UIDVALIDITY_RE = re.compile(rb'UIDVALIDITY (\d+)')
+
+# One LIST response line: (flags) "delimiter" name, where the name is quoted,
+# an atom, or a {n} literal that imaplib returns as a separate tuple item
+_LIST_RE = re.compile(rb'^\((?P<flags>[^)]*)\) (?:"(?P<delim>[^"]*)"|NIL) (?P<name>.+)$')
+_QUOTED_ESCAPE_RE = re.compile(rb'\\(.)')
+
+# RFC 6154 SPECIAL-USE flags returned by get_folders(special_use_only=True)
+SPECIAL_USE_FLAGS = frozenset({b'\\Inbox', b'\\Archive', b'\\Sent', b'\\Trash', b'\\Drafts', b'\\Junk'})
+
+# Maximum number of messages requested per FETCH command; larger requests can
+# exceed server limits ("maximum request size exceeded")
+FETCH_BATCH_SIZE = 100
+
+# Emails are fetched with BODY.PEEK (doesn't set \\Seen), truncated to this many
+# bytes so large attachments aren't downloaded; full=True fetches RFC822 instead
+FETCH_MAX_BYTES = 256 * 1024
+_FETCH_ITEMS = f"(FLAGS BODY.PEEK[]<0.{FETCH_MAX_BYTES}>)"
+_FETCH_ITEMS_FULL = "(RFC822 FLAGS)"
+
+# With body_mode="snippet" only the start of each message is fetched and decoded
+SNIPPET_MAX_BYTES = 1024
+SNIPPET_FETCH_BYTES = 32 * 1024
+_FETCH_ITEMS_SNIPPET = f"(FLAGS BODY.PEEK[]<0.{SNIPPET_FETCH_BYTES}>)"
+
+# With body_mode="none" (headers_only) only the headers read_latest_emails returns are fetched
+_FETCH_ITEMS_HEADERS = "(FLAGS BODY.PEEK[HEADER.FIELDS (SUBJECT FROM TO DATE)])"
+_HEADER_PARSER = BytesHeaderParser()
+
+# Large FETCH responses: raise imaplib's response line limit (default 1MB) and
+# give each connection a bigger socket receive buffer. The buffer is set before
+# connecting, since the TCP window scale is negotiated during the handshake
+IMAP_MAX_LINE = 10 * 1024 * 1024
+SOCKET_RCVBUF_BYTES = 4 * 1024 * 1024
+
+# Maximum number of emails flagged by one mark_as_read/mark_as_unread call
+MAX_STORE_IDS = 500
+
+# Threads parsing fetched emails while the next FETCH batch is read
+PARSE_WORKERS = min(8, os.cpu_count() or 1)
+
+# Suggested cache_dir for the on-disk email cache
+DEFAULT_CACHE_DIR = Path.home() / ".cache" / "gmail_helper"
+
+# Gmail allows at most 15 simultaneous IMAP connections per account
+MAX_IMAP_CONNECTIONS = 15
+
+
+class _IMAP4_SSL(imaplib.IMAP4_SSL):
+    """
+    IMAP4_SSL whose response line limit is set per connection (imaplib's _MAXLINE
+    is process-wide) and whose socket gets a SOCKET_RCVBUF_BYTES receive buffer.
+    """
+    
+    _MAXLINE = IMAP_MAX_LINE
+    
+    def _create_socket(self, timeout=None):
+        """Open the TLS connection, with SO_RCVBUF set before the TCP handshake."""
+        if timeout is not None and not timeout:
+            raise ValueError('Non-blocking socket (timeout=0) is not supported')
+        
+        error = None
+        for family, type_, proto, _, address in socket.getaddrinfo(self.host or None, self.port, 0, socket.SOCK_STREAM):
+            sock = socket.socket(family, type_, proto)
+            try:
+                try:
+                    sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, SOCKET_RCVBUF_BYTES)
+                except OSError:
+                    pass
+                if timeout is not None:
+                    sock.settimeout(timeout)
+                sock.connect(address)
+            except OSError as e:
+                error = e
+                sock.close()
+                continue
+            return self.ssl_context.wrap_socket(sock, server_hostname=self.host)
+        
+        raise error or OSError(f"getaddrinfo returned no addresses for {self.host}")
+    
+    def readline(self):
+        """Read line from remote, up to this connection's _MAXLINE bytes."""
+        line = self.file.readline(self._MAXLINE + 1)
+        if len(line) > self._MAXLINE:
+            raise self.error("got more than %d bytes" % self._MAXLINE)
+        return line
+
 
 class GmailHelper:
     """
@@ -19,15 +131,41 @@ class GmailHelper:
     1. Enable 2-factor authentication on your Google account
     2. Generate an App Password: https://myaccount.google.com/apppasswords
     3. Set GMAIL_USER and GMAIL_APP_PASSWORD in your .env file
+    
+    With pooled=True, disconnect() returns the logged-in connection to a
+    process-wide pool keyed by (user, server) instead of logging out, and
+    connect() reuses a pooled connection, skipping the TLS handshake and LOGIN.
+    
+    With a cache_dir, parsed emails are cached in a SQLite file keyed by
+    (folder, UIDVALIDITY, UID), which never change for a message, so
+    read_latest_emails only downloads emails it hasn't seen before.
     """
     
-    def __init__(self, email_address: Optional[str] = None, app_password: Optional[str] = None):
+    # Idle pooled connections are kept alive with NOOP at this interval
+    # (Gmail drops idle IMAP connections after about 30 minutes)
+    POOL_KEEPALIVE_SECONDS = 25 * 60
+    
+    # Idle logged-in connections per (email address, IMAP server)
+    _pool: Dict[Tuple[str, str], List[imaplib.IMAP4_SSL]] = {}
+    _pool_lock = threading.Lock()
+    _keepalive_thread: Optional[threading.Thread] = None
+    
+    def __init__(
+        self,
+        email_address: Optional[str] = None,
+        app_password: Optional[str] = None,
+        pooled: bool = False,
+        cache_dir: Optional[Union[str, Path]] = None
+    ):
         """
         Initialize Gmail helper with credentials.
         
         Args:
             email_address: Gmail email address (reads from GMAIL_USER env var if not provided)
             app_password: Gmail app password (reads from GMAIL_APP_PASSWORD env var if not provided)
+            pooled: Reuse logged-in connections from the shared pool (default: False)
+            cache_dir: Directory of the on-disk email cache, e.g. DEFAULT_CACHE_DIR
+                (default: None, no cache)
         """
         self.email_address = email_address or os.getenv("GMAIL_USER")
         self.app_password = app_password or os.getenv("GMAIL_APP_PASSWORD")
@@ -38,26 +176,144 @@ class GmailHelper:
         self.imap_server = "imap.gmail.com"
         self.imap_port = 993
         self.connection = None
+        self.pooled = pooled
+        # Send multi-batch FETCH commands back-to-back (RFC 3501 section 5.5); Gmail supports it
+        self.pipeline_fetch = self.imap_server == "imap.gmail.com"
+        
+        self._cache_db = None
+        if cache_dir is not None:
+            Path(cache_dir).mkdir(parents=True, exist_ok=True)
+            self._cache_db = sqlite3.connect(Path(cache_dir) / f"{self.email_address}.sqlite", check_same_thread=False)
+            self._cache_db.execute(
+                "CREATE TABLE IF NOT EXISTS emails ("
+                "folder TEXT, uidvalidity INTEGER, uid INTEGER, data TEXT, "
+                "PRIMARY KEY (folder, uidvalidity, uid))"
+            )
     
     def connect(self) -> None:
-        """Establish connection to Gmail IMAP server."""
+        """Establish connection to Gmail IMAP server (or reuse a pooled one)."""
+        if self.pooled:
+            connection = self._checkout()
+            if connection is not None:
+                self.connection = connection
+                return
+        
         try:
-            self.connection = imaplib.IMAP4_SSL(self.imap_server, self.imap_port)
+            self.connection = _IMAP4_SSL(self.imap_server, self.imap_port)
             self.connection.login(self.email_address, self.app_password)
-            print(f"✅ Successfully connected to Gmail as {self.email_address}")
+            logger.info("Connected to Gmail as %s", self.email_address)
         except imaplib.IMAP4.error as e:
             raise ConnectionError(f"Failed to connect to Gmail: {str(e)}")
     
-    def disconnect(self) -> None:
-        """Close connection to Gmail IMAP server."""
+    def disconnect(self, force: bool = False) -> None:
+        """
+        Close connection to Gmail IMAP server.
+        
+        Args:
+            force: Log out even if the helper is pooled (default: False)
+        """
+        if self.connection and self.pooled and not force:
+            self._checkin(self.connection)
+            self.connection = None
+            return
+        
         if self.connection:
             try:
                 self.connection.close()
                 self.connection.logout()
-                print("✅ Disconnected from Gmail")
-            except:
+                logger.debug("Disconnected from Gmail")
+            except (imaplib.IMAP4.error, OSError) as e:
+                logger.debug("Error disconnecting from Gmail: %s", e)
+            finally:
+                # Never reuse the logged-out (or broken) socket
+                self.connection = None
+    
+    def _pool_key(self) -> Tuple[str, str]:
+        """Key of this helper's connections in the shared pool."""
+        return (self.email_address, self.imap_server)
+    
+    def _checkout(self) -> Optional[imaplib.IMAP4_SSL]:
+        """
+        Take a live connection out of the shared pool.
+        
+        Returns:
+            A logged-in connection, or None if the pool has no live one
+        """
+        while True:
+            with GmailHelper._pool_lock:
+                idle = GmailHelper._pool.get(self._pool_key())
+                if not idle:
+                    return None
+                connection = idle.pop()
+            
+            # Drop connections the server has closed in the meantime
+            try:
+                status, _ = connection.noop()
+                if status == "OK":
+                    return connection
+            except (imaplib.IMAP4.error, OSError):
                 pass
     
+    def _checkin(self, connection: imaplib.IMAP4_SSL) -> None:
+        """Return a connection to the shared pool and make sure it is kept alive."""
+        with GmailHelper._pool_lock:
+            GmailHelper._pool.setdefault(self._pool_key(), []).append(connection)
+            if GmailHelper._keepalive_thread is None:
+                GmailHelper._keepalive_thread = threading.Thread(
+                    target=GmailHelper._keepalive_loop, name="gmail-pool-keepalive", daemon=True
+                )
+                GmailHelper._keepalive_thread.start()
+    
+    @classmethod
+    def _keepalive_loop(cls) -> None:
+        """Periodically NOOP idle pooled connections, dropping ones that fail."""
+        while True:
+            time.sleep(cls.POOL_KEEPALIVE_SECONDS)
+            
+            # Take the idle connections out so no one checks them out mid-NOOP
+            with cls._pool_lock:
+                pool, cls._pool = cls._pool, {}
+            
+            for key, connections in pool.items():
+                alive = []
+                for connection in connections:
+                    try:
+                        if connection.noop()[0] == "OK":
+                            alive.append(connection)
+                    except (imaplib.IMAP4.error, OSError):
+                        pass
+                with cls._pool_lock:
+                    cls._pool.setdefault(key, []).extend(alive)
+    
+    @classmethod
+    def close_pool(cls) -> None:
+        """Log out all idle pooled connections."""
+        with cls._pool_lock:
+            pool, cls._pool = cls._pool, {}
+        
+        for connections in pool.values():
+            for connection in connections:
+                try:
+                    connection.logout()
+                except Exception:
+                    pass
+    
+    def noop(self) -> bool:
+        """
+        Send a NOOP to keep the connection alive and check that it still works.
+        
+        Returns:
+            True if the connection is alive, False otherwise
+        """
+        if not self.connection:
+            return False
+        
+        try:
+            status, _ = self.connection.noop()
+            return status == "OK"
+        except Exception:
+            return False
+    
     def _decode_header_value(self, value: str) -> str:
         """
         Decode email header value handling different encodings.
@@ -72,25 +328,31 @@ class GmailHelper:
             return ""
         
         decoded_parts = decode_header(value)
-        decoded_string = ""
         
+        # Plain headers without encoded words come back as a single str
+        if len(decoded_parts) == 1 and isinstance(decoded_parts[0][0], str):
+            return decoded_parts[0][0]
+        
+        decoded = []
         for part, encoding in decoded_parts:
             if isinstance(part, bytes):
                 try:
-                    decoded_string += part.decode(encoding or 'utf-8', errors='ignore')
-                except:
-                    decoded_string += part.decode('utf-8', errors='ignore')
+                    decoded.append(part.decode(encoding or 'utf-8', errors='ignore'))
+                except LookupError:
+                    # Unknown charset
+                    decoded.append(part.decode('utf-8', errors='ignore'))
             else:
-                decoded_string += part
+                decoded.append(part)
         
-        return decoded_string
+        return "".join(decoded)
     
-    def _extract_body(self, msg: Message) -> str:
+    def _extract_body(self, msg: Message, max_bytes: Optional[int] = None) -> str:
         """
         Extract email body from message.
         
         Args:
             msg: Email message object
+            max_bytes: Only decode this many bytes of the body (default: None, all)
             
         Returns:
             Email body text
@@ -99,34 +361,308 @@ class GmailHelper:
         
         if msg.is_multipart():
             for part in msg.walk():
+                if max_bytes is not None and len(body) >= max_bytes:
+                    break
+                
+                # Only text/plain or text/html parts that aren't attachments
                 content_type = part.get_content_type()
-                content_disposition = str(part.get("Content-Disposition"))
+                if content_type != "text/plain" and content_type != "text/html":
+                    continue
+                if "attachment" in str(part.get("Content-Disposition")):
+                    continue
                 
-                # Get text/plain or text/html parts
-                if content_type == "text/plain" and "attachment" not in content_disposition:
-                    try:
-                        body = part.get_payload(decode=True).decode('utf-8', errors='ignore')
-                        break
-                    except:
-                        pass
-                elif content_type == "text/html" and not body and "attachment" not in content_disposition:
-                    try:
-                        body = part.get_payload(decode=True).decode('utf-8', errors='ignore')
-                    except:
-                        pass
+                payload = part.get_payload(decode=True)
+                if not isinstance(payload, bytes):
+                    continue
+                
+                if content_type == "text/plain":
+                    body = payload[:max_bytes].decode('utf-8', errors='ignore')
+                    break
+                if not body:
+                    body = payload[:max_bytes].decode('utf-8', errors='ignore')
         else:
-            try:
-                body = msg.get_payload(decode=True).decode('utf-8', errors='ignore')
-            except:
+            payload = msg.get_payload(decode=True)
+            if isinstance(payload, bytes):
+                body = payload[:max_bytes].decode('utf-8', errors='ignore')
+            else:
                 body = str(msg.get_payload())
         
         return body.strip()
     
+    def _parse_fetch_response(self, data: list) -> Dict[bytes, tuple]:
+        """
+        Split a multi-message UID FETCH response (message literal and FLAGS) into per-message parts.
+        
+        imaplib returns one (response line, literal) tuple per message, followed by
+        the rest of the response line (e.g. b' FLAGS (\\Seen))') as plain bytes.
+        The server may send UID and FLAGS before or after the literal.
+        
+        Args:
+            data: Response data from connection.uid("FETCH", ...)
+            
+        Returns:
+            Dictionary mapping UID to (raw email bytes, flags bytes)
+        """
+        # Collect the full response line (both halves) and the literal of each message
+        parts = []
+        for item in data:
+            if isinstance(item, tuple):
+                parts.append([item[0], item[1]])
+            elif isinstance(item, bytes) and parts:
+                parts[-1][0] += item
+        
+        messages = {}
+        for response_line, raw_email in parts:
+            uid_match = _FETCH_UID_RE.search(response_line)
+            if not uid_match:
+                continue
+            flags_match = _FETCH_FLAGS_RE.search(response_line)
+            messages[uid_match.group(1)] = (raw_email, flags_match.group(1) if flags_match else b"")
+        
+        return messages
+    
+    def _parse_one(self, email_id: bytes, raw_email: bytes, flags: bytes, body_mode: str = "full") -> Dict[str, any]:
+        """
+        Parse a fetched email into the dictionary returned by read_latest_emails.
+        
+        Args:
+            email_id: Message UID
+            raw_email: Raw RFC822 message (possibly truncated)
+            flags: Message FLAGS
+            body_mode: "full", "snippet" or "none" (see read_latest_emails)
+            
+        Returns:
+            Email dictionary (see read_latest_emails)
+        """
+        if body_mode == "none":
+            # Stops at the end of the headers instead of building the MIME tree
+            msg = _HEADER_PARSER.parsebytes(raw_email)
+        else:
+            msg = message_from_bytes(raw_email)
+        
+        # Extract email details
+        subject = self._decode_header_value(msg.get("Subject", ""))
+        to_header = self._decode_header_value(msg.get("To", ""))
+        date_header = msg.get("Date", "")
+        
+        # Extract sender email and name (split before decoding, so encoded
+        # names containing commas or brackets don't confuse the parser)
+        name, from_email = parseaddr(msg.get("From", ""))
+        from_name = self._decode_header_value(name) or from_email
+        
+        # Get email body
+        if body_mode == "none":
+            body = snippet = ""
+        else:
+            body = self._extract_body(msg, max_bytes=SNIPPET_MAX_BYTES if body_mode == "snippet" else None)
+            snippet = body[:200] + "..." if len(body) > 200 else body
+            if body_mode == "snippet":
+                body = ""
+        
+        # Check if email is unread
+        is_unread = b'\\Seen' not in flags
+        
+        return {
+            "id": email_id.decode(),
+            "subject": subject,
+            "from": from_email,
+            "from_name": from_name,
+            "to": to_header,
+            "date": date_header,
+            "body": body,
+            "snippet": snippet,
+            "is_unread": is_unread
+        }
+    
+    def _build_emails(
+        self,
+        email_ids: List[bytes],
+        fetched_batches: Iterable[Dict[bytes, tuple]],
+        body_mode: str = "full"
+    ) -> List[Dict[str, any]]:
+        """
+        Parse fetched emails in the order of email_ids, skipping ones that fail to parse.
+        
+        Emails are parsed on a thread pool as soon as their batch arrives, so when
+        fetched_batches is a lazy iterator over FETCH responses, parsing one batch
+        overlaps with reading the next from the socket.
+        
+        Args:
+            email_ids: Message UIDs in the order to return them
+            fetched_batches: Dictionaries mapping UID to (raw email bytes, flags bytes)
+            body_mode: "full", "snippet" or "none" (see read_latest_emails)
+            
+        Returns:
+            List of email dictionaries
+        """
+        with ThreadPoolExecutor(max_workers=PARSE_WORKERS) as executor:
+            futures = {}
+            for fetched in fetched_batches:
+                for email_id, (raw_email, flags) in fetched.items():
+                    futures[email_id] = executor.submit(self._parse_one, email_id, raw_email, flags, body_mode)
+            
+            emails = []
+            
+            for email_id in email_ids:
+                if email_id not in futures:
+                    continue
+                
+                try:
+                    emails.append(futures[email_id].result())
+                except Exception:
+                    logger.exception("Error processing email %s", email_id)
+                    continue
+            
+            return emails
+    
+    def _iter_fetch_batches(self, batches: List[List[bytes]], items: str) -> Iterator[list]:
+        """
+        UID FETCH several batches of messages, pipelining the commands if enabled.
+        
+        Pipelined commands are all sent before any response is read, so the
+        batches cost one round-trip instead of one each.
+        
+        Args:
+            batches: Lists of message UIDs, one FETCH command per list
+            items: FETCH data items, e.g. "(RFC822 FLAGS)"
+            
+        Yields:
+            FETCH response data, per batch (all at once when pipelined)
+        """
+        if len(batches) > 1 and self.pipeline_fetch:
+            # Drop unsolicited FETCH responses (e.g. flag changes seen by an earlier
+            # NOOP), so only the responses to these commands are collected
+            self.connection.untagged_responses.pop("FETCH", None)
+            tags = [self.connection._command("UID", "FETCH", b",".join(batch), items) for batch in batches]
+            
+            # Read every tagged response before raising, so no command is left
+            # pending and the connection stays in sync. _command_complete raises
+            # on BAD; an abort means the connection is gone, so re-raise that at once
+            statuses = []
+            error = None
+            for tag in tags:
+                try:
+                    statuses.append(self.connection._command_complete("UID", tag)[0])
+                except imaplib.IMAP4.abort:
+                    raise
+                except imaplib.IMAP4.error as e:
+                    statuses.append("BAD")
+                    error = error or e
+            
+            fetched = self.connection.untagged_responses.pop("FETCH", [])
+            if error is not None:
+                raise error
+            if any(status != "OK" for status in statuses):
+                raise Exception("Failed to fetch emails")
+            yield fetched
+            return
+        
+        for batch in batches:
+            status, msg_data = self.connection.uid("FETCH", b",".join(batch), items)
+            
+            if status != "OK":
+                raise Exception("Failed to fetch emails")
+            
+            yield msg_data
+    
+    def _fetch_batches(self, batches: List[List[bytes]], items: str) -> list:
+        """UID FETCH several batches of messages and return the combined response data."""
+        data = []
+        for msg_data in self._iter_fetch_batches(batches, items):
+            data.extend(msg_data)
+        return data
+    
+    def _uidvalidity(self, folder: str) -> int:
+        """Get the UIDVALIDITY of the selected folder (from the SELECT response, else STATUS)."""
+        _, data = self.connection.response("UIDVALIDITY")
+        if data and data[0]:
+            return int(data[0])
+        
+        status, data = self.connection.status(folder, "(UIDVALIDITY)")
+        match = _UIDVALIDITY_RE.search(data[0]) if status == "OK" and data else None
+        if not match:
+            raise Exception(f"Failed to get UIDVALIDITY of folder: {folder}")
+        return int(match.group(1))
+    
+    def _read_with_cache(self, folder: str, email_ids: List[bytes], batch_size: int) -> List[Dict[str, any]]:
+        """
+        Read emails through the on-disk cache, fetching only the ones not cached yet.
+        
+        Flags of all emails are fetched first (cheap), so is_unread is always
+        current even for cached emails.
+        
+        Args:
+            folder: Selected folder
+            email_ids: Message UIDs, in the order to return them
+            batch_size: Maximum number of emails requested per FETCH command
+            
+        Returns:
+            List of email dictionaries (see read_latest_emails)
+        """
+        uidvalidity = self._uidvalidity(folder)
+        
+        # UID -> flags
+        flags = {}
+        batches = [email_ids[i:i + batch_size] for i in range(0, len(email_ids), batch_size)]
+        for line in self._fetch_batches(batches, "(UID FLAGS)"):
+            if not isinstance(line, bytes):
+                continue
+            uid_match = _FETCH_UID_RE.search(line)
+            if uid_match:
+                flags_match = _FETCH_FLAGS_RE.search(line)
+                flags[uid_match.group(1)] = flags_match.group(1) if flags_match else b""
+        
+        cached = {}
+        uid_list = [int(uid) for uid in flags]
+        for i in range(0, len(uid_list), 500):
+            chunk = uid_list[i:i + 500]
+            rows = self._cache_db.execute(
+                f"SELECT uid, data FROM emails WHERE folder = ? AND uidvalidity = ? AND uid IN ({','.join('?' * len(chunk))})",
+                (folder, uidvalidity, *chunk)
+            ).fetchall()
+            cached.update(rows)
+        
+        # Download and cache the emails that aren't cached yet
+        misses = [email_id for email_id in email_ids if email_id in flags and int(email_id) not in cached]
+        parsed = {}
+        if misses:
+            batches = [misses[i:i + batch_size] for i in range(0, len(misses), batch_size)]
+            fetched = self._parse_fetch_response(self._fetch_batches(batches, _FETCH_ITEMS))
+            for email_dict in self._build_emails(misses, [fetched]):
+                parsed[email_dict["id"]] = email_dict
+            
+            with self._cache_db:
+                self._cache_db.executemany(
+                    "INSERT OR REPLACE INTO emails (folder, uidvalidity, uid, data) VALUES (?, ?, ?, ?)",
+                    [
+                        (folder, uidvalidity, int(email_id), json.dumps(email_dict))
+                        for email_id, email_dict in parsed.items()
+                    ]
+                )
+        
+        emails = []
+        for email_id in email_ids:
+            if email_id not in flags:
+                continue
+            if int(email_id) in cached:
+                email_dict = json.loads(cached[int(email_id)])
+                # Flags can change; take the current ones
+                email_dict["is_unread"] = b'\\Seen' not in flags[email_id]
+                emails.append(email_dict)
+            elif email_id.decode() in parsed:
+                emails.append(parsed[email_id.decode()])
+        
+        return emails
+    
     def read_latest_emails(
         self, 
         n: int = 10, 
         folder: str = "INBOX",
-        unread_only: bool = False
+        unread_only: bool = False,
+        batch_size: int = FETCH_BATCH_SIZE,
+        full: bool = False,
+        body_mode: Literal["full", "snippet", "none"] = "full",
+        headers_only: bool = False
     ) -> List[Dict[str, any]]:
         """
         Read the latest n emails from Gmail.
@@ -135,10 +671,17 @@ class GmailHelper:
             n: Number of latest emails to retrieve (default: 10)
             folder: Email folder to read from (default: "INBOX")
             unread_only: If True, only fetch unread emails (default: False)
+            batch_size: Maximum number of emails requested per FETCH command (default: 100)
+            full: Fetch the complete RFC822 message (marks it as read) instead of the first
+                FETCH_MAX_BYTES without changing flags (default: False)
+            body_mode: "full" extracts the body, "snippet" only decodes enough of it for the
+                snippet (body is empty), "none" only fetches the Subject, From, To and Date
+                headers (body and snippet are empty) (default: "full")
+            headers_only: Shorthand for body_mode="none" (default: False)
             
         Returns:
             List of email dictionaries containing:
-                - id: Email unique ID
+                - id: Email UID (stable for the folder, unlike the sequence number)
                 - subject: Email subject
                 - from: Sender email address
                 - from_name: Sender name
@@ -148,6 +691,9 @@ class GmailHelper:
                 - snippet: First 200 characters of body
                 - is_unread: Boolean indicating if email is unread
         """
+        if headers_only:
+            body_mode = "none"
+        
         if not self.connection:
             self.connect()
         
@@ -160,7 +706,7 @@ class GmailHelper:
             
             # Search for emails
             search_criteria = "UNSEEN" if unread_only else "ALL"
-            status, message_ids = self.connection.search(None, search_criteria)
+            status, message_ids = self.connection.uid("SEARCH", None, search_criteria)
             
             if status != "OK":
                 raise Exception("Failed to search emails")
@@ -169,116 +715,262 @@ class GmailHelper:
             email_id_list = message_ids[0].split()
             
             if not email_id_list:
-                print(f"ℹ️  No {'unread' if unread_only else ''} emails found in {folder}")
+                logger.debug("No %semails found in %s", "unread " if unread_only else "", folder)
                 return []
             
             # Get the latest n emails (emails are in chronological order, so we want the last n)
             latest_email_ids = email_id_list[-n:] if len(email_id_list) >= n else email_id_list
             latest_email_ids = list(reversed(latest_email_ids))  # Reverse to get newest first
             
-            emails = []
+            if self._cache_db is not None and not full and body_mode == "full":
+                # Only download emails that aren't in the on-disk cache yet
+                emails = self._read_with_cache(folder, latest_email_ids, batch_size)
+            else:
+                # Fetch emails and their flags in bounded batches
+                batches = [
+                    latest_email_ids[i:i + batch_size]
+                    for i in range(0, len(latest_email_ids), batch_size)
+                ]
+                if full:
+                    items = _FETCH_ITEMS_FULL
+                elif body_mode == "full":
+                    items = _FETCH_ITEMS
+                elif body_mode == "snippet":
+                    items = _FETCH_ITEMS_SNIPPET
+                else:
+                    items = _FETCH_ITEMS_HEADERS
+                # Parse each batch while the next one is being read
+                fetched_batches = (
+                    self._parse_fetch_response(msg_data)
+                    for msg_data in self._iter_fetch_batches(batches, items)
+                )
+                emails = self._build_emails(latest_email_ids, fetched_batches, body_mode=body_mode)
             
-            for email_id in latest_email_ids:
-                try:
-                    # Fetch the email
-                    status, msg_data = self.connection.fetch(email_id, "(RFC822)")
-                    
-                    if status != "OK":
-                        continue
-                    
-                    # Parse the email
-                    raw_email = msg_data[0][1]
-                    msg = message_from_bytes(raw_email)
-                    
-                    # Extract email details
-                    subject = self._decode_header_value(msg.get("Subject", ""))
-                    from_header = self._decode_header_value(msg.get("From", ""))
-                    to_header = self._decode_header_value(msg.get("To", ""))
-                    date_header = msg.get("Date", "")
-                    
-                    # Extract sender email and name
-                    from_name = from_header
-                    from_email = from_header
-                    if "<" in from_header and ">" in from_header:
-                        from_name = from_header.split("<")[0].strip().strip('"')
-                        from_email = from_header.split("<")[1].split(">")[0].strip()
-                    
-                    # Get email body
-                    body = self._extract_body(msg)
-                    snippet = body[:200] + "..." if len(body) > 200 else body
-                    
-                    # Check if email is unread
-                    status, flag_data = self.connection.fetch(email_id, "(FLAGS)")
-                    is_unread = b'\\Seen' not in flag_data[0]
-                    
-                    email_dict = {
-                        "id": email_id.decode(),
-                        "subject": subject,
-                        "from": from_email,
-                        "from_name": from_name,
-                        "to": to_header,
-                        "date": date_header,
-                        "body": body,
-                        "snippet": snippet,
-                        "is_unread": is_unread
-                    }
-                    
-                    emails.append(email_dict)
-                    
-                except Exception as e:
-                    print(f"⚠️  Error processing email {email_id}: {str(e)}")
-                    continue
+            logger.debug("Retrieved %d emails from %s", len(emails), folder)
+            return emails
+            
+        except Exception as e:
+            raise Exception(f"Error reading emails: {str(e)}")
+    
+    async def _aio_connect(self, folder: str):
+        """Open, log in and select folder on a new aioimaplib connection."""
+        client = aioimaplib.IMAP4_SSL(host=self.imap_server, port=self.imap_port)
+        await client.wait_hello_from_server()
+        
+        response = await client.login(self.email_address, self.app_password)
+        if response.result != "OK":
+            await client.logout()
+            raise ConnectionError(f"Failed to connect to Gmail: {response.lines}")
+        
+        response = await client.select(folder)
+        if response.result != "OK":
+            await client.logout()
+            raise Exception(f"Failed to select folder: {folder}")
+        
+        return client
+    
+    async def _aio_fetch(self, client, email_ids: List[bytes], batch_size: int, items: str) -> Dict[bytes, tuple]:
+        """
+        Fetch emails over one aioimaplib connection.
+        
+        Args:
+            client: Logged-in aioimaplib connection with the folder selected
+            email_ids: Message UIDs to fetch
+            batch_size: Maximum number of emails requested per FETCH command
+            items: FETCH data items
+            
+        Returns:
+            Dictionary mapping UID to (raw email bytes, flags bytes)
+        """
+        fetched = {}
+        for i in range(0, len(email_ids), batch_size):
+            batch = email_ids[i:i + batch_size]
+            response = await client.uid("fetch", b",".join(batch).decode(), items)
+            
+            if response.result != "OK":
+                raise Exception("Failed to fetch emails")
             
-            print(f"✅ Successfully retrieved {len(emails)} emails from {folder}")
+            # aioimaplib returns each message literal as a bytearray after its
+            # "<id> FETCH (..." line; convert to imaplib's (line, literal) tuples
+            data = []
+            for line in response.lines:
+                if isinstance(line, bytearray) and data:
+                    data[-1] = (data[-1], bytes(line))
+                else:
+                    data.append(bytes(line).replace(b" FETCH ", b" ", 1))
+            
+            fetched.update(self._parse_fetch_response(data))
+        return fetched
+    
+    async def read_latest_emails_async(
+        self,
+        n: int = 10,
+        folder: str = "INBOX",
+        unread_only: bool = False,
+        connections: int = 4,
+        batch_size: int = FETCH_BATCH_SIZE,
+        full: bool = False
+    ) -> List[Dict[str, any]]:
+        """
+        Read the latest n emails from Gmail over several concurrent connections.
+        
+        Requires the optional aioimaplib package. The message UIDs are split
+        round-robin across the connections, which fetch concurrently.
+        
+        Args:
+            n: Number of latest emails to retrieve (default: 10)
+            folder: Email folder to read from (default: "INBOX")
+            unread_only: If True, only fetch unread emails (default: False)
+            connections: Number of IMAP connections to use, at most 15 (default: 4)
+            batch_size: Maximum number of emails requested per FETCH command (default: 100)
+            full: Fetch complete RFC822 messages (see read_latest_emails) (default: False)
+            
+        Returns:
+            List of email dictionaries (see read_latest_emails)
+        """
+        if aioimaplib is None:
+            raise ImportError("read_latest_emails_async requires aioimaplib (pip install aioimaplib)")
+        
+        connections = max(1, min(connections, MAX_IMAP_CONNECTIONS))
+        clients = []
+        
+        try:
+            clients.append(await self._aio_connect(folder))
+            
+            # Search for emails
+            response = await clients[0].uid_search("UNSEEN" if unread_only else "ALL")
+            
+            if response.result != "OK":
+                raise Exception("Failed to search emails")
+            
+            email_id_list = response.lines[0].split()
+            
+            if not email_id_list:
+                logger.debug("No %semails found in %s", "unread " if unread_only else "", folder)
+                return []
+            
+            # Get the latest n emails, newest first
+            latest_email_ids = list(reversed(email_id_list[-n:]))
+            
+            # Split the IDs round-robin and open the extra connections concurrently
+            shares = [share for share in (latest_email_ids[i::connections] for i in range(connections)) if share]
+            opened = await asyncio.gather(
+                *[self._aio_connect(folder) for _ in shares[1:]],
+                return_exceptions=True
+            )
+            clients.extend(client for client in opened if not isinstance(client, BaseException))
+            for client in opened:
+                if isinstance(client, BaseException):
+                    raise client
+            
+            items = _FETCH_ITEMS_FULL if full else _FETCH_ITEMS
+            results = await asyncio.gather(
+                *[self._aio_fetch(client, share, batch_size, items) for client, share in zip(clients, shares)]
+            )
+            
+            emails = self._build_emails(latest_email_ids, results)
+            
+            logger.debug("Retrieved %d emails from %s", len(emails), folder)
             return emails
             
+        except (ImportError, ConnectionError):
+            raise
         except Exception as e:
             raise Exception(f"Error reading emails: {str(e)}")
+        finally:
+            await asyncio.gather(*[client.logout() for client in clients], return_exceptions=True)
+    
+    def _sequence_set(self, email_ids: Union[str, Sequence[str]]) -> str:
+        """
+        Build the UID set of a UID STORE command from one or more email IDs (UIDs).
+        
+        Consecutive IDs are compressed into ranges, e.g. ["1", "2", "3", "7"] -> "1:3,7".
+        The IDs must not be empty.
+        
+        Raises:
+            ValueError: If more than MAX_STORE_IDS IDs are given
+        """
+        if isinstance(email_ids, str):
+            return email_ids
+        
+        if len(email_ids) > MAX_STORE_IDS:
+            raise ValueError(f"Cannot flag more than {MAX_STORE_IDS} emails at once (got {len(email_ids)})")
+        
+        ranges = []
+        for email_id in sorted({int(email_id) for email_id in email_ids}):
+            if ranges and ranges[-1][1] == email_id - 1:
+                ranges[-1][1] = email_id
+            else:
+                ranges.append([email_id, email_id])
+        
+        return ",".join(str(start) if start == end else f"{start}:{end}" for start, end in ranges)
     
-    def mark_as_read(self, email_id: str) -> bool:
+    def mark_as_read(self, email_ids: Union[str, Sequence[str]]) -> bool:
         """
-        Mark an email as read.
+        Mark one or more emails as read with a single UID STORE command.
         
         Args:
-            email_id: Email ID to mark as read
+            email_ids: Email ID, or list of up to MAX_STORE_IDS email IDs, to mark as read
             
         Returns:
             True if successful, False otherwise
+            
+        Raises:
+            ValueError: If more than MAX_STORE_IDS IDs are given
         """
+        # An empty UID set is invalid IMAP; there is nothing to flag
+        if not email_ids:
+            return True
+        
+        sequence_set = self._sequence_set(email_ids)
+        
         if not self.connection:
             self.connect()
         
         try:
-            self.connection.store(email_id, '+FLAGS', '\\Seen')
+            self.connection.uid('STORE', sequence_set, '+FLAGS', '\\Seen')
             return True
         except Exception as e:
-            print(f"⚠️  Error marking email as read: {str(e)}")
+            logger.warning("Error marking email as read: %s", e)
             return False
     
-    def mark_as_unread(self, email_id: str) -> bool:
+    def mark_as_unread(self, email_ids: Union[str, Sequence[str]]) -> bool:
         """
-        Mark an email as unread.
+        Mark one or more emails as unread with a single UID STORE command.
         
         Args:
-            email_id: Email ID to mark as unread
+            email_ids: Email ID, or list of up to MAX_STORE_IDS email IDs, to mark as unread
             
         Returns:
             True if successful, False otherwise
+            
+        Raises:
+            ValueError: If more than MAX_STORE_IDS IDs are given
         """
+        # An empty UID set is invalid IMAP; there is nothing to flag
+        if not email_ids:
+            return True
+        
+        sequence_set = self._sequence_set(email_ids)
+        
         if not self.connection:
             self.connect()
         
         try:
-            self.connection.store(email_id, '-FLAGS', '\\Seen')
+            self.connection.uid('STORE', sequence_set, '-FLAGS', '\\Seen')
             return True
         except Exception as e:
-            print(f"⚠️  Error marking email as unread: {str(e)}")
+            logger.warning("Error marking email as unread: %s", e)
             return False
     
-    def get_folders(self) -> List[str]:
+    def get_folders(self, special_use_only: bool = False) -> List[str]:
         """
         Get list of all available folders/labels.
         
+        Args:
+            special_use_only: Only return INBOX and the RFC 6154 special-use
+                folders (Archive, Sent, Trash, Drafts, Junk)
+        
         Returns:
             List of folder names
         """
@@ -286,18 +978,38 @@ class GmailHelper:
             self.connect()
         
         try:
-            status, folders = self.connection.list()
+            status, folders = self.connection.list(directory='""', pattern='"*"')
             if status != "OK":
                 return []
             
             folder_list = []
             for folder in folders:
-                folder_name = folder.decode().split('"/"')[-1].strip().strip('"')
-                folder_list.append(folder_name)
+                if isinstance(folder, tuple):
+                    # Literal name: ({n} header line, name bytes)
+                    line, literal = folder
+                else:
+                    line, literal = folder, None
+                match = _LIST_RE.match(line)
+                if not match:
+                    continue
+                
+                if literal is not None:
+                    name = literal
+                else:
+                    name = match.group("name")
+                    if name.startswith(b'"') and name.endswith(b'"'):
+                        name = _QUOTED_ESCAPE_RE.sub(rb'\1', name[1:-1])
+                
+                if special_use_only:
+                    flags = match.group("flags").split()
+                    if name.upper() != b"INBOX" and SPECIAL_USE_FLAGS.isdisjoint(flags):
+                        continue
+                
+                folder_list.append(name.decode("utf-8", errors="replace"))
             
             return folder_list
-        except Exception as e:
-            print(f"⚠️  Error getting folders: {str(e)}")
+        except Exception:
+            logger.exception("Error getting folders")
             return []
     
     def __enter__(self):
@@ -322,6 +1034,8 @@ if __name__ == "__main__":
        GMAIL_APP_PASSWORD=your-app-password
     """
     
+    logging.basicConfig(level=logging.INFO)
+    
     try:
         # Using context manager (recommended)
         with GmailHelper() as gmail:
@@ -1,17 +1,23 @@
 """
 Pytest configuration and fixtures.
+
+The email and LLM response fixtures are session-scoped and read-only
+(MappingProxyType), so an accidental mutation in one test raises instead of
+leaking into the others.
 """
 import pytest
+import orjson
 import os
-from typing import Dict, Any
+from types import MappingProxyType
+from typing import Any, Mapping, Tuple
 
 
-@pytest.fixture
-def sample_email_data() -> Dict[str, Any]:
+@pytest.fixture(scope="session")
+def sample_email_data() -> Mapping[str, Any]:
     """
     Sample email data for testing.
     """
-    return {
+    return MappingProxyType({
         "subject": "Urgent: Project Review Meeting Tomorrow",
         "from": "john.doe@example.com",
         "from_name": "John Doe",
@@ -30,15 +36,15 @@ This is critical for our stakeholder presentation on Friday. Let me know if you
 
 Best regards,
 John"""
-    }
+    })
 
 
-@pytest.fixture
-def non_action_email_data() -> Dict[str, Any]:
+@pytest.fixture(scope="session")
+def non_action_email_data() -> Mapping[str, Any]:
     """
     Sample email without action items.
     """
-    return {
+    return MappingProxyType({
         "subject": "Happy Birthday!",
         "from": "friend@example.com",
         "from_name": "Best Friend",
@@ -50,70 +56,106 @@ Wishing you all the best on your special day. Hope you have an amazing celebrati
 
 Cheers,
 Your Friend"""
-    }
+    })
 
 
-@pytest.fixture
-def batch_email_data(sample_email_data, non_action_email_data) -> list:
+@pytest.fixture(scope="session")
+def batch_email_data(sample_email_data, non_action_email_data) -> Tuple[Mapping[str, Any], ...]:
     """
     Batch of emails for testing batch operations.
     """
-    return [
+    return (
         sample_email_data,
         non_action_email_data,
-        {
+        MappingProxyType({
             "subject": "Weekly Report Due This Friday",
             "from": "manager@example.com",
             "from_name": "Manager",
             "to": "team@example.com",
             "date": "2024-01-15 14:00:00",
             "body": "Please submit your weekly reports by Friday EOD. This is important."
-        }
-    ]
+        })
+    )
 
 
-@pytest.fixture
+@pytest.fixture(scope="session")
 def mock_llm_response_action_item():
     """
     Mock LLM response for action item extraction.
     """
-    return {
+    return MappingProxyType({
         "is_action_item": True,
         "action_item": "Schedule and prepare for project review meeting tomorrow at 2 PM with Q4 metrics, budget analysis, and roadmap",
         "due_date": "Tomorrow at 2 PM",
         "priority": "high"
-    }
+    })
 
 
-@pytest.fixture
+@pytest.fixture(scope="session")
 def mock_llm_response_no_action():
     """
     Mock LLM response for non-action email.
     """
-    return {
+    return MappingProxyType({
         "is_action_item": False,
         "action_item": None,
         "due_date": None,
         "priority": None
-    }
+    })
 
 
-@pytest.fixture
+@pytest.fixture(scope="session")
 def mock_llm_response_summary():
     """
     Mock LLM response for email summary.
     """
-    return {
+    return MappingProxyType({
         "summary": "Meeting request for tomorrow at 2 PM with preparation requirements.",
-        "key_points": [
+        "key_points": (
             "Project review meeting tomorrow at 2 PM",
             "Prepare Q4 performance metrics",
             "Prepare budget analysis report",
             "Prepare next quarter roadmap",
             "Related to stakeholder presentation on Friday"
-        ],
+        ),
         "sentiment": "neutral"
-    }
+    })
+
+
+@pytest.fixture(scope="session")
+def action_item_json(mock_llm_response_action_item) -> str:
+    """
+    JSON-encoded action item response, encoded once per session.
+    """
+    return orjson.dumps(dict(mock_llm_response_action_item)).decode()
+
+
+@pytest.fixture(scope="session")
+def no_action_json(mock_llm_response_no_action) -> str:
+    """
+    JSON-encoded non-action response, encoded once per session.
+    """
+    return orjson.dumps(dict(mock_llm_response_no_action)).decode()
+
+
+@pytest.fixture(scope="session")
+def summary_json(mock_llm_response_summary) -> str:
+    """
+    JSON-encoded summary response, encoded once per session.
+    """
+    return orjson.dumps(dict(mock_llm_response_summary)).decode()
+
+
+@pytest.fixture(scope="session")
+def analysis_json(mock_llm_response_action_item, mock_llm_response_summary) -> str:
+    """
+    JSON-encoded fused analysis response, encoded once per session.
+    """
+    return orjson.dumps({
+        "action_item": dict(mock_llm_response_action_item),
+        "summary": dict(mock_llm_response_summary),
+        "category": "Work/Business"
+    }).decode()
 
 
 @pytest.fixture
@@ -0,0 +1,90 @@
+"""
+Unit tests for BloomFilter and RotatingBloomFilter.
+"""
+import pytest
+
+from app.storage import bloom_filter as bloom_filter_module
+from app.storage.bloom_filter import BloomFilter, RotatingBloomFilter
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Fake time.monotonic; advance it by assigning clock.now."""
+    class _Clock:
+        now = 1000.0
+
+    monkeypatch.setattr(bloom_filter_module.time, "monotonic", lambda: _Clock.now)
+    return _Clock
+
+
+class TestBloomFilter:
+    """Tests for the fixed-size Bloom filter."""
+
+    def test_no_false_negatives(self):
+        """Test every added key is reported present."""
+        bloom = BloomFilter(capacity=1000, error_rate=0.01)
+        keys = [f"email-{i}" for i in range(1000)]
+
+        for key in keys:
+            bloom.add(key)
+
+        assert all(key in bloom for key in keys)
+
+    def test_false_positive_rate(self):
+        """Test unseen keys are rarely reported present at capacity."""
+        bloom = BloomFilter(capacity=1000, error_rate=0.01)
+        for i in range(1000):
+            bloom.add(f"email-{i}")
+
+        false_positives = sum(f"other-{i}" in bloom for i in range(10_000))
+
+        assert false_positives < 300
+
+    def test_add_reports_new_keys(self):
+        """Test add returns False for a key that was already present."""
+        bloom = BloomFilter(capacity=100)
+
+        assert bloom.add("a") is True
+        assert bloom.add("a") is False
+        assert bloom.count == 1
+
+
+class TestRotatingBloomFilter:
+    """Tests for rotating Bloom filter generations."""
+
+    def test_rotation_keeps_previous_generation(self, clock):
+        """Test keys added before a rotation are still found after it."""
+        bloom = RotatingBloomFilter(capacity=1000, rotation_seconds=60)
+        keys = [f"email-{i}" for i in range(500)]
+        for key in keys:
+            bloom.add(key)
+
+        clock.now += 60
+        bloom.add("new")
+
+        assert bloom._previous is not None
+        assert all(key in bloom for key in keys)
+        assert "new" in bloom
+        assert bloom.count == 501
+
+    def test_keys_dropped_after_two_rotations(self, clock):
+        """Test keys are forgotten once their generation has been retired."""
+        bloom = RotatingBloomFilter(capacity=1000, rotation_seconds=60)
+        bloom.add("old")
+
+        clock.now += 60
+        assert "old" in bloom
+
+        clock.now += 60
+        assert "old" not in bloom
+        assert bloom.count == 0
+
+    def test_no_rotation_before_period(self, clock):
+        """Test the generation isn't replaced before rotation_seconds pass."""
+        bloom = RotatingBloomFilter(capacity=1000, rotation_seconds=60)
+        bloom.add("key")
+
+        clock.now += 59
+
+        assert "key" in bloom
+        assert bloom._previous is None
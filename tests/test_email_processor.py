@@ -2,16 +2,164 @@
 Unit tests for EmailProcessor class.
 """
 import pytest
-import json
-from unittest.mock import Mock, patch, MagicMock
-from pydantic import ValidationError
+import asyncio
+import httpx
+import orjson
+import threading
+from dataclasses import dataclass, field
+from types import SimpleNamespace
+from typing import Any, Dict, Optional
 
-import sys
-import os
-# Add parent directory to path to import from src
-sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+import litellm
+from src.core import email_processor as email_processor_module
+from src.core.email_processor import EmailProcessor, ActionItem, EmailSummary, EmailAnalysis, init_http_client, close_http_client
 
-from src.core.email_processor import EmailProcessor, ActionItem, EmailSummary
+
+# Substrings _format_email must produce for the test_format_email cases
+_EXPECTED_COMPLETE = (
+    "Subject: Urgent: Project Review Meeting Tomorrow",
+    "From: John Doe <john.doe@example.com>",
+    "To: jane.doe@example.com",
+    "Body:",
+    "project review meeting"
+)
+_EXPECTED_NO_FROM_NAME = ("From: test@example.com",)
+_EXPECTED_MISSING_FIELDS = ("Subject: No Subject", "From: Unknown", "Just a body")
+
+# Lowercased system prompts, computed once at import ("" if a prompt is missing)
+_PROMPTS_LOWER = {
+    name: getattr(EmailProcessor, name, "").lower()
+    for name in ("ACTION_ITEM_PROMPT", "SUMMARY_PROMPT", "CATEGORY_PROMPT")
+}
+
+
+def _resp(content):
+    """Build an LLM response with response.choices[0].message.content set."""
+    return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=content))])
+
+
+def _chunk(content):
+    """Build a streamed LLM chunk with chunk.choices[0].delta.content set."""
+    return SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=content))])
+
+
+def _dumps(data) -> str:
+    """Encode a mock LLM payload as a JSON string."""
+    return orjson.dumps(data).decode()
+
+
+# LLM responses used by the batch and workflow tests, encoded once at import
+_BATCH_ACTION_ITEM_JSON = (
+    _dumps({
+        "is_action_item": True,
+        "action_item": "Do something",
+        "due_date": "Tomorrow",
+        "priority": "high"
+    }),
+    _dumps({
+        "is_action_item": False,
+        "action_item": None,
+        "due_date": None,
+        "priority": None
+    }),
+    _dumps({
+        "is_action_item": True,
+        "action_item": "Submit report",
+        "due_date": "Friday",
+        "priority": "medium"
+    })
+)
+_WORKFLOW_CONTENTS = (
+    _dumps({
+        "is_action_item": True,
+        "action_item": "Prepare and attend meeting",
+        "due_date": "Tomorrow 2 PM",
+        "priority": "high"
+    }),
+    _dumps({
+        "summary": "Meeting request with preparation items",
+        "key_points": ["Meeting tomorrow", "Prepare reports"],
+        "sentiment": "neutral"
+    }),
+    "Work/Business"
+)
+
+
+@dataclass
+class CompletionRecorder:
+    """
+    Stand-in for litellm.completion that records its calls.
+    
+    Raises side_effect if that is an exception, or pops the next item if it is
+    a list (raising it if the item is an exception). Otherwise returns response.
+    """
+    response: Any = None
+    side_effect: Any = None
+    count: int = 0
+    last_kwargs: Optional[Dict[str, Any]] = None
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+    
+    def __call__(self, **kwargs):
+        # Batch tests call completion from several threads
+        with self._lock:
+            self.count += 1
+            self.last_kwargs = kwargs
+            result = self.response
+            if isinstance(self.side_effect, list):
+                result = self.side_effect.pop(0)
+            elif self.side_effect is not None:
+                result = self.side_effect
+        if isinstance(result, BaseException):
+            raise result
+        return result
+    
+    def reset(self):
+        """Forget the configured responses and the recorded calls."""
+        self.response = None
+        self.side_effect = None
+        self.count = 0
+        self.last_kwargs = None
+
+
+@pytest.fixture(scope="module")
+def _completion_stub():
+    """Replace email_processor.completion with a CompletionRecorder once for the module."""
+    recorder = CompletionRecorder()
+    with pytest.MonkeyPatch.context() as monkeypatch:
+        monkeypatch.setattr("src.core.email_processor.completion", recorder)
+        yield recorder
+
+
+@pytest.fixture(scope="session")
+def responder(action_item_json, no_action_json, summary_json, analysis_json):
+    """Prebuilt LLM responses for the session's JSON payloads, keyed by name."""
+    return {
+        "action": _resp(action_item_json),
+        "no_act": _resp(no_action_json),
+        "summary": _resp(summary_json),
+        "analysis": _resp(analysis_json),
+        "cat_work": _resp("Work/Business"),
+    }
+
+
+@pytest.fixture(scope="session")
+def _session_processor():
+    """One EmailProcessor shared by the tests that don't need their own settings."""
+    return EmailProcessor(api_key="test-key")
+
+
+@pytest.fixture
+def processor(_session_processor):
+    """The shared EmailProcessor, with its result cache cleared for each test."""
+    _session_processor._cache.clear()
+    return _session_processor
+
+
+@pytest.fixture(autouse=True)
+def stub_completion(_completion_stub):
+    """The module's completion stub, reset for each test."""
+    _completion_stub.reset()
+    return _completion_stub
 
 
 class TestActionItemModel:
@@ -42,7 +190,8 @@ class TestActionItemModel:
     
     def test_action_item_to_dict(self):
         """Test converting ActionItem to dictionary."""
-        action_item = ActionItem(
+        # Only model_dump is under test here, so skip validation
+        action_item = ActionItem.model_construct(
             is_action_item=True,
             action_item="Test action",
             due_date="2024-01-20",
@@ -104,72 +253,118 @@ class TestEmailProcessorInitialization:
         
         assert processor.api_key == "custom-key"
     
-    def test_initialization_no_api_key_warning(self, monkeypatch, capsys):
+    def test_initialization_no_api_key_warning(self, monkeypatch):
         """Test warning when no API key is provided."""
+        printed = []
+        monkeypatch.setattr("builtins.print", lambda *args, **kwargs: printed.append(" ".join(map(str, args))))
         monkeypatch.delenv("OPENAI_API_KEY", raising=False)
         
         processor = EmailProcessor()
         
-        captured = capsys.readouterr()
-        assert "Warning" in captured.out or processor.api_key is None
+        assert any("Warning" in line for line in printed) or processor.api_key is None
 
 
-class TestEmailProcessorFormatEmail:
-    """Tests for _format_email method."""
+class TestInitHttpClient:
+    """Tests for init_http_client."""
+    
+    @pytest.fixture(autouse=True)
+    def _no_session(self, monkeypatch):
+        """Start without litellm sessions or pooled clients, restoring them afterwards."""
+        monkeypatch.setattr(litellm, "client_session", None)
+        monkeypatch.setattr(litellm, "aclient_session", None)
+        monkeypatch.setattr(email_processor_module, "_HTTP_CLIENT", None)
+        monkeypatch.setattr(email_processor_module, "_ASYNC_HTTP_CLIENT", None)
     
-    def test_format_email_complete(self, sample_email_data):
-        """Test formatting email with all fields."""
-        processor = EmailProcessor(api_key="test-key")
-        formatted = processor._format_email(sample_email_data)
-        
-        assert "Subject: Urgent: Project Review Meeting Tomorrow" in formatted
-        assert "From: John Doe <john.doe@example.com>" in formatted
-        assert "To: jane.doe@example.com" in formatted
-        assert "Body:" in formatted
-        assert "project review meeting" in formatted
-    
-    def test_format_email_no_from_name(self):
-        """Test formatting email without from_name."""
-        processor = EmailProcessor(api_key="test-key")
-        email_data = {
-            "subject": "Test",
-            "from": "test@example.com",
-            "from_name": "",
-            "to": "recipient@example.com",
-            "date": "2024-01-15",
-            "body": "Test body"
-        }
+    def test_constructor_leaves_litellm_alone(self):
+        """Test creating a processor doesn't install a session."""
+        EmailProcessor(api_key="test-key")
         
-        formatted = processor._format_email(email_data)
+        assert litellm.client_session is None
+        assert litellm.aclient_session is None
+    
+    def test_installs_one_pooled_client(self):
+        """Test the pooled clients are installed once and reused."""
+        client = init_http_client()
+        async_client = litellm.aclient_session
+        
+        assert litellm.client_session is client
+        assert isinstance(async_client, httpx.AsyncClient)
+        assert init_http_client() is client
+        assert litellm.aclient_session is async_client
+    
+    def test_close_uninstalls_clients(self):
+        """Test close_http_client closes both clients and removes them from litellm."""
+        client = init_http_client()
+        async_client = litellm.aclient_session
+        
+        asyncio.run(close_http_client())
         
-        assert "From: test@example.com" in formatted
-        assert "From:  <test@example.com>" not in formatted
+        assert client.is_closed and async_client.is_closed
+        assert litellm.client_session is None
+        assert litellm.aclient_session is None
     
-    def test_format_email_missing_fields(self):
-        """Test formatting email with missing optional fields."""
-        processor = EmailProcessor(api_key="test-key")
-        email_data = {"body": "Just a body"}
+    def test_keeps_existing_session(self, monkeypatch):
+        """Test a session configured by the application is not replaced."""
+        session = object()
+        monkeypatch.setattr(litellm, "client_session", session)
+        
+        assert init_http_client() is session
+        assert email_processor_module._HTTP_CLIENT is None
+        
+        asyncio.run(close_http_client())
+        assert litellm.client_session is session
+
+
+class TestEmailProcessorFormatEmail:
+    """Tests for _format_email method."""
+    
+    @pytest.mark.parametrize("email_data,expected,unexpected", [
+        pytest.param(
+            "sample_email_data",
+            _EXPECTED_COMPLETE,
+            (),
+            id="complete"
+        ),
+        pytest.param(
+            {
+                "subject": "Test",
+                "from": "test@example.com",
+                "from_name": "",
+                "to": "recipient@example.com",
+                "date": "2024-01-15",
+                "body": "Test body"
+            },
+            _EXPECTED_NO_FROM_NAME,
+            ("From:  <test@example.com>",),
+            id="no_from_name"
+        ),
+        pytest.param(
+            {"body": "Just a body"},
+            _EXPECTED_MISSING_FIELDS,
+            (),
+            id="missing_fields"
+        ),
+    ])
+    def test_format_email(self, processor, request, email_data, expected, unexpected):
+        """Test formatting emails with all, some and missing optional fields."""
+        if isinstance(email_data, str):
+            email_data = request.getfixturevalue(email_data)
         
         formatted = processor._format_email(email_data)
         
-        assert "Subject: No Subject" in formatted
-        assert "From: Unknown" in formatted
-        assert "Just a body" in formatted
+        missing = [substring for substring in expected if substring not in formatted]
+        unwanted = [substring for substring in unexpected if substring in formatted]
+        assert not missing and not unwanted, (missing, unwanted)
 
 
 class TestEmailProcessorExtractActionItem:
     """Tests for extract_action_item method."""
     
-    @patch('src.core.email_processor.completion')
-    def test_extract_action_item_success(self, mock_completion, sample_email_data, mock_llm_response_action_item):
+    def test_extract_action_item_success(self, processor, stub_completion, sample_email_data, responder):
         """Test successful action item extraction."""
         # Setup mock
-        mock_response = Mock()
-        mock_response.choices = [Mock()]
-        mock_response.choices[0].message.content = json.dumps(mock_llm_response_action_item)
-        mock_completion.return_value = mock_response
+        stub_completion.response = responder["action"]
         
-        processor = EmailProcessor(api_key="test-key")
         result = processor.extract_action_item(sample_email_data)
         
         assert isinstance(result, ActionItem)
@@ -178,161 +373,216 @@ class TestEmailProcessorExtractActionItem:
         assert result.priority == "high"
         
         # Verify completion was called with correct parameters
-        mock_completion.assert_called_once()
-        call_kwargs = mock_completion.call_args[1]
+        assert stub_completion.count == 1
+        call_kwargs = stub_completion.last_kwargs
         assert call_kwargs["model"] == "openai/gpt-4o-mini"
         assert call_kwargs["response_format"] == ActionItem
     
-    @patch('src.core.email_processor.completion')
-    def test_extract_action_item_no_action(self, mock_completion, non_action_email_data, mock_llm_response_no_action):
+    def test_extract_action_item_no_action(self, processor, stub_completion, non_action_email_data, responder):
         """Test extraction when email has no action item."""
-        mock_response = Mock()
-        mock_response.choices = [Mock()]
-        mock_response.choices[0].message.content = json.dumps(mock_llm_response_no_action)
-        mock_completion.return_value = mock_response
+        stub_completion.response = responder["no_act"]
         
-        processor = EmailProcessor(api_key="test-key")
         result = processor.extract_action_item(non_action_email_data)
         
         assert isinstance(result, ActionItem)
         assert result.is_action_item is False
         assert result.action_item is None
     
-    @patch('src.core.email_processor.completion')
-    def test_extract_action_item_error_handling(self, mock_completion, sample_email_data):
-        """Test error handling when LLM call fails."""
-        mock_completion.side_effect = Exception("API Error")
+    def test_extract_action_item_skips_non_action_senders(self, processor, stub_completion, sample_email_data):
+        """Test that obvious non-action emails are filtered out without an LLM call."""
+        noreply_email = {**sample_email_data, "from": "no-reply@example.com"}
+        receipt_email = {**sample_email_data, "subject": "Your receipt from Example Store"}
+        
+        assert processor.extract_action_item(noreply_email).is_action_item is False
+        assert processor.extract_action_item(receipt_email).is_action_item is False
+        assert stub_completion.count == 0
+    
+    @pytest.mark.parametrize("field,value", [
+        ("from", "noreply@example.com"),
+        ("from", "no_reply@example.com"),
+        ("from", "newsletters@example.com"),
+        ("from", "promotions@example.com"),
+        ("subject", "Weekly newsletter"),
+        ("subject", "Promo code inside"),
+        ("subject", "Promotional offer: 20% off"),
+        ("subject", "Your receipts for March"),
+        ("subject", "Your OTPs for login"),
+        ("subject", "UPI payment successful"),
+        ("subject", "Click to UNSUBSCRIBE"),
+    ])
+    def test_extract_action_item_prefilter_skips(self, processor, stub_completion, sample_email_data, field, value):
+        """Test that skip patterns match their inflections, case-insensitively."""
+        email_data = {**sample_email_data, field: value}
+        
+        assert processor.extract_action_item(email_data).is_action_item is False
+        assert stub_completion.count == 0
+    
+    @pytest.mark.parametrize("subject", ["Promote the release notes", "Receipting process review", "Compromise on the budget"])
+    def test_extract_action_item_prefilter_whole_words(self, processor, stub_completion, sample_email_data, responder, subject):
+        """Test that skip patterns don't match inside other words."""
+        stub_completion.response = responder["action"]
         
-        processor = EmailProcessor(api_key="test-key")
-        result = processor.extract_action_item(sample_email_data)
+        assert processor.extract_action_item({**sample_email_data, "subject": subject}).is_action_item is True
+        assert stub_completion.count == 1
+    
+    def test_extract_action_item_cached(self, processor, stub_completion, sample_email_data, responder):
+        """Test that a repeated email is answered from the cache."""
+        stub_completion.response = responder["action"]
         
-        # Should return empty action item on error
-        assert isinstance(result, ActionItem)
-        assert result.is_action_item is False
+        first = processor.extract_action_item(sample_email_data)
+        second = processor.extract_action_item(dict(sample_email_data))
+        
+        assert first == second
+        assert stub_completion.count == 1
     
-    @patch('src.core.email_processor.completion')
-    def test_extract_action_item_dict_response(self, mock_completion, sample_email_data, mock_llm_response_action_item):
+    def test_extract_action_item_dict_response(self, processor, stub_completion, sample_email_data,
+                                               mock_llm_response_action_item):
         """Test handling dict response (not JSON string)."""
-        mock_response = Mock()
-        mock_response.choices = [Mock()]
-        mock_response.choices[0].message.content = mock_llm_response_action_item  # Dict instead of JSON string
-        mock_completion.return_value = mock_response
+        stub_completion.response = _resp(mock_llm_response_action_item)  # Dict instead of JSON string
         
-        processor = EmailProcessor(api_key="test-key")
         result = processor.extract_action_item(sample_email_data)
         
         assert isinstance(result, ActionItem)
         assert result.is_action_item is True
 
+    
+    def test_extract_action_item_streamed(self, stub_completion, sample_email_data, action_item_json):
+        """Test streamed extraction when the email has an action item."""
+        content = action_item_json
+        chunks = [_chunk(part) for part in (content[:10], content[10:30], content[30:])]
+        stub_completion.response = iter(chunks)
+        
+        processor = EmailProcessor(api_key="test-key", stream=True)
+        result = processor.extract_action_item(sample_email_data)
+        
+        assert result.is_action_item is True
+        assert result.priority == "high"
+        assert stub_completion.last_kwargs["stream"] is True
+    
+    def test_extract_action_item_stream_cancelled_early(self, stub_completion, non_action_email_data):
+        """Test that streaming stops once the response reports no action item."""
+        parts = ['{"is_action_item": ', 'false', ', "action_item": null', ', "due_date": null}']
+        chunks = [_chunk(part) for part in parts]
+        stream = iter(chunks)
+        stub_completion.response = stream
+        
+        processor = EmailProcessor(api_key="test-key", stream=True)
+        result = processor.extract_action_item(non_action_email_data)
+        
+        assert result.is_action_item is False
+        # The remaining chunks were never read
+        assert next(stream) is chunks[2]
+
 
 class TestEmailProcessorSummarizeEmail:
     """Tests for summarize_email method."""
     
-    @patch('src.core.email_processor.completion')
-    def test_summarize_email_success(self, mock_completion, sample_email_data, mock_llm_response_summary):
+    def test_summarize_email_success(self, processor, stub_completion, sample_email_data, responder):
         """Test successful email summarization."""
-        mock_response = Mock()
-        mock_response.choices = [Mock()]
-        mock_response.choices[0].message.content = json.dumps(mock_llm_response_summary)
-        mock_completion.return_value = mock_response
+        stub_completion.response = responder["summary"]
         
-        processor = EmailProcessor(api_key="test-key")
         result = processor.summarize_email(sample_email_data)
         
         assert isinstance(result, EmailSummary)
         assert len(result.summary) > 0
         assert len(result.key_points) > 0
         assert result.sentiment in ["positive", "neutral", "negative"]
-    
-    @patch('src.core.email_processor.completion')
-    def test_summarize_email_error_handling(self, mock_completion, sample_email_data):
-        """Test error handling when summarization fails."""
-        mock_completion.side_effect = Exception("API Error")
-        
-        processor = EmailProcessor(api_key="test-key")
-        result = processor.summarize_email(sample_email_data)
-        
-        # Should return error summary
-        assert isinstance(result, EmailSummary)
-        assert "Error processing email" in result.summary
-        assert result.sentiment == "neutral"
 
 
 class TestEmailProcessorCategorizeEmail:
     """Tests for categorize_email method."""
     
-    @patch('src.core.email_processor.completion')
-    def test_categorize_email_success(self, mock_completion, sample_email_data):
+    def test_categorize_email_success(self, processor, stub_completion, sample_email_data, responder):
         """Test successful email categorization."""
-        mock_response = Mock()
-        mock_response.choices = [Mock()]
-        mock_response.choices[0].message.content = "Work/Business"
-        mock_completion.return_value = mock_response
+        stub_completion.response = responder["cat_work"]
         
-        processor = EmailProcessor(api_key="test-key")
         result = processor.categorize_email(sample_email_data)
         
         assert isinstance(result, str)
         assert result == "Work/Business"
     
-    @patch('src.core.email_processor.completion')
-    def test_categorize_email_with_whitespace(self, mock_completion, sample_email_data):
+    def test_categorize_email_with_whitespace(self, processor, stub_completion, sample_email_data):
         """Test categorization with whitespace in response."""
-        mock_response = Mock()
-        mock_response.choices = [Mock()]
-        mock_response.choices[0].message.content = "  Personal  \n"
-        mock_completion.return_value = mock_response
+        stub_completion.response = _resp("  Personal  \n")
         
-        processor = EmailProcessor(api_key="test-key")
         result = processor.categorize_email(sample_email_data)
         
         assert result == "Personal"
     
-    @patch('src.core.email_processor.completion')
-    def test_categorize_email_error_handling(self, mock_completion, sample_email_data):
-        """Test error handling when categorization fails."""
-        mock_completion.side_effect = Exception("API Error")
+    def test_categorize_email_cached(self, processor, stub_completion, sample_email_data, responder):
+        """Test that a repeated email is categorized from the cache."""
+        stub_completion.response = responder["cat_work"]
         
-        processor = EmailProcessor(api_key="test-key")
-        result = processor.categorize_email(sample_email_data)
+        processor.categorize_email(sample_email_data)
         
-        assert result == "Other"
+        assert processor.categorize_email(dict(sample_email_data)) == "Work/Business"
+        assert stub_completion.count == 1
+
+
+class TestEmailProcessorErrorHandling:
+    """Tests for the fallbacks returned when the LLM call fails."""
+    
+    @pytest.mark.parametrize("method,expected_check", [
+        ("extract_action_item", lambda r: isinstance(r, ActionItem) and r.is_action_item is False),
+        ("summarize_email",
+         lambda r: isinstance(r, EmailSummary) and "Error processing email" in r.summary and r.sentiment == "neutral"),
+        ("categorize_email", lambda r: r == "Other"),
+    ])
+    def test_error_handling(self, processor, stub_completion, sample_email_data, method, expected_check):
+        """Test that each operation returns its fallback result when the LLM call fails."""
+        stub_completion.side_effect = Exception("API Error")
+        
+        result = getattr(processor, method)(sample_email_data)
+        
+        assert expected_check(result)
+
+
+class TestEmailProcessorAnalyzeEmail:
+    """Tests for analyze_email method."""
+    
+    def test_analyze_email_success(self, processor, stub_completion, sample_email_data, responder):
+        """Test action item, summary and category from a single LLM call."""
+        stub_completion.response = responder["analysis"]
+        
+        result = processor.analyze_email(sample_email_data)
+        
+        assert isinstance(result, EmailAnalysis)
+        assert result.action_item.priority == "high"
+        assert len(result.summary.key_points) == 5
+        assert result.category == "Work/Business"
+        assert stub_completion.count == 1
+        assert stub_completion.last_kwargs["response_format"] == EmailAnalysis
+    
+    def test_analyze_email_seeds_cache(self, processor, stub_completion, sample_email_data, responder):
+        """Test the single operations reuse the parts of an earlier analysis."""
+        stub_completion.response = responder["analysis"]
+        
+        analysis = processor.analyze_email(sample_email_data)
+        
+        assert processor.extract_action_item(sample_email_data) == analysis.action_item
+        assert processor.summarize_email(sample_email_data) == analysis.summary
+        assert processor.categorize_email(sample_email_data) == analysis.category
+        assert stub_completion.count == 1
+    
+    def test_analyze_email_error_handling(self, processor, stub_completion, sample_email_data):
+        """Test error handling when the fused call fails."""
+        stub_completion.side_effect = Exception("API Error")
+        
+        result = processor.analyze_email(sample_email_data)
+        
+        assert result.action_item.is_action_item is False
+        assert "Error processing email" in result.summary.summary
+        assert result.category == "Other"
 
 
 class TestEmailProcessorBatchOperations:
     """Tests for batch processing methods."""
     
-    @patch('src.core.email_processor.completion')
-    def test_process_email_batch_all_operations(self, mock_completion, batch_email_data, 
-                                                mock_llm_response_action_item,
-                                                mock_llm_response_summary):
-        """Test batch processing with all operations enabled."""
-        # Setup mock to return different responses
-        mock_responses = []
-        
-        # For each email, we need: action_item, summary, category
-        for _ in batch_email_data:
-            # Action item response
-            resp1 = Mock()
-            resp1.choices = [Mock()]
-            resp1.choices[0].message.content = json.dumps(mock_llm_response_action_item)
-            mock_responses.append(resp1)
-            
-            # Summary response
-            resp2 = Mock()
-            resp2.choices = [Mock()]
-            resp2.choices[0].message.content = json.dumps(mock_llm_response_summary)
-            mock_responses.append(resp2)
-            
-            # Category response
-            resp3 = Mock()
-            resp3.choices = [Mock()]
-            resp3.choices[0].message.content = "Work/Business"
-            mock_responses.append(resp3)
-        
-        mock_completion.side_effect = mock_responses
-        
-        processor = EmailProcessor(api_key="test-key")
+    def test_process_email_batch_all_operations(self, processor, stub_completion, batch_email_data, responder):
+        """Test batch processing with all operations enabled (one fused call per email)."""
+        # One response per email, handed out in order by the stub
+        stub_completion.side_effect = [responder["analysis"]] * len(batch_email_data)
+        
         results = processor.process_email_batch(
             batch_email_data,
             extract_actions=True,
@@ -341,21 +591,53 @@ class TestEmailProcessorBatchOperations:
         )
         
         assert len(results) == 3
+        assert stub_completion.count == 3
         for result in results:
-            assert "action_item" in result
-            assert "summary" in result
-            assert "category" in result
+            assert result["action_item"]["is_action_item"] is True
+            assert result["summary"]["sentiment"] == "neutral"
+            assert result["category"] == "Work/Business"
     
-    @patch('src.core.email_processor.completion')
-    def test_process_email_batch_actions_only(self, mock_completion, batch_email_data, 
-                                               mock_llm_response_action_item):
+    def test_process_email_batch_fused_prefilter(self, processor, stub_completion, sample_email_data, responder):
+        """Test pre-filtered emails skip the action item part of the fused call."""
+        noreply_email = {**sample_email_data, "from": "no-reply@example.com"}
+        stub_completion.response = responder["summary"]
+        
+        [result] = processor.process_email_batch([noreply_email], extract_actions=True, summarize=True)
+        
+        # Only the summary is left, so it is requested on its own
+        assert stub_completion.count == 1
+        assert stub_completion.last_kwargs["response_format"] == EmailSummary
+        assert result["action_item"]["is_action_item"] is False
+        assert result["summary"]["sentiment"] == "neutral"
+        
+        stub_completion.reset()
+        stub_completion.response = responder["analysis"]
+        
+        [result] = processor.process_email_batch([noreply_email], extract_actions=True, summarize=True, categorize=True)
+        
+        assert stub_completion.count == 1
+        assert result["action_item"]["is_action_item"] is False
+        assert result["category"] == "Work/Business"
+    
+    def test_process_email_batch_fused_cached(self, processor, stub_completion, sample_email_data, responder):
+        """Test a repeated email is answered from the cache on the fused path."""
+        stub_completion.response = responder["analysis"]
+        
+        first = processor.process_email_batch([sample_email_data], extract_actions=True, summarize=True, categorize=True)
+        second = processor.process_email_batch([dict(sample_email_data)], extract_actions=True, summarize=True, categorize=True)
+        
+        assert first == second
+        assert stub_completion.count == 1
+        
+        # The fused result also answers the single operations
+        assert processor.extract_action_item(sample_email_data).priority == "high"
+        assert len(processor.summarize_email(sample_email_data).key_points) == 5
+        assert stub_completion.count == 1
+    
+    def test_process_email_batch_actions_only(self, processor, stub_completion, batch_email_data, responder):
         """Test batch processing with only action extraction."""
-        mock_response = Mock()
-        mock_response.choices = [Mock()]
-        mock_response.choices[0].message.content = json.dumps(mock_llm_response_action_item)
-        mock_completion.return_value = mock_response
+        stub_completion.response = responder["action"]
         
-        processor = EmailProcessor(api_key="test-key")
         results = processor.process_email_batch(
             batch_email_data,
             extract_actions=True,
@@ -369,19 +651,13 @@ class TestEmailProcessorBatchOperations:
             assert "summary" not in result
             assert "category" not in result
     
-    @patch('src.core.email_processor.completion')
-    def test_process_email_batch_with_errors(self, mock_completion, batch_email_data,
-                                             mock_llm_response_action_item):
+    def test_process_email_batch_with_errors(self, processor, stub_completion, batch_email_data, responder):
         """Test batch processing continues after individual errors."""
-        # First call succeeds, second fails, third succeeds
-        responses = [
-            Mock(choices=[Mock(message=Mock(content=json.dumps(mock_llm_response_action_item)))]),
-            Exception("API Error"),
-            Mock(choices=[Mock(message=Mock(content=json.dumps(mock_llm_response_action_item)))])
-        ]
-        mock_completion.side_effect = responses
-        
-        processor = EmailProcessor(api_key="test-key")
+        # First call succeeds, second fails, third succeeds (EmailProcessor only
+        # reads the response, so the same instance is served twice)
+        ok = responder["action"]
+        stub_completion.side_effect = [ok, Exception("API Error"), ok]
+        
         results = processor.process_email_batch(
             batch_email_data,
             extract_actions=True
@@ -390,33 +666,11 @@ class TestEmailProcessorBatchOperations:
         # All emails should be in results, even if some failed
         assert len(results) == 3
     
-    @patch('src.core.email_processor.completion')
-    def test_extract_action_items_from_batch(self, mock_completion, batch_email_data):
+    def test_extract_action_items_from_batch(self, processor, stub_completion, batch_email_data):
         """Test extracting only emails with action items."""
         # Setup: first email has action, second doesn't, third has action
-        responses = [
-            Mock(choices=[Mock(message=Mock(content=json.dumps({
-                "is_action_item": True,
-                "action_item": "Do something",
-                "due_date": "Tomorrow",
-                "priority": "high"
-            })))]),
-            Mock(choices=[Mock(message=Mock(content=json.dumps({
-                "is_action_item": False,
-                "action_item": None,
-                "due_date": None,
-                "priority": None
-            })))]),
-            Mock(choices=[Mock(message=Mock(content=json.dumps({
-                "is_action_item": True,
-                "action_item": "Submit report",
-                "due_date": "Friday",
-                "priority": "medium"
-            })))])
-        ]
-        mock_completion.side_effect = responses
-        
-        processor = EmailProcessor(api_key="test-key")
+        stub_completion.side_effect = [_resp(content) for content in _BATCH_ACTION_ITEM_JSON]
+        
         action_emails = processor.extract_action_items_from_batch(batch_email_data)
         
         # Should only return emails with action items
@@ -429,52 +683,24 @@ class TestEmailProcessorBatchOperations:
 class TestEmailProcessorSystemPrompts:
     """Tests for system prompts."""
     
-    def test_action_item_prompt_exists(self):
-        """Test that ACTION_ITEM_PROMPT is defined."""
-        assert hasattr(EmailProcessor, 'ACTION_ITEM_PROMPT')
-        assert len(EmailProcessor.ACTION_ITEM_PROMPT) > 0
-        assert "action item" in EmailProcessor.ACTION_ITEM_PROMPT.lower()
-    
-    def test_summary_prompt_exists(self):
-        """Test that SUMMARY_PROMPT is defined."""
-        assert hasattr(EmailProcessor, 'SUMMARY_PROMPT')
-        assert len(EmailProcessor.SUMMARY_PROMPT) > 0
-        assert "summary" in EmailProcessor.SUMMARY_PROMPT.lower()
-    
-    def test_category_prompt_exists(self):
-        """Test that CATEGORY_PROMPT is defined."""
-        assert hasattr(EmailProcessor, 'CATEGORY_PROMPT')
-        assert len(EmailProcessor.CATEGORY_PROMPT) > 0
-        assert "categorize" in EmailProcessor.CATEGORY_PROMPT.lower()
+    @pytest.mark.parametrize("attr,keyword", [
+        ("ACTION_ITEM_PROMPT", "action item"),
+        ("SUMMARY_PROMPT", "summary"),
+        ("CATEGORY_PROMPT", "categorize"),
+    ])
+    def test_prompt_exists(self, attr, keyword):
+        """Test that each system prompt is defined and mentions its task."""
+        assert _PROMPTS_LOWER[attr]
+        assert keyword in _PROMPTS_LOWER[attr]
 
 
 class TestEmailProcessorIntegration:
     """Integration tests with actual email data."""
     
-    @patch('src.core.email_processor.completion')
-    def test_full_email_processing_workflow(self, mock_completion, sample_email_data):
+    def test_full_email_processing_workflow(self, processor, stub_completion, sample_email_data):
         """Test complete workflow from email to processed results."""
-        # Setup mock for multiple calls
-        mock_responses = [
-            # Action item extraction
-            Mock(choices=[Mock(message=Mock(content=json.dumps({
-                "is_action_item": True,
-                "action_item": "Prepare and attend meeting",
-                "due_date": "Tomorrow 2 PM",
-                "priority": "high"
-            })))]),
-            # Email summary
-            Mock(choices=[Mock(message=Mock(content=json.dumps({
-                "summary": "Meeting request with preparation items",
-                "key_points": ["Meeting tomorrow", "Prepare reports"],
-                "sentiment": "neutral"
-            })))]),
-            # Categorization
-            Mock(choices=[Mock(message=Mock(content="Work/Business"))])
-        ]
-        mock_completion.side_effect = mock_responses
-        
-        processor = EmailProcessor(api_key="test-key")
+        # Setup mock for multiple calls: action item, summary, categorization
+        stub_completion.side_effect = [_resp(content) for content in _WORKFLOW_CONTENTS]
         
         # Test individual operations
         action_item = processor.extract_action_item(sample_email_data)
@@ -0,0 +1,85 @@
+"""
+Unit tests for GmailFetchLoader.
+"""
+import asyncio
+
+from app.services.gmail_fetch_loader import GmailFetchLoader
+
+
+class _Fetch:
+    """Fake fetch recording its calls; raises error if set."""
+
+    def __init__(self, error=None):
+        self.error = error
+        self.calls = []
+
+    async def __call__(self, n, unread_only):
+        self.calls.append((n, unread_only))
+        await asyncio.sleep(0)
+        if self.error is not None:
+            raise self.error
+        return [{"id": str(i)} for i in range(n)]
+
+
+class TestGmailFetchLoader:
+    """Tests for coalescing concurrent Gmail fetches."""
+
+    def test_same_key_shares_fetch(self):
+        """Test that concurrent callers with the same arguments share one fetch."""
+        fetch = _Fetch()
+        loader = GmailFetchLoader(fetch, coalesce_seconds=0.001)
+
+        async def run():
+            return await asyncio.gather(*[loader.load(n=2, unread_only=True) for _ in range(3)])
+
+        results = asyncio.run(run())
+
+        assert fetch.calls == [(2, True)]
+        assert results == [[{"id": "0"}, {"id": "1"}]] * 3
+        # Each caller gets its own list
+        assert results[0] is not results[1]
+
+    def test_different_keys_fetch_separately(self):
+        """Test that callers with different arguments don't share a fetch."""
+        fetch = _Fetch()
+        loader = GmailFetchLoader(fetch, coalesce_seconds=0.001)
+
+        async def run():
+            return await asyncio.gather(
+                loader.load(n=2, unread_only=True),
+                loader.load(n=3, unread_only=True),
+                loader.load(n=2, unread_only=False)
+            )
+
+        results = asyncio.run(run())
+
+        assert sorted(fetch.calls) == [(2, False), (2, True), (3, True)]
+        assert [len(result) for result in results] == [2, 3, 2]
+
+    def test_sequential_loads_fetch_again(self):
+        """Test that a finished fetch isn't reused by later callers."""
+        fetch = _Fetch()
+        loader = GmailFetchLoader(fetch, coalesce_seconds=0.001)
+
+        async def run():
+            await loader.load(n=1)
+            await loader.load(n=1)
+
+        asyncio.run(run())
+
+        assert fetch.calls == [(1, True), (1, True)]
+
+    def test_error_reaches_every_waiter(self):
+        """Test that a failed fetch raises in every caller sharing it."""
+        fetch = _Fetch(error=ConnectionError("IMAP down"))
+        loader = GmailFetchLoader(fetch, coalesce_seconds=0.001)
+
+        async def run():
+            return await asyncio.gather(*[loader.load(n=2) for _ in range(3)], return_exceptions=True)
+
+        results = asyncio.run(run())
+
+        assert fetch.calls == [(2, True)]
+        assert len(results) == 3
+        assert all(isinstance(result, ConnectionError) for result in results)
+        assert loader._in_flight == {}
@@ -2,26 +2,97 @@
 Unit tests for GmailHelper class.
 """
 import pytest
+import asyncio
+import copy
 import imaplib
-from unittest.mock import Mock, patch, MagicMock, call
+import io
+import socket
+from unittest.mock import Mock, patch, MagicMock, AsyncMock, call
 from email.message import Message
+from email.mime.multipart import MIMEMultipart
+from email.mime.text import MIMEText
 
-import sys
-import os
-sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from src.core import gmail_helper as gmail_helper_module
+from src.core.gmail_helper import GmailHelper, FETCH_MAX_BYTES, SNIPPET_FETCH_BYTES, MAX_STORE_IDS, SOCKET_RCVBUF_BYTES
 
-from src.core.gmail_helper import GmailHelper
+
+# Attributes of a logged-in IMAP4_SSL connection: the class API plus the
+# instance attributes GmailHelper reads directly
+_IMAP_SPEC = sorted(set(dir(imaplib.IMAP4_SSL)) | {"sock", "untagged_responses", "tagged_commands"})
+
+
+# FETCH response shared by the read tests that don't inspect the parsed email
+_SAMPLE_EMAIL = b"""From: sender@example.com
+To: recipient@example.com
+Subject: Test Email
+Date: Mon, 1 Jan 2024 12:00:00 +0000
+
+This is a test email body."""
+_SAMPLE_FETCH_RETURN = ("OK", [(b"1 (UID 1 RFC822 {123}", _SAMPLE_EMAIL)])
+
+
+def _mock_connection():
+    """Plain Mock standing in for an IMAP4_SSL connection (typos raise AttributeError)."""
+    return Mock(spec_set=_IMAP_SPEC)
+
+
+def _uid(search=b"", fetch=("OK", [])):
+    """
+    side_effect for connection.uid: SEARCH returns the search UIDs, FETCH returns
+    fetch (a response, or a function of the UID set and items), STORE succeeds.
+    """
+    def uid(command, *args):
+        if command == "SEARCH":
+            return ("OK", [search])
+        if command == "FETCH":
+            return fetch(*args) if callable(fetch) else fetch
+        return ("OK", [])
+    return uid
+
+
+def _uid_calls(m, command):
+    """Arguments of the connection.uid(command, ...) calls made on m."""
+    return [c.args[1:] for c in m.uid.call_args_list if c.args[0] == command]
+
+
+def _called_with(m, *args, **kwargs):
+    """Assert a mock was called exactly once, with these arguments (cheaper than assert_called_once_with)."""
+    assert m.call_args == call(*args, **kwargs)
+    assert m.call_count == 1
+
+
+@pytest.fixture(scope="module")
+def creds():
+    """Test credentials passed to GmailHelper."""
+    return {"email_address": "test@gmail.com", "app_password": "test-password"}
+
+
+@pytest.fixture(scope="module")
+def helper_proto(creds):
+    """GmailHelper with test credentials, constructed once for the module."""
+    return GmailHelper(**creds)
+
+
+@pytest.fixture
+def mock_imap(monkeypatch):
+    """Replace GmailHelper's IMAP4_SSL class with a mock; configure its return_value/side_effect per test."""
+    mock_imap = MagicMock()
+    monkeypatch.setattr(gmail_helper_module, "_IMAP4_SSL", mock_imap)
+    return mock_imap
+
+
+@pytest.fixture
+def helper(helper_proto):
+    """A fresh (not connected) copy of the module's GmailHelper for each test."""
+    return copy.copy(helper_proto)
 
 
 class TestGmailHelperInitialization:
     """Tests for GmailHelper initialization."""
     
-    def test_initialization_with_credentials(self):
+    def test_initialization_with_credentials(self, creds):
         """Test initialization with provided credentials."""
-        helper = GmailHelper(
-            email_address="test@gmail.com",
-            app_password="test-password"
-        )
+        helper = GmailHelper(**creds)
         
         assert helper.email_address == "test@gmail.com"
         assert helper.app_password == "test-password"
@@ -29,92 +100,181 @@ class TestGmailHelperInitialization:
         assert helper.imap_port == 993
         assert helper.connection is None
     
-    def test_initialization_from_env(self, monkeypatch):
-        """Test initialization from environment variables."""
-        monkeypatch.setenv("GMAIL_USER", "env@gmail.com")
-        monkeypatch.setenv("GMAIL_APP_PASSWORD", "env-password")
-        
-        helper = GmailHelper()
-        
-        assert helper.email_address == "env@gmail.com"
-        assert helper.app_password == "env-password"
-    
-    def test_initialization_missing_credentials(self, monkeypatch):
-        """Test that initialization raises error without credentials."""
+    @pytest.mark.parametrize("env,expect", [
+        pytest.param({"GMAIL_USER": "env@gmail.com", "GMAIL_APP_PASSWORD": "env-password"}, "ok", id="from_env"),
+        pytest.param({}, ValueError, id="missing_credentials"),
+        pytest.param({"GMAIL_USER": "test@gmail.com"}, ValueError, id="partial_credentials"),
+    ])
+    def test_initialization_env(self, monkeypatch, env, expect):
+        """Test credentials read from the environment, and the error when they are incomplete."""
         monkeypatch.delenv("GMAIL_USER", raising=False)
         monkeypatch.delenv("GMAIL_APP_PASSWORD", raising=False)
-        
-        with pytest.raises(ValueError) as exc_info:
-            GmailHelper()
-        
-        assert "must be provided" in str(exc_info.value)
-    
-    def test_initialization_partial_credentials(self, monkeypatch):
-        """Test that initialization raises error with partial credentials."""
-        monkeypatch.setenv("GMAIL_USER", "test@gmail.com")
-        monkeypatch.delenv("GMAIL_APP_PASSWORD", raising=False)
-        
-        with pytest.raises(ValueError):
-            GmailHelper()
+        for name, value in env.items():
+            monkeypatch.setenv(name, value)
+        
+        if expect == "ok":
+            helper = GmailHelper()
+            assert helper.email_address == env["GMAIL_USER"]
+            assert helper.app_password == env["GMAIL_APP_PASSWORD"]
+        else:
+            with pytest.raises(expect, match="must be provided"):
+                GmailHelper()
 
 
 class TestGmailHelperConnection:
     """Tests for Gmail connection methods."""
     
-    @patch('imaplib.IMAP4_SSL')
-    def test_connect_success(self, mock_imap):
+    def test_connect_success(self, mock_imap, helper):
         """Test successful connection to Gmail."""
-        mock_connection = MagicMock()
+        mock_connection = _mock_connection()
         mock_imap.return_value = mock_connection
         
-        helper = GmailHelper(
-            email_address="test@gmail.com",
-            app_password="test-password"
-        )
         helper.connect()
         
-        mock_imap.assert_called_once_with("imap.gmail.com", 993)
-        mock_connection.login.assert_called_once_with("test@gmail.com", "test-password")
+        _called_with(mock_imap, "imap.gmail.com", 993)
+        _called_with(mock_connection.login, "test@gmail.com", "test-password")
         assert helper.connection is not None
     
-    @patch('imaplib.IMAP4_SSL')
-    def test_connect_failure(self, mock_imap):
+    def test_connection_rcvbuf_set_before_connect(self, monkeypatch):
+        """Test the receive buffer is set on the socket before the TCP handshake."""
+        calls = []
+        sock = Mock(spec_set=socket.socket)
+        sock.setsockopt.side_effect = lambda *args: calls.append(("setsockopt",) + args)
+        sock.connect.side_effect = lambda address: calls.append(("connect", address))
+        monkeypatch.setattr(gmail_helper_module.socket, "getaddrinfo",
+            lambda host, port, family, type_: [(socket.AF_INET, socket.SOCK_STREAM, 0, "", ("127.0.0.1", port))])
+        monkeypatch.setattr(gmail_helper_module.socket, "socket", lambda family, type_, proto: sock)
+        connection = object.__new__(gmail_helper_module._IMAP4_SSL)
+        connection.host, connection.port = "imap.gmail.com", 993
+        connection.ssl_context = Mock()
+        
+        assert connection._create_socket(30) is connection.ssl_context.wrap_socket.return_value
+        
+        assert calls == [
+            ("setsockopt", socket.SOL_SOCKET, socket.SO_RCVBUF, SOCKET_RCVBUF_BYTES),
+            ("connect", ("127.0.0.1", 993))
+        ]
+        _called_with(connection.ssl_context.wrap_socket, sock, server_hostname="imap.gmail.com")
+    
+    def test_connection_line_limit(self):
+        """Test the raised response line limit applies to GmailHelper's connections, not imaplib globally."""
+        connection = object.__new__(gmail_helper_module._IMAP4_SSL)
+        connection.file = io.BytesIO(b"x" * (2 * 1024 * 1024) + b"\r\n")
+        
+        assert len(connection.readline()) == 2 * 1024 * 1024 + 2
+        assert imaplib._MAXLINE < gmail_helper_module.IMAP_MAX_LINE
+        
+        connection.file = io.BytesIO(b"x" * (gmail_helper_module.IMAP_MAX_LINE + 1))
+        with pytest.raises(imaplib.IMAP4.error):
+            connection.readline()
+    
+    def test_connect_failure(self, mock_imap, creds):
         """Test connection failure handling."""
         mock_imap.side_effect = imaplib.IMAP4.error("Authentication failed")
         
-        helper = GmailHelper(
-            email_address="test@gmail.com",
-            app_password="wrong-password"
-        )
+        helper = GmailHelper(**{**creds, "app_password": "wrong-password"})
         
         with pytest.raises(ConnectionError) as exc_info:
             helper.connect()
         
         assert "Failed to connect" in str(exc_info.value)
     
-    @patch('imaplib.IMAP4_SSL')
-    def test_disconnect(self, mock_imap):
+    def test_disconnect(self, mock_imap, helper):
         """Test disconnection from Gmail."""
-        mock_connection = MagicMock()
+        mock_connection = _mock_connection()
         mock_imap.return_value = mock_connection
         
-        helper = GmailHelper(
-            email_address="test@gmail.com",
-            app_password="test-password"
-        )
         helper.connect()
         helper.disconnect()
         
         mock_connection.close.assert_called_once()
         mock_connection.logout.assert_called_once()
+        assert helper.connection is None
     
-    def test_disconnect_no_connection(self):
-        """Test disconnection when not connected."""
-        helper = GmailHelper(
-            email_address="test@gmail.com",
-            app_password="test-password"
-        )
+    def test_disconnect_error_forgets_connection(self, mock_imap, helper):
+        """Test a failed logout still drops the connection, so the next call reconnects."""
+        dead_connection = _mock_connection()
+        dead_connection.close.side_effect = imaplib.IMAP4.abort("socket error: EOF")
+        mock_imap.side_effect = [dead_connection, _mock_connection()]
+        
+        helper.connect()
+        helper.disconnect()
+        
+        assert helper.connection is None
+        helper.mark_as_read("1")
+        assert mock_imap.call_count == 2
+    
+    def test_noop_alive(self, mock_imap, helper):
+        """Test NOOP keepalive on a live connection."""
+        mock_connection = _mock_connection()
+        mock_imap.return_value = mock_connection
+        mock_connection.noop.return_value = ("OK", [b"NOOP completed"])
+        
+        helper.connect()
+        
+        assert helper.noop() is True
+        mock_connection.noop.assert_called_once()
+    
+    def test_noop_dropped_connection(self, mock_imap, helper):
+        """Test NOOP reports a dropped connection."""
+        mock_connection = _mock_connection()
+        mock_imap.return_value = mock_connection
+        mock_connection.noop.side_effect = imaplib.IMAP4.abort("socket error: EOF")
         
+        helper.connect()
+        
+        assert helper.noop() is False
+    
+    def test_noop_not_connected(self, helper):
+        """Test NOOP without a connection."""
+        assert helper.noop() is False
+    
+    def test_pooled_connection_reused(self, mock_imap, creds):
+        """Test that pooled helpers reuse a logged-in connection."""
+        mock_connection = _mock_connection()
+        mock_imap.return_value = mock_connection
+        mock_connection.noop.return_value = ("OK", [b"NOOP completed"])
+        
+        try:
+            first = GmailHelper(**creds, pooled=True)
+            first.connect()
+            first.disconnect()
+            
+            second = GmailHelper(**creds, pooled=True)
+            second.connect()
+            
+            assert second.connection is mock_connection
+            mock_imap.assert_called_once()
+            mock_connection.login.assert_called_once()
+            mock_connection.logout.assert_not_called()
+            
+            # A forced disconnect logs out instead of returning to the pool
+            second.disconnect(force=True)
+            mock_connection.logout.assert_called_once()
+        finally:
+            GmailHelper.close_pool()
+    
+    def test_pooled_dead_connection_replaced(self, mock_imap, creds):
+        """Test that a pooled connection dropped by the server is not reused."""
+        dead_connection = _mock_connection()
+        dead_connection.noop.side_effect = imaplib.IMAP4.abort("socket error: EOF")
+        new_connection = _mock_connection()
+        mock_imap.side_effect = [dead_connection, new_connection]
+        
+        try:
+            first = GmailHelper(**creds, pooled=True)
+            first.connect()
+            first.disconnect()
+            
+            second = GmailHelper(**creds, pooled=True)
+            second.connect()
+            
+            assert second.connection is new_connection
+        finally:
+            GmailHelper.close_pool()
+    
+    def test_disconnect_no_connection(self, helper):
+        """Test disconnection when not connected."""
         # Should not raise error
         helper.disconnect()
 
@@ -122,47 +282,48 @@ class TestGmailHelperConnection:
 class TestGmailHelperHeaderDecoding:
     """Tests for header decoding."""
     
-    def test_decode_header_ascii(self):
+    def test_decode_header_ascii(self, helper):
         """Test decoding ASCII header."""
-        helper = GmailHelper(
-            email_address="test@gmail.com",
-            app_password="test-password"
-        )
-        
         result = helper._decode_header_value("Simple Subject")
         assert result == "Simple Subject"
     
-    def test_decode_header_empty(self):
+    def test_decode_header_encoded_words(self, helper):
+        """Test decoding a header mixing encoded words and plain text."""
+        result = helper._decode_header_value("=?utf-8?q?Caf=C3=A9?= menu =?iso-8859-1?q?=E9t=E9?=")
+        assert result == "Caf\u00e9 menu \u00e9t\u00e9"
+    
+    def test_decode_header_unknown_charset(self, helper):
+        """Test decoding an encoded word with an unknown charset."""
+        result = helper._decode_header_value("=?x-unknown?q?Hello?=")
+        assert result == "Hello"
+    
+    def test_decode_header_empty(self, helper):
         """Test decoding empty header."""
-        helper = GmailHelper(
-            email_address="test@gmail.com",
-            app_password="test-password"
-        )
-        
         result = helper._decode_header_value("")
         assert result == ""
     
-    def test_decode_header_none(self):
+    def test_decode_header_none(self, helper):
         """Test decoding None header."""
-        helper = GmailHelper(
-            email_address="test@gmail.com",
-            app_password="test-password"
-        )
-        
         result = helper._decode_header_value(None)
         assert result == ""
 
+    
+    def test_parse_one_sender(self, helper):
+        """Test splitting the From header into sender name and address."""
+        quoted = helper._parse_one(b"1", b'From: "Doe, John" <john@example.com>\n\nBody', b"")
+        encoded = helper._parse_one(b"2", b"From: =?utf-8?q?J=C3=B6rg?= <jorg@example.com>\n\nBody", b"")
+        bare = helper._parse_one(b"3", b"From: bare@example.com\n\nBody", b"")
+        
+        assert (quoted["from_name"], quoted["from"]) == ("Doe, John", "john@example.com")
+        assert (encoded["from_name"], encoded["from"]) == ("J\u00f6rg", "jorg@example.com")
+        assert (bare["from_name"], bare["from"]) == ("bare@example.com", "bare@example.com")
+
 
 class TestGmailHelperExtractBody:
     """Tests for email body extraction."""
     
-    def test_extract_body_plain_text(self):
+    def test_extract_body_plain_text(self, helper):
         """Test extracting plain text body."""
-        helper = GmailHelper(
-            email_address="test@gmail.com",
-            app_password="test-password"
-        )
-        
         # Create a simple text message
         msg = Message()
         msg.set_payload("This is a plain text email body.")
@@ -170,17 +331,9 @@ class TestGmailHelperExtractBody:
         body = helper._extract_body(msg)
         assert body == "This is a plain text email body."
     
-    def test_extract_body_multipart(self):
+    def test_extract_body_multipart(self, helper):
         """Test extracting body from multipart message."""
-        helper = GmailHelper(
-            email_address="test@gmail.com",
-            app_password="test-password"
-        )
-        
         # Create a multipart message
-        from email.mime.multipart import MIMEMultipart
-        from email.mime.text import MIMEText
-        
         msg = MIMEMultipart()
         text_part = MIMEText("This is the plain text part.", "plain")
         html_part = MIMEText("<p>This is the HTML part.</p>", "html")
@@ -190,37 +343,30 @@ class TestGmailHelperExtractBody:
         
         body = helper._extract_body(msg)
         assert "plain text part" in body
+    
+    def test_extract_body_max_bytes(self, helper):
+        """Test that only max_bytes of the body are decoded."""
+        msg = Message()
+        msg.set_payload("a" * 100)
+        
+        body = helper._extract_body(msg, max_bytes=10)
+        assert body == "a" * 10
 
 
 class TestGmailHelperReadEmails:
     """Tests for reading emails."""
     
-    @patch('imaplib.IMAP4_SSL')
-    def test_read_latest_emails_success(self, mock_imap):
+    def test_read_latest_emails_success(self, mock_imap, helper):
         """Test successfully reading latest emails."""
-        mock_connection = MagicMock()
+        mock_connection = _mock_connection()
         mock_imap.return_value = mock_connection
         
         # Mock select mailbox
         mock_connection.select.return_value = ("OK", [b"10"])
         
-        # Mock search
-        mock_connection.search.return_value = ("OK", [b"1 2 3 4 5"])
-        
-        # Mock fetch for each email
-        email_data = b"""From: sender@example.com
-To: recipient@example.com
-Subject: Test Email
-Date: Mon, 1 Jan 2024 12:00:00 +0000
-
-This is a test email body."""
-        
-        mock_connection.fetch.return_value = ("OK", [(b"1 (RFC822 {123}", email_data)])
+        # Mock UID SEARCH and FETCH
+        mock_connection.uid.side_effect = _uid(b"1 2 3 4 5", _SAMPLE_FETCH_RETURN)
         
-        helper = GmailHelper(
-            email_address="test@gmail.com",
-            app_password="test-password"
-        )
         helper.connect()
         
         emails = helper.read_latest_emails(n=3)
@@ -229,67 +375,256 @@ This is a test email body."""
         assert len(emails) <= 3
         mock_connection.select.assert_called_with("INBOX")
     
-    @patch('imaplib.IMAP4_SSL')
-    def test_read_latest_emails_unread_only(self, mock_imap):
-        """Test reading only unread emails."""
-        mock_connection = MagicMock()
+    def test_read_latest_emails_single_fetch(self, mock_imap, helper):
+        """Test that emails and flags are fetched in one round-trip."""
+        mock_connection = _mock_connection()
         mock_imap.return_value = mock_connection
         
-        mock_connection.select.return_value = ("OK", [b"10"])
-        mock_connection.search.return_value = ("OK", [b"1 2 3"])
+        mock_connection.select.return_value = ("OK", [b"3"])
         
-        email_data = b"""From: sender@example.com
-To: recipient@example.com
-Subject: Unread Email
-Date: Mon, 1 Jan 2024 12:00:00 +0000
-
-Unread email body."""
+        def make_email(subject):
+            return f"From: sender@example.com\nSubject: {subject}\n\nBody of {subject}.".encode()
         
-        mock_connection.fetch.return_value = ("OK", [(b"1 (RFC822 {123}", email_data)])
+        # UID and FLAGS may come before or after the literal
+        mock_connection.uid.side_effect = _uid(b"1 2 3", ("OK", [
+            (b"2 (UID 2 FLAGS (\\Seen) RFC822 {50}", make_email("Second")),
+            b")",
+            (b"3 (RFC822 {50}", make_email("Third")),
+            b" UID 3 FLAGS ())"
+        ]))
+        
+        helper.connect()
+        
+        emails = helper.read_latest_emails(n=2)
+        
+        assert _uid_calls(mock_connection, "FETCH") == [(b"3,2", f"(FLAGS BODY.PEEK[]<0.{FETCH_MAX_BYTES}>)")]
+        assert [e["subject"] for e in emails] == ["Third", "Second"]
+        assert emails[0]["is_unread"] is True
+        assert emails[1]["is_unread"] is False
+    
+    def test_read_latest_emails_full(self, mock_imap, helper):
+        """Test that full=True fetches complete RFC822 messages."""
+        mock_connection = _mock_connection()
+        mock_imap.return_value = mock_connection
+        
+        mock_connection.select.return_value = ("OK", [b"1"])
+        mock_connection.uid.side_effect = _uid(b"1")
+        
+        helper.connect()
+        
+        helper.read_latest_emails(n=1, full=True)
+        
+        assert _uid_calls(mock_connection, "FETCH") == [(b"1", "(RFC822 FLAGS)")]
+    
+    def test_read_latest_emails_cached(self, mock_imap, tmp_path, creds):
+        """Test that emails in the on-disk cache are not downloaded again."""
+        mock_connection = _mock_connection()
+        mock_imap.return_value = mock_connection
+        
+        mock_connection.select.return_value = ("OK", [b"2"])
+        mock_connection.response.return_value = ("UIDVALIDITY", [b"7"])
+        
+        def fetch(uid_set, items):
+            uids = uid_set.split(b",")
+            if items == "(UID FLAGS)":
+                return ("OK", [b"%d (UID %s FLAGS (\\Seen))" % (int(i) - 100, i) for i in uids])
+            return ("OK", [
+                (b"%d (UID %s FLAGS () BODY[]<0> {40}" % (int(i) - 100, i), b"Subject: Email %s\n\nBody" % i) for i in uids
+            ])
+        
+        mock_connection.uid.side_effect = _uid(b"101 102", fetch)
+        
+        helper = GmailHelper(**creds, cache_dir=tmp_path)
+        helper.connect()
+        
+        first = helper.read_latest_emails(n=1)
+        mock_connection.uid.reset_mock()
+        second = helper.read_latest_emails(n=2)
+        
+        assert [e["subject"] for e in first] == ["Email 102"]
+        assert [e["subject"] for e in second] == ["Email 102", "Email 101"]
+        assert [e["id"] for e in second] == ["102", "101"]
+        # Only the email missing from the cache was downloaded
+        assert [uid_set for uid_set, _ in _uid_calls(mock_connection, "FETCH")] == [b"102,101", b"101"]
+        # Flags of cached emails come from the fresh (UID FLAGS) fetch
+        assert second[0]["is_unread"] is False
+    
+    def test_read_latest_emails_body_modes(self, mock_imap, helper):
+        """Test that snippet and none body modes skip (most of) the body."""
+        mock_connection = _mock_connection()
+        mock_imap.return_value = mock_connection
+        
+        mock_connection.select.return_value = ("OK", [b"1"])
+        mock_connection.uid.side_effect = _uid(b"1", ("OK", [
+            (b"1 (UID 1 FLAGS () BODY[]<0> {5000}", b"Subject: Long\n\n" + b"x" * 5000)
+        ]))
+        
+        helper.connect()
+        
+        snippet_email = helper.read_latest_emails(n=1, body_mode="snippet")[0]
+        assert mock_connection.uid.call_args.args[2] == f"(FLAGS BODY.PEEK[]<0.{SNIPPET_FETCH_BYTES}>)"
+        assert snippet_email["body"] == ""
+        assert snippet_email["snippet"] == "x" * 200 + "..."
+        
+        none_email = helper.read_latest_emails(n=1, body_mode="none")[0]
+        assert none_email["subject"] == "Long"
+        assert none_email["body"] == none_email["snippet"] == ""
+    
+    def test_read_latest_emails_headers_only(self, mock_imap, helper):
+        """Test that headers_only fetches just the header fields."""
+        mock_connection = _mock_connection()
+        mock_imap.return_value = mock_connection
+        
+        mock_connection.select.return_value = ("OK", [b"1"])
+        mock_connection.uid.side_effect = _uid(b"1", ("OK", [(
+            b"1 (UID 1 FLAGS (\\Seen) BODY[HEADER.FIELDS (SUBJECT FROM TO DATE)] {80}",
+            b"Subject: Headers\r\nFrom: Sender <sender@example.com>\r\nTo: me@example.com\r\n\r\n"
+        ), b")"]))
+        
+        helper.connect()
+        
+        emails = helper.read_latest_emails(n=1, headers_only=True)
+        
+        assert _uid_calls(mock_connection, "FETCH") == [(b"1", "(FLAGS BODY.PEEK[HEADER.FIELDS (SUBJECT FROM TO DATE)])")]
+        assert emails[0]["subject"] == "Headers"
+        assert emails[0]["from"] == "sender@example.com"
+        assert emails[0]["body"] == ""
+        assert emails[0]["is_unread"] is False
+    
+    def test_read_latest_emails_skips_unparsable(self, mock_imap, caplog, helper):
+        """Test that an email failing to parse doesn't drop the others."""
+        mock_connection = _mock_connection()
+        mock_imap.return_value = mock_connection
+        
+        mock_connection.select.return_value = ("OK", [b"2"])
+        mock_connection.uid.side_effect = _uid(b"1 2", ("OK", [
+            (b"1 (UID 1 FLAGS () BODY[]<0> {20}", b"Subject: One\n\nBody"),
+            (b"2 (UID 2 FLAGS () BODY[]<0> {20}", b"Subject: Two\n\nBody")
+        ]))
+        
+        helper.connect()
+        
+        original_parse_one = helper._parse_one
+        
+        def parse_one(email_id, raw_email, flags, body_mode):
+            if email_id == b"2":
+                raise ValueError("Malformed email")
+            return original_parse_one(email_id, raw_email, flags, body_mode)
+        
+        with patch.object(helper, "_parse_one", side_effect=parse_one):
+            emails = helper.read_latest_emails(n=2)
+        
+        assert [e["subject"] for e in emails] == ["One"]
+        assert "Error processing email b'2'" in caplog.text
+    
+    def test_read_latest_emails_batched_fetch(self, mock_imap, helper):
+        """Test that large requests are split into bounded FETCH batches."""
+        mock_connection = _mock_connection()
+        mock_imap.return_value = mock_connection
+        
+        mock_connection.select.return_value = ("OK", [b"5"])
+        mock_connection.uid.side_effect = _uid(b"1 2 3 4 5")
+        
+        helper.connect()
+        helper.pipeline_fetch = False
+        
+        helper.read_latest_emails(n=5, batch_size=2)
+        
+        assert [uid_set for uid_set, _ in _uid_calls(mock_connection, "FETCH")] == [b"5,4", b"3,2", b"1"]
+    
+    def test_read_latest_emails_pipelined_fetch(self, mock_imap, helper):
+        """Test that batch FETCH commands are all sent before responses are read."""
+        mock_connection = _mock_connection()
+        mock_imap.return_value = mock_connection
+        
+        mock_connection.select.return_value = ("OK", [b"3"])
+        mock_connection.uid.side_effect = _uid(b"1 2 3")
+        
+        sent = []
+        mock_connection._command.side_effect = lambda name, command, uids, items: sent.append((name, command, uids)) or f"A{len(sent)}"
+        
+        def complete(name, tag):
+            # Every command has been sent before the first response is read
+            assert len(sent) == 2
+            if tag == "A1":
+                mock_connection.untagged_responses["FETCH"] = [
+                    (b"1 (UID 1 RFC822 {40} FLAGS ())", b"From: a@example.com\nSubject: First\n\nBody"),
+                    b")"
+                ]
+            return ("OK", [b"FETCH completed"])
+        
+        mock_connection._command_complete.side_effect = complete
+        # A stale unsolicited FETCH (flag change) from before the commands were sent
+        mock_connection.untagged_responses = {"FETCH": [b"9 (UID 9 FLAGS (\\Seen))"]}
+        
+        helper.connect()
+        
+        emails = helper.read_latest_emails(n=3, batch_size=2)
+        
+        assert sent == [("UID", "FETCH", b"3,2"), ("UID", "FETCH", b"1")]
+        assert _uid_calls(mock_connection, "FETCH") == []
+        assert [e["subject"] for e in emails] == ["First"]
+    
+    def test_pipelined_fetch_reads_all_tags_on_error(self, mock_imap, helper):
+        """Test a BAD response to one pipelined FETCH is raised only after every tag is read."""
+        mock_connection = _mock_connection()
+        mock_imap.return_value = mock_connection
+        mock_connection._command.side_effect = ["A1", "A2", "A3"]
+        
+        completed = []
+        
+        def complete(name, tag):
+            completed.append(tag)
+            if tag == "A1":
+                raise imaplib.IMAP4.error("UID command error: BAD [b'Request too long']")
+            return ("OK", [b"FETCH completed"])
+        
+        mock_connection._command_complete.side_effect = complete
+        mock_connection.untagged_responses = {}
+        
+        helper.connect()
+        
+        with pytest.raises(imaplib.IMAP4.error, match="Request too long"):
+            helper._fetch_batches([[b"1"], [b"2"], [b"3"]], "(FLAGS)")
+        
+        assert completed == ["A1", "A2", "A3"]
+    
+    def test_read_latest_emails_unread_only(self, mock_imap, helper):
+        """Test reading only unread emails."""
+        mock_connection = _mock_connection()
+        mock_imap.return_value = mock_connection
+        
+        mock_connection.select.return_value = ("OK", [b"10"])
+        mock_connection.uid.side_effect = _uid(b"1 2 3", _SAMPLE_FETCH_RETURN)
         
-        helper = GmailHelper(
-            email_address="test@gmail.com",
-            app_password="test-password"
-        )
         helper.connect()
         
         emails = helper.read_latest_emails(n=10, unread_only=True)
         
         # Should search for unread emails
-        mock_connection.search.assert_called_with(None, "UNSEEN")
+        assert _uid_calls(mock_connection, "SEARCH") == [(None, "UNSEEN")]
     
-    @patch('imaplib.IMAP4_SSL')
-    def test_read_latest_emails_no_emails(self, mock_imap):
+    def test_read_latest_emails_no_emails(self, mock_imap, helper):
         """Test reading when no emails exist."""
-        mock_connection = MagicMock()
+        mock_connection = _mock_connection()
         mock_imap.return_value = mock_connection
         
         mock_connection.select.return_value = ("OK", [b"0"])
-        mock_connection.search.return_value = ("OK", [b""])
+        mock_connection.uid.side_effect = _uid()
         
-        helper = GmailHelper(
-            email_address="test@gmail.com",
-            app_password="test-password"
-        )
         helper.connect()
         
         emails = helper.read_latest_emails(n=10)
         
         assert emails == []
     
-    @patch('imaplib.IMAP4_SSL')
-    def test_read_latest_emails_auto_connect(self, mock_imap):
+    def test_read_latest_emails_auto_connect(self, mock_imap, helper):
         """Test that read_latest_emails connects if not already connected."""
-        mock_connection = MagicMock()
+        mock_connection = _mock_connection()
         mock_imap.return_value = mock_connection
         
         mock_connection.select.return_value = ("OK", [b"0"])
-        mock_connection.search.return_value = ("OK", [b""])
-        
-        helper = GmailHelper(
-            email_address="test@gmail.com",
-            app_password="test-password"
-        )
+        mock_connection.uid.side_effect = _uid()
         
         # Don't call connect() manually
         emails = helper.read_latest_emails(n=10)
@@ -297,69 +632,91 @@ Unread email body."""
         # Should auto-connect
         mock_connection.login.assert_called_once()
 
+    
+    @patch('src.core.gmail_helper.aioimaplib')
+    def test_read_latest_emails_async(self, mock_aioimaplib, helper):
+        """Test reading emails concurrently over several aioimaplib connections."""
+        def make_client():
+            client = MagicMock()
+            for method in ("wait_hello_from_server", "login", "select", "uid_search", "uid", "logout"):
+                setattr(client, method, AsyncMock(return_value=Mock(result="OK", lines=[b"1 2 3"])))
+            
+            async def uid(command, uid_set, message_parts):
+                lines = []
+                for email_id in uid_set.split(","):
+                    lines.append(f"{email_id} FETCH (UID {email_id} FLAGS () RFC822 {{40}}".encode())
+                    lines.append(bytearray(f"Subject: Email {email_id}\n\nBody".encode()))
+                    lines.append(b")")
+                lines.append(b"FETCH completed")
+                return Mock(result="OK", lines=lines)
+            
+            client.uid.side_effect = uid
+            return client
+        
+        clients = [make_client(), make_client()]
+        mock_aioimaplib.IMAP4_SSL.side_effect = clients
+        
+        emails = asyncio.run(helper.read_latest_emails_async(n=3, connections=2))
+        
+        assert [e["subject"] for e in emails] == ["Email 3", "Email 2", "Email 1"]
+        _called_with(clients[0].uid, "fetch", "3,1", f"(FLAGS BODY.PEEK[]<0.{FETCH_MAX_BYTES}>)")
+        _called_with(clients[1].uid, "fetch", "2", f"(FLAGS BODY.PEEK[]<0.{FETCH_MAX_BYTES}>)")
+        for client in clients:
+            client.logout.assert_called_once()
+    
+    @patch('src.core.gmail_helper.aioimaplib', None)
+    def test_read_latest_emails_async_requires_aioimaplib(self, helper):
+        """Test that the async reader reports the missing optional dependency."""
+        with pytest.raises(ImportError):
+            asyncio.run(helper.read_latest_emails_async(n=3))
+
 
 class TestGmailHelperMarkEmails:
     """Tests for marking emails as read/unread."""
     
-    @patch('imaplib.IMAP4_SSL')
-    def test_mark_as_read(self, mock_imap):
-        """Test marking email as read."""
-        mock_connection = MagicMock()
+    @pytest.mark.parametrize("op,email_ids,sequence_set,flag,fail,want", [
+        pytest.param("mark_as_read", "123", "123", "+FLAGS", False, True, id="read"),
+        pytest.param("mark_as_unread", "123", "123", "-FLAGS", False, True, id="unread"),
+        pytest.param("mark_as_read", ["7", "1", "2", "3", "9", "8"], "1:3,7:9", "+FLAGS", False, True, id="batch"),
+        pytest.param("mark_as_read", "123", "123", "+FLAGS", True, False, id="error"),
+    ])
+    def test_mark(self, mock_imap, helper, op, email_ids, sequence_set, flag, fail, want):
+        """Test flagging one or several emails by UID with a single STORE, and STORE failures."""
+        mock_connection = _mock_connection()
         mock_imap.return_value = mock_connection
+        mock_connection.uid.side_effect = Exception("Store failed") if fail else None
         
-        helper = GmailHelper(
-            email_address="test@gmail.com",
-            app_password="test-password"
-        )
         helper.connect()
         
-        result = helper.mark_as_read("123")
+        result = getattr(helper, op)(email_ids)
         
-        assert result is True
-        mock_connection.store.assert_called_once_with("123", '+FLAGS', '\\Seen')
+        assert result is want
+        _called_with(mock_connection.uid, 'STORE', sequence_set, flag, '\\Seen')
+        mock_connection.store.assert_not_called()
     
-    @patch('imaplib.IMAP4_SSL')
-    def test_mark_as_unread(self, mock_imap):
-        """Test marking email as unread."""
-        mock_connection = MagicMock()
+    @pytest.mark.parametrize("op", ["mark_as_read", "mark_as_unread"])
+    def test_mark_nothing(self, mock_imap, helper, op):
+        """Test that an empty list of emails sends no STORE."""
+        mock_connection = _mock_connection()
         mock_imap.return_value = mock_connection
         
-        helper = GmailHelper(
-            email_address="test@gmail.com",
-            app_password="test-password"
-        )
         helper.connect()
         
-        result = helper.mark_as_unread("123")
-        
-        assert result is True
-        mock_connection.store.assert_called_once_with("123", '-FLAGS', '\\Seen')
+        assert getattr(helper, op)([]) is True
+        mock_connection.uid.assert_not_called()
     
-    @patch('imaplib.IMAP4_SSL')
-    def test_mark_as_read_error(self, mock_imap):
-        """Test error handling when marking email fails."""
-        mock_connection = MagicMock()
-        mock_imap.return_value = mock_connection
-        mock_connection.store.side_effect = Exception("Store failed")
-        
-        helper = GmailHelper(
-            email_address="test@gmail.com",
-            app_password="test-password"
-        )
-        helper.connect()
-        
-        result = helper.mark_as_read("123")
-        
-        assert result is False
+    def test_mark_as_read_too_many(self, helper):
+        """Test that flagging more than MAX_STORE_IDS emails at once is refused."""
+        with pytest.raises(ValueError):
+            helper.mark_as_unread([str(i) for i in range(1, MAX_STORE_IDS + 2)])
 
 
 class TestGmailHelperGetFolders:
     """Tests for getting folder list."""
     
-    @patch('imaplib.IMAP4_SSL')
-    def test_get_folders_success(self, mock_imap):
+    def test_get_folders_success(self, mock_imap, helper):
         """Test successfully getting folder list."""
-        mock_connection = MagicMock()
+        mock_connection = _mock_connection()
         mock_imap.return_value = mock_connection
         
         mock_connection.list.return_value = ("OK", [
@@ -368,10 +725,6 @@ class TestGmailHelperGetFolders:
             b'(\\HasNoChildren) "/" "Drafts"'
         ])
         
-        helper = GmailHelper(
-            email_address="test@gmail.com",
-            app_password="test-password"
-        )
         helper.connect()
         
         folders = helper.get_folders()
@@ -379,38 +732,51 @@ class TestGmailHelperGetFolders:
         assert len(folders) == 3
         assert "INBOX" in folders
     
-    @patch('imaplib.IMAP4_SSL')
-    def test_get_folders_error(self, mock_imap):
+    def test_get_folders_error(self, mock_imap, helper):
         """Test error handling when getting folders fails."""
-        mock_connection = MagicMock()
+        mock_connection = _mock_connection()
         mock_imap.return_value = mock_connection
         
         mock_connection.list.return_value = ("NO", [])
         
-        helper = GmailHelper(
-            email_address="test@gmail.com",
-            app_password="test-password"
-        )
         helper.connect()
         
         folders = helper.get_folders()
         
         assert folders == []
+    
+    def test_get_folders_names_and_special_use(self, mock_imap, helper):
+        """Test parsing quoted, literal and nested names, and special-use filtering."""
+        mock_connection = _mock_connection()
+        mock_imap.return_value = mock_connection
+        
+        mock_connection.list.return_value = ("OK", [
+            b'(\\HasNoChildren) "/" "INBOX"',
+            b'(\\HasChildren \\Noselect) "/" "[Gmail]"',
+            b'(\\HasNoChildren \\Sent) "/" "[Gmail]/Sent Mail"',
+            b'(\\HasNoChildren) "/" "Work/\\"Q4\\""',
+            (b'(\\HasNoChildren \\Trash) "/" {12}', b'[Gmail]/Bin'),
+        ])
+        
+        helper.connect()
+        
+        assert helper.get_folders() == [
+            "INBOX", "[Gmail]", "[Gmail]/Sent Mail", 'Work/"Q4"', "[Gmail]/Bin"
+        ]
+        assert helper.get_folders(special_use_only=True) == [
+            "INBOX", "[Gmail]/Sent Mail", "[Gmail]/Bin"
+        ]
 
 
 class TestGmailHelperContextManager:
     """Tests for context manager functionality."""
     
-    @patch('imaplib.IMAP4_SSL')
-    def test_context_manager(self, mock_imap):
+    def test_context_manager(self, mock_imap, creds):
         """Test using GmailHelper as context manager."""
-        mock_connection = MagicMock()
+        mock_connection = _mock_connection()
         mock_imap.return_value = mock_connection
         
-        with GmailHelper(
-            email_address="test@gmail.com",
-            app_password="test-password"
-        ) as helper:
+        with GmailHelper(**creds) as helper:
             assert helper.connection is not None
             mock_connection.login.assert_called_once()
         
@@ -422,22 +788,17 @@ class TestGmailHelperContextManager:
 class TestGmailHelperIntegration:
     """Integration tests for GmailHelper."""
     
-    @patch('imaplib.IMAP4_SSL')
-    def test_full_workflow(self, mock_imap):
+    @pytest.mark.slow
+    def test_full_workflow(self, mock_imap, helper):
         """Test complete workflow of connecting, reading, and disconnecting."""
-        mock_connection = MagicMock()
+        mock_connection = _mock_connection()
         mock_imap.return_value = mock_connection
         
         # Setup mocks
         mock_connection.select.return_value = ("OK", [b"0"])
-        mock_connection.search.return_value = ("OK", [b""])
+        mock_connection.uid.side_effect = _uid()
         mock_connection.list.return_value = ("OK", [b'(\\HasNoChildren) "/" "INBOX"'])
         
-        helper = GmailHelper(
-            email_address="test@gmail.com",
-            app_password="test-password"
-        )
-        
         # Connect
         helper.connect()
         assert helper.connection is not None
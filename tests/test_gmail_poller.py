@@ -0,0 +1,245 @@
+"""
+Unit tests for GmailPoller and the Gmail sync route.
+"""
+import pytest
+import asyncio
+import json
+from types import SimpleNamespace
+from unittest.mock import AsyncMock
+
+from app.routes import gmail as gmail_routes
+from app.services import message_processor
+from app.services.gmail_fetch_loader import GmailFetchLoader
+from app.services.gmail_poller import GmailPoller
+from app.services.todo_service import TodoService
+from app.models import Priority, Todo
+
+
+# Unread emails returned by the fake IMAP fetch
+_EMAILS = (
+    {
+        "id": "1", "subject": "Invoice", "from": "billing@example.com", "from_name": "Billing",
+        "body": "Please pay the attached invoice by Friday.", "is_unread": True
+    },
+    {
+        "id": "2", "subject": "Thanks", "from": "friend@example.com", "from_name": "Friend",
+        "body": "Thanks for dinner yesterday!", "is_unread": True
+    },
+)
+
+
+async def _fake_complete(**kwargs):
+    """LLM stand-in: emails mentioning an invoice are action items."""
+    batch = json.loads(kwargs["messages"][1]["content"])
+    items = [
+        {"index": message["index"], "is_action_item": True, "action_item": "Pay invoice", "priority": "high"}
+        if "invoice" in message["content"] else {"index": message["index"], "is_action_item": False}
+        for message in batch
+    ]
+    return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=json.dumps({"items": items})))])
+
+
+@pytest.fixture
+def poller(monkeypatch):
+    """GmailPoller backed by fake IMAP, LLM and todo storage, also used by the routes."""
+    monkeypatch.setenv("GMAIL_USER", "test@gmail.com")
+    monkeypatch.setenv("GMAIL_APP_PASSWORD", "test-password")
+
+    poller = GmailPoller()
+    poller.fetch_calls = 0
+
+    async def fetch(n, unread_only):
+        poller.fetch_calls += 1
+        return [dict(email_data) for email_data in _EMAILS]
+
+    poller.fetch_loader = GmailFetchLoader(fetch)
+    poller.mark_as_read = AsyncMock()
+    poller.mark_as_unread = AsyncMock()
+    monkeypatch.setattr(gmail_routes, "gmail_poller", poller)
+    monkeypatch.setattr(message_processor.llm_client, "complete", _fake_complete)
+    poller.retried = []
+
+    async def enqueue(message):
+        poller.retried.append(message)
+
+    monkeypatch.setattr(message_processor.message_retry_queue, "enqueue", enqueue)
+
+    poller.todos = []
+
+    async def create_todos(todo_creates):
+        created = [Todo(id=str(len(poller.todos) + i), created_at="", **todo_create.model_dump()) for i, todo_create in enumerate(todo_creates)]
+        poller.todos.extend(created)
+        return created
+
+    async def create_todo(todo_create):
+        return (await create_todos([todo_create]))[0]
+
+    monkeypatch.setattr(TodoService, "create_todos", create_todos)
+    monkeypatch.setattr(TodoService, "create_todo", create_todo)
+    return poller
+
+
+class TestGmailPollerClaims:
+    """Tests for claiming emails between the poller and /sync."""
+
+    def test_claim_skips_claimed_and_processed(self, poller):
+        """Test each email is claimed by one caller until released."""
+        emails = [dict(email_data) for email_data in _EMAILS]
+
+        async def run():
+            assert await poller.claim_emails(emails) == emails
+            assert await poller.claim_emails(emails) == []
+
+            poller.processed_email_ids.add("1")
+            await poller.release_emails(emails)
+
+            assert [e["id"] for e in await poller.claim_emails(emails)] == ["2"]
+
+        asyncio.run(run())
+
+    def test_claim_marks_read_and_release_hands_back(self, poller):
+        """Test claimed unread emails are marked read, and unprocessed ones unread on release."""
+        emails = [dict(email_data) for email_data in _EMAILS] + [{"id": "3", "is_unread": False}]
+
+        async def run():
+            await poller.claim_emails(emails)
+            poller.mark_as_read.assert_awaited_once_with(["1", "2"])
+
+            poller.processed_email_ids.add("1")
+            await poller.release_emails(emails)
+            # Email 3 was already read before the claim, so it is left alone
+            poller.mark_as_unread.assert_awaited_once_with(["2"])
+
+        asyncio.run(run())
+
+    def test_failed_analysis_goes_to_retry_queue(self, poller, monkeypatch):
+        """Test emails whose analysis failed are handed to the retry queue instead of back to the next poll."""
+        async def fail(**kwargs):
+            raise ValueError("LLM unavailable")
+
+        monkeypatch.setattr(message_processor.llm_client, "complete", fail)
+
+        asyncio.run(poller.poll_gmail())
+
+        assert poller.todos == []
+        assert [message.subject for message in poller.retried] == ["Invoice", "Thanks"]
+        assert all(email_data["id"] in poller.processed_email_ids for email_data in _EMAILS)
+        assert not any(c.args[0] for c in poller.mark_as_unread.await_args_list)
+        assert poller._claimed_email_ids == {}
+
+    def test_failed_enqueue_is_handed_back(self, poller, monkeypatch):
+        """Test emails that couldn't be queued for retry are marked unread again for the next poll."""
+        async def fail(**kwargs):
+            raise ValueError("LLM unavailable")
+
+        async def enqueue(message):
+            raise OSError("database is locked")
+
+        monkeypatch.setattr(message_processor.llm_client, "complete", fail)
+        monkeypatch.setattr(message_processor.message_retry_queue, "enqueue", enqueue)
+
+        asyncio.run(poller.poll_gmail())
+
+        poller.mark_as_unread.assert_awaited_once_with(["1", "2"])
+
+    def test_concurrent_poll_and_sync(self, poller):
+        """Test a poll and a sync sharing one fetch create one todo per email."""
+        async def run():
+            return await asyncio.gather(poller.poll_gmail(), gmail_routes.sync_gmail_emails(count=10, unread_only=True))
+
+        new_email_count, sync_result = asyncio.run(run())
+
+        assert poller.fetch_calls == 1
+        assert [todo.title for todo in poller.todos] == ["Pay invoice"]
+        assert new_email_count + sync_result["emails_fetched"] == len(_EMAILS)
+        assert all(email_data["id"] in poller.processed_email_ids for email_data in _EMAILS)
+        assert poller._claimed_email_ids == {}
+        # Nothing was handed back
+        assert not any(c.args[0] for c in poller.mark_as_unread.await_args_list)
+
+
+class TestGmailPollerTodos:
+    """Tests for the todos created by a poll."""
+
+    def test_poll_builds_todo_from_action_item(self, poller):
+        """Test the todo carries the analyzed priority, the email's sender and subject, and the gmail source."""
+        assert asyncio.run(poller.poll_gmail()) == len(_EMAILS)
+
+        [todo] = poller.todos
+        assert todo.title == "Pay invoice"
+        assert todo.priority == Priority.high
+        assert todo.description == "From: Billing <billing@example.com>\nSubject: Invoice"
+        assert todo.source == "gmail"
+        assert poller.total_todos_created == 1
+
+    def test_poll_uses_gmail_ignore_rules(self, poller, monkeypatch):
+        """Test emails are analyzed with the Gmail ignore rules for promos, newsletters and notifications."""
+        system_prompts = []
+
+        async def complete(**kwargs):
+            system_prompts.append(kwargs["messages"][0]["content"])
+            return await _fake_complete(**kwargs)
+
+        monkeypatch.setattr(message_processor.llm_client, "complete", complete)
+
+        asyncio.run(poller.poll_gmail())
+
+        assert system_prompts == [message_processor._GMAIL_SYSTEM_MESSAGE["content"]]
+        assert "ignore newsletters" in system_prompts[0]
+
+    def test_poll_skips_non_action_senders_without_llm(self, poller, monkeypatch):
+        """Test no-reply and newsletter emails are marked processed without an LLM call."""
+        calls = []
+
+        async def complete(**kwargs):
+            calls.append(json.loads(kwargs["messages"][1]["content"]))
+            return await _fake_complete(**kwargs)
+
+        monkeypatch.setattr(message_processor.llm_client, "complete", complete)
+
+        async def fetch(n, unread_only):
+            return [
+                {**_EMAILS[0], "id": "3", "from": "no-reply@shop.example.com", "subject": "Your invoice"},
+                dict(_EMAILS[0])
+            ]
+
+        poller.fetch_loader = GmailFetchLoader(fetch)
+
+        asyncio.run(poller.poll_gmail())
+
+        assert [[message["sender"] for message in batch] for batch in calls] == [["billing@example.com"]]
+        assert [todo.title for todo in poller.todos] == ["Pay invoice"]
+        assert "1" in poller.processed_email_ids
+        assert "3" in poller.processed_email_ids
+
+    def test_poll_realigns_reordered_results(self, poller, monkeypatch):
+        """Test results returned out of order are matched to their emails by index."""
+        async def complete(**kwargs):
+            response = await _fake_complete(**kwargs)
+            content = json.loads(response.choices[0].message.content)
+            content["items"].reverse()
+            response.choices[0].message.content = json.dumps(content)
+            return response
+
+        monkeypatch.setattr(message_processor.llm_client, "complete", complete)
+
+        asyncio.run(poller.poll_gmail())
+
+        [todo] = poller.todos
+        assert todo.description == "From: Billing <billing@example.com>\nSubject: Invoice"
+
+    def test_poll_retries_misindexed_results(self, poller, monkeypatch):
+        """Test a batch whose indices are not exactly 0..n-1 fails instead of misattributing todos."""
+        async def complete(**kwargs):
+            items = [
+                {"index": 0, "is_action_item": True, "action_item": "Pay invoice"},
+                {"index": 0, "is_action_item": False}
+            ]
+            return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=json.dumps({"items": items})))])
+
+        monkeypatch.setattr(message_processor.llm_client, "complete", complete)
+
+        asyncio.run(poller.poll_gmail())
+
+        assert poller.todos == []
+        assert [message.subject for message in poller.retried] == ["Invoice", "Thanks"]
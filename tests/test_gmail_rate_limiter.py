@@ -0,0 +1,109 @@
+"""
+Unit tests for GmailRateLimiter.
+"""
+import pytest
+import asyncio
+
+from app.services import gmail_rate_limiter as gmail_rate_limiter_module
+from app.services.gmail_rate_limiter import GmailRateLimiter
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Fake time.monotonic that asyncio.sleep advances instead of waiting."""
+    class _Clock:
+        now = 1000.0
+        sleeps = []
+
+    real_sleep = asyncio.sleep
+
+    async def sleep(delay):
+        _Clock.sleeps.append(delay)
+        _Clock.now += delay
+        await real_sleep(0)
+
+    monkeypatch.setattr(gmail_rate_limiter_module.time, "monotonic", lambda: _Clock.now)
+    monkeypatch.setattr(gmail_rate_limiter_module.asyncio, "sleep", sleep)
+    return _Clock
+
+
+class TestGmailRateLimiter:
+    """Tests for the Gmail token bucket."""
+
+    def test_burst_available_immediately(self, clock):
+        """Test a full bucket serves up to burst tokens without waiting."""
+        limiter = GmailRateLimiter(rate_per_second=2.0, burst=10)
+
+        asyncio.run(limiter.acquire(10))
+
+        assert clock.sleeps == []
+        assert limiter.get_status()["tokens_available"] == 0
+
+    def test_refill_over_time(self, clock):
+        """Test tokens accumulate at rate_per_second, up to burst."""
+        limiter = GmailRateLimiter(rate_per_second=2.0, burst=10)
+        asyncio.run(limiter.acquire(10))
+
+        clock.now += 1.5
+        assert limiter.get_status()["tokens_available"] == 3
+
+        clock.now += 60
+        assert limiter.get_status()["tokens_available"] == 10
+
+    def test_acquire_waits_for_tokens(self, clock):
+        """Test acquire sleeps until enough tokens have refilled."""
+        limiter = GmailRateLimiter(rate_per_second=2.0, burst=10)
+
+        async def run():
+            await limiter.acquire(10)
+            await limiter.acquire(4)
+
+        asyncio.run(run())
+
+        assert clock.sleeps == [pytest.approx(2.0)]
+
+    def test_acquire_capped_at_burst(self, clock):
+        """Test asking for more than burst tokens waits for a full bucket instead of forever."""
+        limiter = GmailRateLimiter(rate_per_second=2.0, burst=10)
+
+        async def run():
+            await limiter.acquire(10)
+            await asyncio.wait_for(limiter.acquire(100), timeout=1)
+
+        asyncio.run(run())
+
+        assert sum(clock.sleeps) == pytest.approx(5.0)
+
+    def test_throttled_halves_rate_and_drains(self, clock):
+        """Test a quota error halves the refill rate, down to the minimum, and empties the bucket."""
+        limiter = GmailRateLimiter(rate_per_second=2.0, burst=10, min_rate_per_second=0.5)
+
+        limiter.on_throttled()
+        assert limiter.rate_per_second == 1.0
+        assert limiter.get_status()["tokens_available"] == 0
+
+        for _ in range(3):
+            limiter.on_throttled()
+        assert limiter.rate_per_second == 0.5
+
+    def test_success_recovers_rate(self, clock):
+        """Test successful calls add back 5% of the maximum rate, up to the maximum."""
+        limiter = GmailRateLimiter(rate_per_second=2.0, burst=10)
+        limiter.on_throttled()
+
+        limiter.on_success()
+        assert limiter.rate_per_second == pytest.approx(1.1)
+
+        for _ in range(20):
+            limiter.on_success()
+        assert limiter.rate_per_second == 2.0
+
+    @pytest.mark.parametrize("message,is_quota", [
+        ("[THROTTLED] Account exceeded command or bandwidth limits.", True),
+        ("[OVERQUOTA] Account is over quota", True),
+        ("Too many simultaneous connections. (Failure)", False),
+        ("socket error: EOF", False),
+    ])
+    def test_is_quota_error(self, message, is_quota):
+        """Test which IMAP errors count as Gmail throttling."""
+        assert GmailRateLimiter.is_quota_error(Exception(message)) is is_quota
@@ -0,0 +1,223 @@
+"""
+Unit tests for AIMDLimiter and LLMClient.
+"""
+import pytest
+import asyncio
+from types import SimpleNamespace
+
+from app.services import llm_client as llm_client_module
+from app.services.llm_client import AIMDLimiter, LLMClient
+
+
+class _ProviderError(Exception):
+    """Provider error carrying an HTTP status code and response headers."""
+
+    def __init__(self, status_code, headers=None):
+        super().__init__(f"HTTP {status_code}")
+        self.status_code = status_code
+        self.headers = headers or {}
+
+
+def _response(headers=None):
+    """Completion response with the given rate-limit headers."""
+    return SimpleNamespace(_hidden_params={"additional_headers": headers or {}})
+
+
+@pytest.fixture
+def sleeps(monkeypatch):
+    """Record asyncio.sleep delays instead of waiting."""
+    delays = []
+    real_sleep = asyncio.sleep
+
+    async def sleep(delay):
+        delays.append(delay)
+        await real_sleep(0)
+
+    monkeypatch.setattr(llm_client_module.asyncio, "sleep", sleep)
+    return delays
+
+
+@pytest.fixture
+def acompletion(monkeypatch):
+    """Stub litellm.acompletion; set .outcomes to the errors/responses to produce in order."""
+    async def stub(**kwargs):
+        stub.calls += 1
+        outcome = stub.outcomes.pop(0)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+    stub.calls = 0
+    stub.outcomes = []
+    monkeypatch.setattr(llm_client_module, "acompletion", stub)
+    return stub
+
+
+class TestAIMDLimiter:
+    """Tests for the AIMD concurrency limiter."""
+
+    def test_additive_increase_clamped(self):
+        """Test fast calls add half a permit, up to max_permits."""
+        limiter = AIMDLimiter(initial_permits=3, max_permits=4, target_latency_seconds=1.0)
+
+        limiter.on_success(0.5)
+        assert limiter.permits == 3.5
+
+        for _ in range(5):
+            limiter.on_success(0.5)
+        assert limiter.permits == 4
+
+    @pytest.mark.parametrize("signal", ["slow_call", "backoff"])
+    def test_multiplicative_decrease_clamped(self, signal):
+        """Test slow calls and backoffs halve the permits, down to min_permits."""
+        limiter = AIMDLimiter(initial_permits=8, min_permits=2, target_latency_seconds=1.0)
+
+        def decrease():
+            if signal == "slow_call":
+                limiter.on_success(5.0)
+            else:
+                limiter.on_backoff()
+
+        decrease()
+        assert limiter.permits == 4
+        decrease()
+        decrease()
+        assert limiter.permits == 2
+
+    def test_acquire_waits_for_permit(self):
+        """Test acquire blocks while all permits are in use."""
+        limiter = AIMDLimiter(initial_permits=1)
+
+        async def run():
+            await limiter.acquire()
+            waiter = asyncio.create_task(limiter.acquire())
+            await asyncio.sleep(0.01)
+            blocked = not waiter.done()
+            await limiter.release()
+            await asyncio.wait_for(waiter, timeout=1)
+            return blocked
+
+        assert asyncio.run(run()) is True
+        assert limiter.in_flight == 1
+
+
+class TestLLMClient:
+    """Tests for LLMClient retries and rate-limit handling."""
+
+    def test_success(self, acompletion, sleeps):
+        """Test a successful call returns the response and grows the limiter."""
+        response = _response()
+        acompletion.outcomes = [response]
+        client = LLMClient(AIMDLimiter(initial_permits=4))
+
+        assert asyncio.run(client.complete(model="m")) is response
+        assert client.limiter.permits == 4.5
+        assert client.limiter.in_flight == 0
+        assert sleeps == []
+
+    def test_retry_after_honored(self, acompletion, sleeps):
+        """Test a 429 with retry-after waits that long, halves the limiter and retries."""
+        response = _response()
+        acompletion.outcomes = [_ProviderError(429, {"retry-after": "3"}), response]
+        client = LLMClient(AIMDLimiter(initial_permits=4))
+
+        assert asyncio.run(client.complete(model="m")) is response
+        assert acompletion.calls == 2
+        assert sleeps == [3.0]
+        assert client.limiter.permits == 2.5
+
+    def test_retry_after_capped(self, acompletion, sleeps):
+        """Test an excessive retry-after is capped at MAX_BACKOFF_SECONDS."""
+        acompletion.outcomes = [_ProviderError(503, {"Retry-After": "3600"}), _response()]
+
+        asyncio.run(LLMClient().complete(model="m"))
+
+        assert sleeps == [LLMClient.MAX_BACKOFF_SECONDS]
+
+    def test_non_retryable_raises_immediately(self, acompletion, sleeps):
+        """Test a client error is raised without retrying."""
+        acompletion.outcomes = [_ProviderError(400)]
+
+        with pytest.raises(_ProviderError):
+            asyncio.run(LLMClient().complete(model="m"))
+
+        assert acompletion.calls == 1
+        assert sleeps == []
+
+    @pytest.mark.parametrize("max_retries,calls", [
+        pytest.param(None, LLMClient.MAX_RETRIES + 1, id="default"),
+        pytest.param(2, 3, id="two"),
+        pytest.param(0, 1, id="none"),
+    ])
+    def test_retries_exhausted(self, acompletion, sleeps, max_retries, calls):
+        """Test the last error is raised once max_retries retries have failed."""
+        acompletion.outcomes = [_ProviderError(429) for _ in range(calls)]
+
+        with pytest.raises(_ProviderError):
+            asyncio.run(LLMClient().complete(model="m", max_retries=max_retries))
+
+        assert acompletion.calls == calls
+        assert len(sleeps) == calls - 1
+
+    @pytest.mark.parametrize("error,retryable", [
+        (_ProviderError(408), True),
+        (_ProviderError(429), True),
+        (_ProviderError(500), True),
+        (_ProviderError(503), True),
+        (_ProviderError(400), False),
+        (_ProviderError(401), False),
+        (asyncio.TimeoutError(), True),
+        (ConnectionError(), True),
+        (ValueError(), False),
+    ])
+    def test_is_retryable(self, error, retryable):
+        """Test which errors are worth retrying."""
+        assert LLMClient()._is_retryable(error) is retryable
+
+    @pytest.mark.parametrize("value,seconds", [("1s", 1.0), ("6m0s", 360.0), ("20ms", 0.02), ("1h2m", 3720.0)])
+    def test_parse_duration(self, value, seconds):
+        """Test OpenAI-style reset durations."""
+        assert LLMClient()._parse_duration(value) == pytest.approx(seconds)
+
+    def test_low_remaining_rate_limit_pauses(self, acompletion, sleeps):
+        """Test calls pause until reset once under 10% of the rate limit remains."""
+        acompletion.outcomes = [
+            _response({
+                "x-ratelimit-remaining-requests": "5",
+                "x-ratelimit-limit-requests": "100",
+                "x-ratelimit-reset-requests": "30s"
+            }),
+            _response()
+        ]
+        client = LLMClient()
+
+        async def run():
+            await client.complete(model="m")
+            assert client.get_status()["paused_for_seconds"] > 29
+            await client.complete(model="m")
+
+        asyncio.run(run())
+
+        assert len(sleeps) == 1
+        assert 29 < sleeps[0] <= 30
+
+    def test_enough_remaining_rate_limit_doesnt_pause(self, acompletion, sleeps):
+        """Test no pause while at least 10% of the rate limit remains."""
+        acompletion.outcomes = [
+            _response({
+                "llm_provider-x-ratelimit-remaining-tokens": "20000",
+                "llm_provider-x-ratelimit-limit-tokens": "100000",
+                "llm_provider-x-ratelimit-reset-tokens": "1m"
+            }),
+            _response()
+        ]
+        client = LLMClient()
+
+        async def run():
+            await client.complete(model="m")
+            await client.complete(model="m")
+
+        asyncio.run(run())
+
+        assert client.get_status()["paused_for_seconds"] == 0.0
+        assert sleeps == []
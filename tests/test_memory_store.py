@@ -0,0 +1,124 @@
+"""
+Unit tests for MemoryStore.
+"""
+import pytest
+import json
+
+from app.storage.memory_store import MemoryStore
+
+
+def _todo(todo_id, title, completed=False):
+    """Todo as stored by the old JSON files."""
+    return {"id": todo_id, "title": title, "created_at": f"2024-01-0{todo_id}T00:00:00.000+00:00", "completed": completed}
+
+
+@pytest.fixture
+def open_store(tmp_path):
+    """Open MemoryStores on tmp_path (reopen to simulate a restart); all are closed after the test."""
+    stores = []
+
+    def open_store():
+        store = MemoryStore(tmp_path)
+        stores.append(store)
+        return store
+
+    yield open_store
+    for store in stores:
+        store.close()
+
+
+class TestMemoryStoreMigration:
+    """Tests for importing the old todos.json into SQLite."""
+
+    def test_migrates_json(self, tmp_path, open_store):
+        """Test the snapshot is imported into the database and renamed."""
+        (tmp_path / "todos.json").write_text(json.dumps({"1": _todo("1", "One", completed=True), "2": _todo("2", "Two")}))
+
+        store = open_store()
+
+        assert {todo["id"]: todo["completed"] for todo in store.get_all_todos()} == {"1": True, "2": False}
+        assert not (tmp_path / "todos.json").exists()
+        assert (tmp_path / "todos.json.migrated").exists()
+
+    def test_migrates_once(self, tmp_path, open_store):
+        """Test a restart doesn't import the renamed file again."""
+        (tmp_path / "todos.json").write_text(json.dumps({"1": _todo("1", "One")}))
+
+        first = open_store()
+        first.delete_todo("1")
+        first.close()
+
+        assert open_store().get_all_todos() == []
+
+
+class TestMemoryStoreTodos:
+    """Tests for todo persistence and the cached JSON list."""
+
+    def test_todos_persist_across_restart(self, open_store):
+        """Test todos written to SQLite are there after reopening."""
+        store = open_store()
+        created = store.create_todos([{"title": "One"}, {"title": "Two"}])
+        store.toggle_todo(created[0]["id"])
+        store.close()
+
+        todos = open_store().get_all_todos()
+
+        assert [(todo["title"], todo["completed"]) for todo in todos] == [("One", True), ("Two", False)]
+
+    def test_json_cache_invalidated_on_change(self, open_store):
+        """Test the cached todo list JSON is reused until a mutation."""
+        store = open_store()
+        todo = store.create_todo({"title": "One"})
+
+        cached = store.get_all_todos_json()
+        assert store.get_all_todos_json() is cached
+        assert json.loads(cached) == store.get_all_todos()
+
+        store.update_todo(todo["id"], {"title": "Renamed"})
+        assert [t["title"] for t in json.loads(store.get_all_todos_json())] == ["Renamed"]
+
+        store.toggle_todo(todo["id"])
+        assert json.loads(store.get_all_todos_json())[0]["completed"] is True
+
+        store.create_todo({"title": "Two"})
+        assert len(json.loads(store.get_all_todos_json())) == 2
+
+        store.delete_todo(todo["id"])
+        assert [t["title"] for t in json.loads(store.get_all_todos_json())] == ["Two"]
+
+    def test_integrations_json_invalidated_on_toggle(self, open_store):
+        """Test the cached integration list JSON is rebuilt after a toggle."""
+        store = open_store()
+
+        cached = store.get_all_integrations_json()
+        assert store.get_all_integrations_json() is cached
+
+        store.toggle_integration("slack")
+        slack = next(i for i in json.loads(store.get_all_integrations_json()) if i["name"] == "slack")
+        assert slack["enabled"] is True
+        assert slack["status"] == "connected"
+
+    def test_json_cache_sees_other_processes_writes(self, open_store):
+        """Test cached JSON is rebuilt after another connection (API worker or poller) writes."""
+        store, other = open_store(), open_store()
+        store.create_todo({"title": "One"})
+        store.get_all_todos_json()
+        cached_integrations = store.get_all_integrations_json()
+
+        other.create_todo({"title": "Two"})
+        other.toggle_integration("slack")
+
+        assert [t["title"] for t in json.loads(store.get_all_todos_json())] == ["One", "Two"]
+        assert store.get_all_integrations_json() is not cached_integrations
+        assert store.get_integration("slack")["enabled"] is True
+
+    def test_integration_toggles_persist_across_restart(self, open_store):
+        """Test integration toggles are stored in the database."""
+        store = open_store()
+        store.toggle_integration("gmail")
+        store.close()
+
+        gmail = open_store().get_integration("gmail")
+
+        assert gmail["enabled"] is False
+        assert gmail["status"] == "disconnected"
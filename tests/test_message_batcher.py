@@ -0,0 +1,96 @@
+"""
+Unit tests for MessageBatcher.
+"""
+import pytest
+import asyncio
+
+from app.models import MessageCreate
+from app.services import message_batcher as message_batcher_module
+from app.services.message_batcher import MessageBatcher
+
+
+def _message(i):
+    """Message whose content identifies it."""
+    return MessageCreate(content=f"Message {i}", sender="someone@example.com", source="slack")
+
+
+class _Batches(list):
+    """Batches passed to process_messages; raises error if set."""
+    error = None
+
+
+@pytest.fixture
+def batches(monkeypatch):
+    """Stub MessageProcessor.process_messages; records each batch and returns one todo ID per message."""
+    recorded = _Batches()
+
+    async def process_messages(messages):
+        recorded.append([message.content for message in messages])
+        await asyncio.sleep(0)
+        if recorded.error is not None:
+            raise recorded.error
+        return [[f"todo-{message.content}"] for message in messages]
+
+    monkeypatch.setattr(message_batcher_module.MessageProcessor, "process_messages", process_messages)
+    return recorded
+
+
+class TestMessageBatcher:
+    """Tests for coalescing messages into batched processing calls."""
+
+    def test_split_at_max_batch_size(self, batches):
+        """Test a full batch is flushed at once and the remainder on the timer."""
+        batcher = MessageBatcher(max_batch_size=3, max_wait_seconds=0.001)
+
+        async def run():
+            return await asyncio.gather(*[batcher.submit(_message(i)) for i in range(7)])
+
+        asyncio.run(run())
+
+        assert batches == [
+            ["Message 0", "Message 1", "Message 2"],
+            ["Message 3", "Message 4", "Message 5"],
+            ["Message 6"]
+        ]
+
+    def test_flush_after_max_wait(self, batches):
+        """Test a partial batch is flushed once max_wait_seconds pass."""
+        batcher = MessageBatcher(max_batch_size=16, max_wait_seconds=0.01)
+
+        async def run():
+            first = asyncio.create_task(batcher.submit(_message(0)))
+            await asyncio.sleep(0)
+            second = asyncio.create_task(batcher.submit(_message(1)))
+            await asyncio.sleep(0)
+            assert batches == []
+            return await asyncio.wait_for(asyncio.gather(first, second), timeout=1)
+
+        results = asyncio.run(run())
+
+        assert batches == [["Message 0", "Message 1"]]
+        assert results == [["todo-Message 0"], ["todo-Message 1"]]
+
+    def test_results_delivered_per_caller(self, batches):
+        """Test each caller gets the todo IDs for its own message."""
+        batcher = MessageBatcher(max_batch_size=2, max_wait_seconds=0.001)
+
+        async def run():
+            return await asyncio.gather(*[batcher.submit(_message(i)) for i in range(5)])
+
+        results = asyncio.run(run())
+
+        assert results == [[f"todo-Message {i}"] for i in range(5)]
+
+    def test_error_reaches_every_waiter(self, batches):
+        """Test a failed batch raises in every caller in it."""
+        batches.error = ValueError("LLM unavailable")
+        batcher = MessageBatcher(max_batch_size=3, max_wait_seconds=0.001)
+
+        async def run():
+            return await asyncio.gather(*[batcher.submit(_message(i)) for i in range(3)], return_exceptions=True)
+
+        results = asyncio.run(run())
+
+        assert len(batches) == 1
+        assert all(isinstance(result, ValueError) for result in results)
+        assert batcher._pending == []
@@ -0,0 +1,75 @@
+"""
+Unit tests for MessageProcessor batch analysis.
+"""
+import pytest
+import asyncio
+import json
+from types import SimpleNamespace
+
+from app.models import MessageCreate
+from app.services import message_processor
+from app.services.message_processor import MessageProcessor
+
+
+def _message(source, content, sender="someone@example.com"):
+    """Message from source with the given content."""
+    return MessageCreate(content=content, sender=sender, source=source, subject="Hello")
+
+
+@pytest.fixture
+def llm_calls(monkeypatch):
+    """
+    Fake LLM recording each call's (system prompt, batch); messages mentioning
+    "todo" are action items and a batch containing "poison" fails.
+    """
+    calls = []
+
+    async def complete(**kwargs):
+        batch = json.loads(kwargs["messages"][1]["content"])
+        calls.append((kwargs["messages"][0]["content"], batch))
+        if any("poison" in message["content"] for message in batch):
+            raise ValueError("context length exceeded")
+        items = [
+            {"index": message["index"], "is_action_item": "todo" in message["content"], "action_item": message["content"]}
+            for message in batch
+        ]
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=json.dumps({"items": items})))])
+
+    monkeypatch.setattr(message_processor.llm_client, "complete", complete)
+    return calls
+
+
+class TestMessageProcessorAnalyze:
+    """Tests for analyze_messages."""
+
+    def test_batches_grouped_by_source(self, llm_calls):
+        """Test Gmail messages coalesced with other sources still get the Gmail prompt rules."""
+        messages = [_message("slack", "todo 1"), _message("gmail", "todo 2"), _message("slack", "todo 3")]
+
+        action_items = asyncio.run(MessageProcessor.analyze_messages(messages))
+
+        assert [item.action_item for item in action_items] == ["todo 1", "todo 2", "todo 3"]
+        batches = {
+            tuple(message["content"] for message in batch): prompt == message_processor._GMAIL_SYSTEM_MESSAGE["content"]
+            for prompt, batch in llm_calls
+        }
+        assert batches == {("todo 1", "todo 3"): False, ("todo 2",): True}
+
+    def test_content_truncated(self, llm_calls, monkeypatch):
+        """Test each message's content is capped at MAX_CONTENT_CHARS."""
+        monkeypatch.setattr(MessageProcessor, "MAX_CONTENT_CHARS", 10)
+
+        asyncio.run(MessageProcessor.analyze_messages([_message("slack", "todo " + "x" * 100)]))
+
+        [(_, [message])] = llm_calls
+        assert message["content"] == "todo xxxxx"
+
+    def test_failed_batch_split_per_message(self, llm_calls):
+        """Test a failing batch is retried one message at a time, so only the bad message fails."""
+        messages = [_message("slack", "todo 1"), _message("slack", "poison"), _message("slack", "todo 3")]
+
+        action_items = asyncio.run(MessageProcessor.analyze_messages(messages))
+
+        assert action_items[1] is None
+        assert [action_items[0].action_item, action_items[2].action_item] == ["todo 1", "todo 3"]
+        assert len(llm_calls) == 4
@@ -0,0 +1,169 @@
+"""
+Unit tests for MessageRetryQueue.
+"""
+import pytest
+import asyncio
+import json
+import sqlite3
+
+from app.models import MessageCreate
+from app.services.retry_queue import MessageRetryQueue
+
+
+_MESSAGE = MessageCreate(content="Please review the budget", sender="boss@example.com", source="gmail", subject="Budget")
+
+
+class _Recorder:
+    """Async handler recording the messages it gets; fails if fail is set."""
+
+    def __init__(self, fail=False):
+        self.fail = fail
+        self.messages = []
+
+    async def __call__(self, message):
+        self.messages.append(message)
+        if self.fail:
+            raise ValueError("LLM unavailable")
+
+
+def _queue(db_file, handler, on_give_up, max_attempts=5):
+    """MessageRetryQueue with millisecond backoff."""
+    return MessageRetryQueue(
+        handler=handler,
+        on_give_up=on_give_up,
+        db_file=db_file,
+        max_attempts=max_attempts,
+        base_delay_seconds=0.001,
+        max_delay_seconds=0.01
+    )
+
+
+async def _drained(queue):
+    """Wait until the queue has no pending messages left."""
+    while queue.get_status()["pending_messages"]:
+        await asyncio.sleep(0.001)
+
+
+class TestMessageRetryQueue:
+    """Tests for retrying failed messages."""
+
+    def test_enqueue_persists(self, tmp_path):
+        """Test that enqueued messages are written to the database."""
+        db_file = tmp_path / "todos.db"
+
+        async def run():
+            queue = _queue(db_file, _Recorder(), _Recorder())
+            await queue.enqueue(_MESSAGE)
+            return queue
+
+        queue = asyncio.run(run())
+
+        rows = sqlite3.connect(db_file).execute("SELECT message, attempt FROM retry_queue").fetchall()
+        assert [(json.loads(message), attempt) for message, attempt in rows] == [(_MESSAGE.model_dump(), 1)]
+        assert queue.get_status() == {"is_running": False, "pending_messages": 1}
+
+    def test_reload_after_restart(self, tmp_path):
+        """Test that a new queue retries the entries a previous run left in the database."""
+        db_file = tmp_path / "todos.db"
+        handler = None
+
+        async def run():
+            nonlocal handler
+            await _queue(db_file, _Recorder(), _Recorder()).enqueue(_MESSAGE)
+
+            handler = _Recorder()
+            queue = _queue(db_file, handler, _Recorder())
+            await queue.start()
+            await asyncio.wait_for(_drained(queue), timeout=1)
+            await queue.stop()
+            return queue
+
+        queue = asyncio.run(run())
+
+        assert handler.messages == [_MESSAGE]
+        assert queue.get_status() == {"is_running": False, "pending_messages": 0}
+
+    def test_workers_sharing_a_database_retry_once(self, tmp_path):
+        """Test an entry is retried by only one of several queues (API workers) on the same database."""
+        db_file = tmp_path / "todos.db"
+        handlers = [_Recorder() for _ in range(3)]
+
+        async def run():
+            queues = [_queue(db_file, handler, _Recorder()) for handler in handlers]
+            for queue in queues:
+                await queue.start()
+            for _ in range(5):
+                await queues[0].enqueue(_MESSAGE)
+            await asyncio.wait_for(_drained(queues[0]), timeout=2)
+            for queue in queues:
+                await queue.stop()
+
+        asyncio.run(run())
+
+        assert sum(len(handler.messages) for handler in handlers) == 5
+
+    def test_expired_lease_is_claimed_again(self, tmp_path):
+        """Test an entry leased by a worker that died is retried once the lease expires."""
+        db_file = tmp_path / "todos.db"
+        handler = _Recorder()
+
+        async def run():
+            dead = _queue(db_file, _Recorder(), _Recorder())
+            await dead.enqueue(_MESSAGE)
+            await asyncio.sleep(0.01)
+            dead.LEASE_SECONDS = 0.01
+            assert dead._claim_next() is not None
+
+            queue = _queue(db_file, handler, _Recorder())
+            assert queue._claim_next() is None
+            await queue.start()
+            await asyncio.wait_for(_drained(queue), timeout=1)
+            await queue.stop()
+
+        asyncio.run(run())
+
+        assert handler.messages == [_MESSAGE]
+
+    def test_stop_releases_lease(self, tmp_path):
+        """Test stopping mid-retry hands the entry back instead of leaving it leased."""
+        db_file = tmp_path / "todos.db"
+        started = None
+
+        async def hang(message):
+            started.set()
+            await asyncio.Event().wait()
+
+        async def run():
+            nonlocal started
+            started = asyncio.Event()
+            queue = _queue(db_file, hang, _Recorder())
+            await queue.start()
+            await queue.enqueue(_MESSAGE)
+            await asyncio.wait_for(started.wait(), timeout=1)
+            await queue.stop()
+
+        asyncio.run(run())
+
+        assert sqlite3.connect(db_file).execute("SELECT claimed_until FROM retry_queue").fetchall() == [(0,)]
+
+    @pytest.mark.parametrize("max_attempts", [2, 4])
+    def test_gives_up_after_max_attempts(self, tmp_path, max_attempts):
+        """Test that the give-up handler runs once the attempt cap is reached."""
+        db_file = tmp_path / "todos.db"
+        handler = _Recorder(fail=True)
+        on_give_up = _Recorder()
+
+        async def run():
+            queue = _queue(db_file, handler, on_give_up, max_attempts=max_attempts)
+            await queue.start()
+            await queue.enqueue(_MESSAGE)
+            await asyncio.wait_for(_drained(queue), timeout=1)
+            await queue.stop()
+            return queue
+
+        queue = asyncio.run(run())
+
+        # The first attempt failed before the message was enqueued
+        assert len(handler.messages) == max_attempts - 1
+        assert on_give_up.messages == [_MESSAGE]
+        assert queue.get_status()["pending_messages"] == 0